@@ -0,0 +1,126 @@
+"""Result cache for candle analyses shared by the MM HELPER chart bots.
+
+The FiboFBO flow bot (``/mtf``, ``/impulse``), the live bot's ``/dbo-preview``
+and the Twelve Data auto-analysis bot all compute structure over the same
+``candles`` tables. Results are cached per process under (analysis kind,
+timeframe, newest candle, config hash), so a burst of requests costs one
+computation per new candle. The newest candle is identified by its ts and
+OHLC: a forming bar that ticks is a new candle for the cache.
+
+Concurrent misses on one key wait for the first caller's result instead of
+computing it again. Cached results are shared between callers and must be
+treated as read-only.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+from typing import Any, Callable, Mapping
+
+DEFAULT_ANALYSIS_CACHE_SIZE = 512
+
+_CACHE_LOCK = threading.Lock()
+_analysis_cache: OrderedDict[tuple[Any, ...], Any] = OrderedDict()
+_inflight: dict[tuple[Any, ...], threading.Event] = {}
+_stats = {"hits": 0, "misses": 0}
+_max_entries: int | None = None
+
+
+def _cache_size() -> int:
+    global _max_entries
+    if _max_entries is None:
+        raw = (os.getenv("MMHELPER_ANALYSIS_CACHE_SIZE") or "").strip()
+        try:
+            value = int(raw) if raw else DEFAULT_ANALYSIS_CACHE_SIZE
+        except ValueError:
+            value = DEFAULT_ANALYSIS_CACHE_SIZE
+        _max_entries = value if value > 0 else DEFAULT_ANALYSIS_CACHE_SIZE
+    return _max_entries
+
+
+def _jsonable(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        return {"__type__": type(value).__name__, **asdict(value)}
+    return repr(value)
+
+
+def config_hash(config: Any) -> str:
+    """Stable hash of a config dataclass, dict, tuple or plain value."""
+    raw = json.dumps(config, sort_keys=True, default=_jsonable, ensure_ascii=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def candle_marker(candle: Mapping[str, Any] | None) -> tuple[Any, ...]:
+    """(ts, open, high, low, close) of a candle row, or ``()`` when there is none."""
+    if not candle:
+        return ()
+    return (
+        str(candle["ts"]),
+        float(candle["open"]),
+        float(candle["high"]),
+        float(candle["low"]),
+        float(candle["close"]),
+    )
+
+
+def cached_analysis(
+    kind: str,
+    timeframe: str,
+    last_candle: Mapping[str, Any] | None,
+    config: Any,
+    compute: Callable[[], Any],
+) -> Any:
+    """Return ``compute()`` for this key, computing it at most once per new candle.
+
+    ``config`` must cover everything besides the newest candle that changes the
+    result, including the window size when callers analyse the last N rows.
+    """
+    key = (str(kind), str(timeframe).lower(), candle_marker(last_candle), config_hash(config))
+    while True:
+        with _CACHE_LOCK:
+            if key in _analysis_cache:
+                _analysis_cache.move_to_end(key)
+                _stats["hits"] += 1
+                return _analysis_cache[key]
+            pending = _inflight.get(key)
+            if pending is None:
+                pending = threading.Event()
+                _inflight[key] = pending
+                _stats["misses"] += 1
+                break
+        # Another thread is computing this key; if it fails, try ourselves.
+        pending.wait()
+
+    try:
+        result = compute()
+    except BaseException:
+        with _CACHE_LOCK:
+            _inflight.pop(key, None)
+        pending.set()
+        raise
+
+    with _CACHE_LOCK:
+        _analysis_cache[key] = result
+        _analysis_cache.move_to_end(key)
+        while len(_analysis_cache) > _cache_size():
+            _analysis_cache.popitem(last=False)
+        _inflight.pop(key, None)
+    pending.set()
+    return result
+
+
+def analysis_cache_stats() -> dict[str, int]:
+    with _CACHE_LOCK:
+        return {"entries": len(_analysis_cache), **_stats}
+
+
+def clear_analysis_cache() -> None:
+    with _CACHE_LOCK:
+        _analysis_cache.clear()
+        _stats["hits"] = 0
+        _stats["misses"] = 0
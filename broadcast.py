@@ -0,0 +1,248 @@
+"""Broadcast queue worker shared by the MM HELPER bots.
+
+Bots enqueue jobs with ``storage.enqueue_broadcast_job``; each bot process runs
+one worker that drains its own jobs. Recipients are split into shards and
+claimed one at a time, so several workers (or processes) can share a job
+without sending twice. Sends go through one token bucket per process (Telegram
+allows roughly 30 messages/second per bot) plus a per-chat spacing.
+RetryAfter pauses the whole bucket and network errors back off and retry.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from storage import (
+    BROADCAST_SHARDS,
+    claim_broadcast_recipient,
+    complete_broadcast_recipient,
+    finish_broadcast_job,
+    get_broadcast_job,
+    next_broadcast_job,
+    set_broadcast_job_recipients,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROADCAST_CONCURRENCY = 8
+DEFAULT_BROADCAST_RATE_PER_SEC = 25.0
+PER_CHAT_MIN_INTERVAL_SEC = 1.0
+MAX_SEND_ATTEMPTS = 4
+# Flood waits are Telegram pacing us, not a failed send; they get their own cap.
+MAX_RETRY_AFTER_WAITS = 30
+CHAT_SLOT_PRUNE_THRESHOLD = 4096
+NETWORK_BACKOFF_BASE_SEC = 1.0
+WORKER_IDLE_POLL_SEC = 2.0
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = (os.getenv(name) or "").strip()
+    try:
+        value = float(raw) if raw else default
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+class TokenBucket:
+    """Async token bucket; ``pause()`` stops every sender until a flood wait ends."""
+
+    def __init__(self, rate_per_sec: float, capacity: float | None = None) -> None:
+        self.rate = float(rate_per_sec)
+        self.capacity = float(capacity if capacity is not None else rate_per_sec)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+_global_bucket: TokenBucket | None = None
+_chat_next_send: dict[int, float] = {}
+
+
+def _bucket() -> TokenBucket:
+    global _global_bucket
+    if _global_bucket is None:
+        _global_bucket = TokenBucket(_env_number("MMHELPER_BROADCAST_RATE_PER_SEC", DEFAULT_BROADCAST_RATE_PER_SEC))
+    return _global_bucket
+
+
+async def _wait_for_chat(chat_id: int) -> None:
+    # Reserve the slot before sleeping so concurrent broadcasts to one chat queue up.
+    now = time.monotonic()
+    if len(_chat_next_send) >= CHAT_SLOT_PRUNE_THRESHOLD:
+        for stale_chat_id in [key for key, next_slot in _chat_next_send.items() if next_slot <= now]:
+            del _chat_next_send[stale_chat_id]
+    slot = max(now, _chat_next_send.get(chat_id, 0.0))
+    _chat_next_send[chat_id] = slot + PER_CHAT_MIN_INTERVAL_SEC
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+
+def _retry_after_seconds(exc: RetryAfter) -> float:
+    value = exc.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+async def _deliver(bot: Any, chat_id: int, text: str) -> tuple[str, int, str, Any]:
+    """Send to one chat; returns (status, attempts, error, message).
+
+    Only real failures count toward MAX_SEND_ATTEMPTS; RetryAfter waits are
+    capped separately by MAX_RETRY_AFTER_WAITS.
+    """
+    error = ""
+    attempts = 0
+    failures = 0
+    flood_waits = 0
+    while failures < MAX_SEND_ATTEMPTS and flood_waits <= MAX_RETRY_AFTER_WAITS:
+        await _wait_for_chat(chat_id)
+        await _bucket().acquire()
+        attempts += 1
+        try:
+            message = await bot.send_message(chat_id=chat_id, text=text)
+            return "sent", attempts, "", message
+        except RetryAfter as exc:
+            wait_sec = _retry_after_seconds(exc)
+            error = f"retry_after {wait_sec:.0f}s"
+            flood_waits += 1
+            _bucket().pause(wait_sec)
+        except Forbidden as exc:
+            # User blocked the bot or left; retrying will not help.
+            return "blocked", attempts, str(exc), None
+        except BadRequest as exc:
+            return "failed", attempts, str(exc), None
+        except (TimedOut, NetworkError) as exc:
+            error = str(exc) or exc.__class__.__name__
+            failures += 1
+            if failures < MAX_SEND_ATTEMPTS:
+                await asyncio.sleep(NETWORK_BACKOFF_BASE_SEC * (2 ** (failures - 1)))
+        except Exception as exc:
+            return "failed", attempts, str(exc) or exc.__class__.__name__, None
+    return "failed", attempts, error, None
+
+
+async def _run_job_shard(
+    bot: Any,
+    job: dict[str, Any],
+    shard: int,
+    on_sent: Callable[[dict[str, Any], int, Any], Awaitable[None] | None] | None,
+) -> None:
+    job_id = int(job["job_id"])
+    while True:
+        chat_id = await asyncio.to_thread(claim_broadcast_recipient, job_id, shard)
+        if chat_id is None:
+            return
+        status, attempts, error, message = await _deliver(bot, chat_id, job["text"])
+        message_id = int(getattr(message, "message_id", 0) or 0)
+        await asyncio.to_thread(complete_broadcast_recipient, job_id, chat_id, status, attempts, error, message_id)
+        if status == "sent" and on_sent is not None:
+            try:
+                result = on_sent(job, chat_id, message)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                logger.exception("Broadcast job %s on_sent hook failed for %s", job_id, chat_id)
+
+
+async def run_broadcast_job(
+    bot: Any,
+    job: dict[str, Any],
+    *,
+    on_sent: Callable[[dict[str, Any], int, Any], Awaitable[None] | None] | None = None,
+) -> dict[str, Any] | None:
+    """Deliver every pending recipient of ``job``, one task per shard group."""
+    concurrency = int(_env_number("MMHELPER_BROADCAST_CONCURRENCY", DEFAULT_BROADCAST_CONCURRENCY))
+    workers = max(1, min(concurrency, BROADCAST_SHARDS))
+
+    async def worker(index: int) -> None:
+        for shard in range(index, BROADCAST_SHARDS, workers):
+            await _run_job_shard(bot, job, shard, on_sent)
+
+    await asyncio.gather(*(worker(index) for index in range(workers)))
+    progress = await asyncio.to_thread(finish_broadcast_job, int(job["job_id"]))
+    if progress and progress["status"] == "done" and (progress["failed"] or progress["blocked"]):
+        logger.info(
+            "Broadcast job %s: %s/%s sent, %s blocked, %s failed",
+            job["job_id"],
+            progress["sent"],
+            progress["total"],
+            progress["blocked"],
+            progress["failed"],
+        )
+    return progress
+
+
+async def run_broadcast_worker(
+    bot: Any,
+    bot_name: str,
+    *,
+    resolve_recipients: Callable[[dict[str, Any]], list[int]] | None = None,
+    on_sent: Callable[[dict[str, Any], int, Any], Awaitable[None] | None] | None = None,
+) -> None:
+    """Drain ``bot_name``'s jobs from the shared queue forever.
+
+    ``resolve_recipients`` fills in jobs that were queued without a recipient
+    list, when they become due. Queue calls run in a thread: SQLite may wait
+    out another process's write lock, and the bot's event loop must not.
+    """
+    while True:
+        job = await asyncio.to_thread(next_broadcast_job, bot_name)
+        if job is None:
+            await asyncio.sleep(WORKER_IDLE_POLL_SEC)
+            continue
+        if job["status"] == "scheduled":
+            if resolve_recipients is not None:
+                chat_ids = await asyncio.to_thread(resolve_recipients, job)
+            else:
+                chat_ids = []
+            await asyncio.to_thread(set_broadcast_job_recipients, int(job["job_id"]), chat_ids)
+            job = await asyncio.to_thread(get_broadcast_job, int(job["job_id"]))
+            if job is None:
+                continue
+        progress = await run_broadcast_job(bot, job, on_sent=on_sent)
+        if progress is not None and progress["status"] != "done":
+            # Recipients still held by another worker; check back later.
+            await asyncio.sleep(WORKER_IDLE_POLL_SEC)
+
+
+_worker_tasks: dict[str, asyncio.Task] = {}
+
+
+def ensure_broadcast_worker(application: Any, bot_name: str, **kwargs: Any) -> None:
+    """Start (or restart after a crash) this process's queue worker for ``bot_name``."""
+    task = _worker_tasks.get(bot_name)
+    if task is not None and not task.done():
+        return
+    if task is not None and not task.cancelled() and task.exception() is not None:
+        logger.error("Broadcast worker %s stopped: %r; restarting", bot_name, task.exception())
+    _worker_tasks[bot_name] = application.create_task(
+        run_broadcast_worker(application.bot, bot_name, **kwargs),
+        name=f"broadcast_worker:{bot_name}",
+    )
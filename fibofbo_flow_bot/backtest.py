@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Walk-forward backtest of ``evaluateMTF`` and ``analyzeImpulse`` on the candles table.
+
+The replay clock is the step timeframe (M5 by default). At each step close every
+timeframe gets the bars that had closed by then (open ts + TF length <= step
+close); those counts are found for all steps at once with a sorted search. A
+forming higher-TF bar is never seen, so nothing after the step leaks in. Per-TF
+state comes from the streaming analyzers, so a step only recomputes the
+timeframes that received a bar.
+
+Signals are MTF ``trade_ready`` switching on (side from the H4 bias) and an
+impulse TF switching ``valid_impulse`` on (side from its direction). Outcomes
+are read from the step bars after the signal: return, MFE and MAE in price at
+each horizon (counted in step bars).
+
+    python3 backtest.py --since "2025-01-01" --out backtest.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from candles import CandleArrays, epoch_seconds, np
+from dbo import load_candle_history
+from impulse_engine import TARGET_TFS, ImpulseConfig
+from mtf_engine import TF_ORDER, MTFConfig
+from streaming import DEFAULT_STREAM_WINDOW, ImpulseAnalyzer, MTFAnalyzer
+
+TF_SECONDS = {
+    "M5": 5 * 60,
+    "M15": 15 * 60,
+    "M30": 30 * 60,
+    "H1": 60 * 60,
+    "H4": 4 * 60 * 60,
+    "D1": 24 * 60 * 60,
+    "W1": 7 * 24 * 60 * 60,
+}
+DEFAULT_HORIZONS = (12, 48, 288)
+DEFAULT_CANDLES_DB = "/root/mmhelper/db/twelve_data_bot/candles.db"
+
+
+def load_history(db_path: Path, until_ts: str = "") -> dict[str, CandleArrays]:
+    """Every TF in ``TF_ORDER`` from the chart engine DB as columnar candles.
+
+    Without ``until_ts`` the newest row of each TF is dropped: the feeder is
+    still writing it (``sync_stream`` treats it as forming), so the newest
+    step would otherwise score a bar that has not closed.
+    """
+    history: dict[str, CandleArrays] = {}
+    for tf in TF_ORDER:
+        rows = load_candle_history(db_path, tf.lower(), until_ts)
+        if not until_ts:
+            rows = rows[:-1]
+        history[tf] = CandleArrays.from_candles(
+            [{"ts": c.ts, "open": c.open, "high": c.high, "low": c.low, "close": c.close} for c in rows]
+        )
+    return history
+
+
+def _closed_counts(cols: CandleArrays, tf_seconds: int, step_close: Any) -> list[int]:
+    """Number of ``cols`` bars closed at each step close time."""
+    if np is not None:
+        closes = np.asarray(cols.ts, dtype=np.int64) + tf_seconds
+        return np.searchsorted(closes, np.asarray(step_close, dtype=np.int64), side="right").tolist()
+    closes = [int(ts) + tf_seconds for ts in cols.ts]
+    return [bisect_right(closes, t) for t in step_close]
+
+
+def history_rows(history: dict[str, CandleArrays]) -> dict[str, list[dict[str, Any]]]:
+    """Candle dicts per TF as the streams take them; reusable across runs."""
+    return {tf: _rows(history.get(tf) or CandleArrays.from_candles([])) for tf in TF_ORDER}
+
+
+def _rows(cols: CandleArrays) -> list[dict[str, Any]]:
+    return [
+        {"ts": label, "open": float(o), "high": float(h), "low": float(l), "close": float(c)}
+        for label, o, h, l, c in zip(cols.labels, cols.open, cols.high, cols.low, cols.close)
+    ]
+
+
+def _feed(stream: Any, rows: list[dict[str, Any]], fed: int, upto: int, window: int) -> None:
+    if upto - fed > window:
+        # Too far behind (first step): only the last window matters, as in sync_stream.
+        stream.reset()
+        fed = upto - window
+    for row in rows[fed:upto]:
+        stream.update(row)
+
+
+def signal_outcomes(cols: CandleArrays, signals: list[dict[str, Any]], horizons: tuple[int, ...]) -> None:
+    """Attach return/MFE/MAE per horizon to each signal (``None`` past the data end)."""
+    n = len(cols)
+    for sig in signals:
+        i = int(sig["step"])
+        entry = float(cols.close[i])
+        sign = 1.0 if sig["side"] == "BUY" else -1.0
+        outcomes: dict[str, dict[str, float] | None] = {}
+        for h in horizons:
+            if i + h >= n:
+                outcomes[str(h)] = None
+                continue
+            hi = float(max(cols.high[i + 1 : i + h + 1]))
+            lo = float(min(cols.low[i + 1 : i + h + 1]))
+            outcomes[str(h)] = {
+                "return": sign * (float(cols.close[i + h]) - entry),
+                "mfe": hi - entry if sign > 0 else entry - lo,
+                "mae": entry - lo if sign > 0 else hi - entry,
+            }
+        sig["outcomes"] = outcomes
+
+
+def outcome_stats(signals: list[dict[str, Any]], horizons: tuple[int, ...]) -> dict[str, Any]:
+    """Per signal source: count, win rate and average return/MFE/MAE at each horizon."""
+    by_source: dict[str, list[dict[str, Any]]] = {}
+    for sig in signals:
+        by_source.setdefault(sig["source"], []).append(sig)
+
+    out: dict[str, Any] = {}
+    for source, group in sorted(by_source.items()):
+        per_horizon: dict[str, Any] = {}
+        for h in horizons:
+            done = [s["outcomes"][str(h)] for s in group if s["outcomes"].get(str(h))]
+            count = len(done)
+            per_horizon[str(h)] = {
+                "count": count,
+                "win_rate": round(sum(1 for o in done if o["return"] > 0) / count, 4) if count else 0.0,
+                "avg_return": round(sum(o["return"] for o in done) / count, 5) if count else 0.0,
+                "avg_mfe": round(sum(o["mfe"] for o in done) / count, 5) if count else 0.0,
+                "avg_mae": round(sum(o["mae"] for o in done) / count, 5) if count else 0.0,
+            }
+        out[source] = {"signals": len(group), "horizons": per_horizon}
+    return out
+
+
+def run_backtest(
+    history: dict[str, CandleArrays],
+    mtf_config: MTFConfig | None = None,
+    impulse_config: ImpulseConfig | None = None,
+    *,
+    start: str = "",
+    window: int = DEFAULT_STREAM_WINDOW,
+    step_tf: str = "M5",
+    horizons: tuple[int, ...] = DEFAULT_HORIZONS,
+    symbol: str = "XAUUSD",
+    keep_series: bool = True,
+    rows: dict[str, list[dict[str, Any]]] | None = None,
+) -> dict[str, Any]:
+    """Replay ``history`` (TF -> candles) step by step from ``start``; see the module docstring.
+
+    ``rows`` is ``history_rows(history)``, for callers replaying one history many times.
+    """
+    started = time.perf_counter()
+    step_tf = str(step_tf or "M5").upper()
+    if step_tf not in TF_SECONDS:
+        raise ValueError(f"Unsupported step tf: {step_tf}")
+    empty = CandleArrays.from_candles([])
+    step_cols = history.get(step_tf) or empty
+    step_seconds = TF_SECONDS[step_tf]
+    step_close = [int(ts) + step_seconds for ts in step_cols.ts]
+    start_epoch = epoch_seconds(start) if start else 0
+    first = bisect_right(step_close, start_epoch - 1) if start_epoch else 0
+
+    mtf = MTFAnalyzer(mtf_config, window=window, cache=False)
+    impulse = ImpulseAnalyzer(impulse_config, window=window, cache=False)
+    feeds: list[tuple[str, Any]] = [(tf, stream) for tf, stream in mtf.streams.items()]
+    feeds += [(tf, stream) for tf, stream in impulse.streams.items()]
+    counts = {tf: _closed_counts(history.get(tf) or empty, TF_SECONDS[tf], step_close) for tf in TF_ORDER}
+    if rows is None:
+        rows = history_rows(history)
+    fed = [0] * len(feeds)
+
+    mtf_series: dict[str, list[Any]] = {"ts": [], "score": [], "trade_ready": [], "hard_reject_reason": [], "h4_bias": []}
+    impulse_series = {
+        tf: {"ts": [], "phase": [], "direction": [], "valid_impulse": [], "strength_score": []} for tf in TARGET_TFS
+    }
+    signals: list[dict[str, Any]] = []
+    score_hist: dict[int, int] = {}
+    rejects: dict[str, int] = {}
+    ready_steps = 0
+    was_ready = False
+    was_valid = {tf: False for tf in TARGET_TFS}
+
+    for i in range(first, len(step_close)):
+        for k, (tf, stream) in enumerate(feeds):
+            upto = counts[tf][i]
+            if upto > fed[k]:
+                _feed(stream, rows[tf], fed[k], upto, window)
+                fed[k] = upto
+
+        label = step_cols.labels[i]
+        now = datetime.fromtimestamp(step_close[i], tz=timezone.utc)
+        result = mtf.evaluate(symbol, now)
+        score_state = result["score_state"]
+        h4_bias = result["mtf_state"]["context"]["H4"].get("bias", "RANGE")
+        score = int(score_state["score"])
+        ready = bool(score_state["trade_ready"])
+        reject = score_state["hard_reject_reason"]
+        score_hist[score] = score_hist.get(score, 0) + 1
+        if reject:
+            rejects[reject] = rejects.get(reject, 0) + 1
+        ready_steps += int(ready)
+        if ready and not was_ready and h4_bias in {"BULL", "BEAR"}:
+            side = "BUY" if h4_bias == "BULL" else "SELL"
+            signals.append({"source": "MTF", "step": i, "ts": label, "side": side, "score": score})
+        was_ready = ready
+        if keep_series:
+            mtf_series["ts"].append(label)
+            mtf_series["score"].append(score)
+            mtf_series["trade_ready"].append(ready)
+            mtf_series["hard_reject_reason"].append(reject)
+            mtf_series["h4_bias"].append(h4_bias)
+
+        for tf in TARGET_TFS:
+            stream = impulse.streams[tf]
+            upto = counts[tf][i]
+            # Impulse state only moves when its own TF closes a bar.
+            if upto == 0 or (i > first and upto == counts[tf][i - 1]):
+                continue
+            res = stream.result()
+            series = impulse_series[tf]
+            series["ts"].append(rows[tf][upto - 1]["ts"])
+            series["phase"].append(res["phase"])
+            series["direction"].append(res["direction"])
+            series["valid_impulse"].append(bool(res["valid_impulse"]))
+            series["strength_score"].append(int(res["strength_score"]))
+            valid = bool(res["valid_impulse"])
+            if valid and not was_valid[tf] and res["direction"] in {"BULL", "BEAR"}:
+                side = "BUY" if res["direction"] == "BULL" else "SELL"
+                signals.append(
+                    {"source": f"IMPULSE_{tf}", "step": i, "ts": label, "side": side, "score": int(res["strength_score"])}
+                )
+            was_valid[tf] = valid
+
+    signal_outcomes(step_cols, signals, horizons)
+    steps = max(0, len(step_close) - first)
+    seconds = time.perf_counter() - started
+    impulse_summary = {}
+    for tf, series in impulse_series.items():
+        phases: dict[str, int] = {}
+        for phase in series["phase"]:
+            phases[phase] = phases.get(phase, 0) + 1
+        impulse_summary[tf] = {
+            "bars": len(series["phase"]),
+            "phase_counts": phases,
+            "valid_impulses": sum(series["valid_impulse"]),
+        }
+
+    out: dict[str, Any] = {
+        "symbol": symbol,
+        "step_tf": step_tf,
+        "start_ts": step_cols.labels[first] if steps else None,
+        "end_ts": step_cols.labels[-1] if steps else None,
+        "horizons": list(horizons),
+        "summary": {
+            "mtf": {
+                "steps": steps,
+                "trade_ready_steps": ready_steps,
+                "trade_ready_pct": round(ready_steps / steps * 100, 2) if steps else 0.0,
+                "score_hist": {str(k): v for k, v in sorted(score_hist.items())},
+                "hard_reject": rejects,
+            },
+            "impulse": impulse_summary,
+            "signals": outcome_stats(signals, horizons),
+        },
+        "runtime": {
+            "steps": steps,
+            "seconds": round(seconds, 3),
+            "steps_per_sec": round(steps / seconds, 1) if seconds > 0 else 0.0,
+        },
+        "signals": signals,
+    }
+    if keep_series:
+        out["series"] = {"mtf": mtf_series, "impulse": impulse_series}
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the MTF and impulse engines.")
+    parser.add_argument(
+        "--db",
+        default=os.getenv("FIBOFBO_FLOW_CANDLES_DB", DEFAULT_CANDLES_DB),
+        help="Candles DB path",
+    )
+    parser.add_argument("--since", default="", help="First step to score (UTC, e.g. 2025-01-01)")
+    parser.add_argument("--until", default="", help="Last candle ts to load (UTC); default drops the forming newest bar")
+    parser.add_argument("--step", default="m5", help="Step timeframe (default m5)")
+    parser.add_argument("--horizons", default=",".join(str(h) for h in DEFAULT_HORIZONS), help="Outcome horizons in step bars")
+    parser.add_argument("--window", type=int, default=DEFAULT_STREAM_WINDOW, help="Candles kept per TF")
+    parser.add_argument("--series", action="store_true", help="Include per-step series in the output")
+    parser.add_argument("--out", default="backtest.json", help="Output JSON file")
+    args = parser.parse_args()
+
+    horizons = tuple(int(h) for h in args.horizons.split(",") if h.strip())
+    history = load_history(Path(args.db).resolve(), args.until)
+    result = run_backtest(
+        history,
+        start=args.since,
+        window=args.window,
+        step_tf=args.step,
+        horizons=horizons,
+        keep_series=args.series,
+    )
+    Path(args.out).write_text(json.dumps(result, ensure_ascii=True, indent=2), encoding="utf-8")
+    print(json.dumps({"summary": result["summary"], "runtime": result["runtime"]}, ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
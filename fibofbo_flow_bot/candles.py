@@ -0,0 +1,230 @@
+"""Columnar candle container and kernels shared by the detection engines.
+
+``CandleArrays`` holds normalised candles as contiguous float64 open/high/low/
+close arrays plus an int64 epoch-second timestamp array. The kernels give the
+same results as the per-candle loops they replace; when NumPy is not installed
+they run those loops on plain lists instead.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+
+def epoch_seconds(text: str) -> int:
+    """Epoch seconds of a candle ts (number or ISO text, UTC when naive); 0 if unparseable."""
+    raw = str(text or "").strip()
+    if not raw:
+        return 0
+    try:
+        return int(float(raw))
+    except ValueError:
+        pass
+    try:
+        dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+@dataclass
+class CandleArrays:
+    labels: list[str]
+    ts: Any
+    open: Any
+    high: Any
+    low: Any
+    close: Any
+
+    @classmethod
+    def from_candles(cls, candles: list[dict[str, Any]], ts: list[int] | None = None) -> CandleArrays:
+        """Build from ``_norm_candles`` rows (keys ts/open/high/low/close).
+
+        ``ts`` takes epoch seconds already parsed by the caller, e.g. a stream.
+        """
+        labels = [str(c["ts"]) for c in candles]
+        if ts is None:
+            ts = [epoch_seconds(label) for label in labels]
+        cols = [[float(c[key]) for c in candles] for key in ("open", "high", "low", "close")]
+        if np is not None:
+            ts = np.asarray(ts, dtype=np.int64)
+            cols = [np.asarray(col, dtype=np.float64) for col in cols]
+        return cls(labels, ts, *cols)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def window(self, start: int, stop: int | None = None) -> CandleArrays:
+        """Candles ``[start:stop]``; array views, so no copy with NumPy."""
+        sl = slice(start, stop)
+        return CandleArrays(
+            self.labels[sl],
+            self.ts[sl],
+            self.open[sl],
+            self.high[sl],
+            self.low[sl],
+            self.close[sl],
+        )
+
+    def last_ts(self) -> int:
+        return int(self.ts[-1]) if len(self) else 0
+
+
+def _swing_flags(cols: CandleArrays, lookback: int) -> tuple[list[bool], list[bool]]:
+    # is_high[k] / is_low[k] for centre candle lookback + k.
+    n = len(cols)
+    if np is not None:
+        centre = slice(lookback, n - lookback)
+        is_high = np.ones(n - 2 * lookback, dtype=bool)
+        is_low = np.ones(n - 2 * lookback, dtype=bool)
+        for k in range(1, lookback + 1):
+            for other in (slice(lookback - k, n - lookback - k), slice(lookback + k, n - lookback + k)):
+                is_high &= cols.high[centre] > cols.high[other]
+                is_low &= cols.low[centre] < cols.low[other]
+        return is_high.tolist(), is_low.tolist()
+
+    highs, lows = cols.high, cols.low
+    is_high = []
+    is_low = []
+    for i in range(lookback, n - lookback):
+        others = list(range(i - lookback, i)) + list(range(i + 1, i + lookback + 1))
+        is_high.append(all(highs[i] > highs[j] for j in others))
+        is_low.append(all(lows[i] < lows[j] for j in others))
+    return is_high, is_low
+
+
+def detect_swings(cols: CandleArrays, lookback: int) -> list[dict[str, Any]]:
+    """Fractal swing highs/lows, with repeated same-kind swings compressed."""
+    if len(cols) < (lookback * 2 + 1):
+        return []
+    is_high, is_low = _swing_flags(cols, lookback)
+    raw: list[dict[str, Any]] = []
+    for k, (high_ok, low_ok) in enumerate(zip(is_high, is_low)):
+        i = lookback + k
+        if high_ok:
+            raw.append({"idx": i, "ts": cols.labels[i], "kind": "H", "price": float(cols.high[i])})
+        elif low_ok:
+            raw.append({"idx": i, "ts": cols.labels[i], "kind": "L", "price": float(cols.low[i])})
+
+    out: list[dict[str, Any]] = []
+    for s in raw:
+        if not out:
+            out.append(s)
+            continue
+        p = out[-1]
+        if p["kind"] != s["kind"]:
+            out.append(s)
+            continue
+        if s["kind"] == "H" and s["price"] > p["price"]:
+            out[-1] = s
+        if s["kind"] == "L" and s["price"] < p["price"]:
+            out[-1] = s
+    return out
+
+
+def true_range(cols: CandleArrays) -> list[float]:
+    n = len(cols)
+    if n == 0:
+        return []
+    if np is not None:
+        tr = np.empty(n, dtype=np.float64)
+        tr[0] = max(float(cols.high[0] - cols.low[0]), 0.0)
+        prev_close = cols.close[:-1]
+        tr[1:] = np.maximum(
+            np.maximum(cols.high[1:] - cols.low[1:], np.abs(cols.high[1:] - prev_close)),
+            np.abs(cols.low[1:] - prev_close),
+        )
+        return tr.tolist()
+
+    out = [max(cols.high[0] - cols.low[0], 0.0)]
+    for i in range(1, n):
+        h, l, pc = cols.high[i], cols.low[i], cols.close[i - 1]
+        out.append(max(h - l, abs(h - pc), abs(l - pc)))
+    return out
+
+
+def atr(cols: CandleArrays, period: int) -> list[float]:
+    """Simple-average ATR; the first ``period - 1`` bars average what they have."""
+    trs = true_range(cols)
+    if not trs:
+        return []
+    n = len(trs)
+    if np is None or period < 1:
+        out: list[float] = []
+        for i in range(n):
+            if i + 1 < period:
+                out.append(sum(trs[: i + 1]) / (i + 1))
+            else:
+                out.append(sum(trs[i + 1 - period : i + 1]) / period)
+        return out
+
+    tr = np.asarray(trs, dtype=np.float64)
+    warm = min(period - 1, n)
+    # cumsum and the shifted adds below both sum left to right, like sum().
+    head = np.cumsum(tr[:warm]) / np.arange(1, warm + 1, dtype=np.float64)
+    count = n - warm
+    window = np.zeros(count, dtype=np.float64)
+    for k in range(period):
+        window += tr[warm + 1 - period + k : warm + 1 - period + k + count]
+    return head.tolist() + (window / period).tolist()
+
+
+def overlap_ratio(cols: CandleArrays) -> float:
+    """Share of consecutive candle pairs whose high/low ranges overlap."""
+    n = len(cols)
+    if n < 2:
+        return 0.0
+    if np is not None:
+        lo = np.maximum(cols.low[:-1], cols.low[1:])
+        hi = np.minimum(cols.high[:-1], cols.high[1:])
+        return int(np.count_nonzero(hi > lo)) / (n - 1)
+    cnt = 0
+    for i in range(1, n):
+        lo = max(cols.low[i - 1], cols.low[i])
+        hi = min(cols.high[i - 1], cols.high[i])
+        if hi > lo:
+            cnt += 1
+    return cnt / (n - 1)
+
+
+def wick_dominance(cols: CandleArrays) -> float:
+    """Share of candles whose upper + lower wick is longer than the body."""
+    n = len(cols)
+    if n == 0:
+        return 0.0
+    if np is not None:
+        body = np.abs(cols.close - cols.open)
+        upper = np.maximum(0.0, cols.high - np.maximum(cols.open, cols.close))
+        lower = np.maximum(0.0, np.minimum(cols.open, cols.close) - cols.low)
+        return int(np.count_nonzero((upper + lower) > body)) / n
+    wick_dominant = 0
+    for o, h, l, cl in zip(cols.open, cols.high, cols.low, cols.close):
+        body = abs(cl - o)
+        upper = max(0.0, h - max(o, cl))
+        lower = max(0.0, min(o, cl) - l)
+        if upper + lower > body:
+            wick_dominant += 1
+    return wick_dominant / n
+
+
+def strong_body_count(cols: CandleArrays, ratio: float) -> int:
+    """Candles whose body is at least ``ratio`` of their high-low range."""
+    if len(cols) == 0:
+        return 0
+    if np is not None:
+        rng = np.maximum(cols.high - cols.low, 1e-9)
+        return int(np.count_nonzero(np.abs(cols.close - cols.open) / rng >= ratio))
+    strong = 0
+    for o, h, l, cl in zip(cols.open, cols.high, cols.low, cols.close):
+        if abs(cl - o) / max(h - l, 1e-9) >= ratio:
+            strong += 1
+    return strong
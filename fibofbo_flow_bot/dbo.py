@@ -1,9 +1,16 @@
 from __future__ import annotations
 
-import sqlite3
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 
+# Shared SQLite connection pool lives at the repo root.
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
+
+import shared_db  # noqa: E402
+
 
 @dataclass
 class Candle:
@@ -20,20 +27,17 @@ def load_candles(db_path: Path, timeframe: str, limit: int) -> list[Candle]:
     tf = str(timeframe or "").strip().lower()
     capped_limit = max(1, int(limit or 1))
 
-    con = sqlite3.connect(db_path)
-    try:
-        rows = con.execute(
-            """
-            SELECT ts, open, high, low, close
-            FROM candles
-            WHERE timeframe = ?
-            ORDER BY ts DESC
-            LIMIT ?
-            """,
-            (tf, capped_limit),
-        ).fetchall()
-    finally:
-        con.close()
+    con = shared_db.connect(db_path, row_factory=None)
+    rows = con.execute(
+        """
+        SELECT ts, open, high, low, close
+        FROM candles
+        WHERE timeframe = ?
+        ORDER BY ts DESC
+        LIMIT ?
+        """,
+        (tf, capped_limit),
+    ).fetchall()
 
     rows.reverse()
     out: list[Candle] = []
@@ -52,6 +56,58 @@ def load_candles(db_path: Path, timeframe: str, limit: int) -> list[Candle]:
     return out
 
 
+def load_candles_since(db_path: Path, timeframe: str, since_ts: str, limit: int) -> list[Candle]:
+    """Candles with ts >= since_ts, oldest first (at most ``limit`` rows)."""
+    tf = str(timeframe or "").strip().lower()
+    capped_limit = max(1, int(limit or 1))
+
+    con = shared_db.connect(db_path, row_factory=None)
+    rows = con.execute(
+        """
+        SELECT ts, open, high, low, close
+        FROM candles
+        WHERE timeframe = ? AND ts >= ?
+        ORDER BY ts ASC
+        LIMIT ?
+        """,
+        (tf, str(since_ts), capped_limit),
+    ).fetchall()
+    return [
+        Candle(idx=i, ts=str(ts), open=float(o), high=float(h), low=float(l), close=float(c))
+        for i, (ts, o, h, l, c) in enumerate(rows)
+    ]
+
+
+def load_candle_history(db_path: Path, timeframe: str, until_ts: str = "") -> list[Candle]:
+    """Every candle of ``timeframe`` (up to ``until_ts`` inclusive when given), oldest first."""
+    tf = str(timeframe or "").strip().lower()
+    con = shared_db.connect(db_path, row_factory=None)
+    if until_ts:
+        rows = con.execute(
+            """
+            SELECT ts, open, high, low, close
+            FROM candles
+            WHERE timeframe = ? AND ts <= ?
+            ORDER BY ts ASC
+            """,
+            (tf, str(until_ts)),
+        ).fetchall()
+    else:
+        rows = con.execute(
+            """
+            SELECT ts, open, high, low, close
+            FROM candles
+            WHERE timeframe = ?
+            ORDER BY ts ASC
+            """,
+            (tf,),
+        ).fetchall()
+    return [
+        Candle(idx=i, ts=str(ts), open=float(o), high=float(h), low=float(l), close=float(c))
+        for i, (ts, o, h, l, c) in enumerate(rows)
+    ]
+
+
 def get_engine_status(db_path: Path, timeframe: str, limit: int = 5) -> dict:
     """Simple status helper for bot commands and debug exports."""
     candles = load_candles(db_path=db_path, timeframe=timeframe, limit=limit)
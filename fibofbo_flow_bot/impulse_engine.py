@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any
 
+from candles import CandleArrays, atr, detect_swings, overlap_ratio, strong_body_count, wick_dominance
 
 TARGET_TFS = ("H4", "H1", "M30", "M15")
 
@@ -58,99 +59,12 @@ def _norm_candles(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return out
 
 
-def _detect_swings(candles: list[dict[str, Any]], lookback: int) -> list[dict[str, Any]]:
-    if len(candles) < (lookback * 2 + 1):
-        return []
-    raw: list[dict[str, Any]] = []
-    for i in range(lookback, len(candles) - lookback):
-        c = candles[i]
-        others = candles[i - lookback : i] + candles[i + 1 : i + lookback + 1]
-        if all(c["high"] > x["high"] for x in others):
-            raw.append({"idx": i, "ts": c["ts"], "kind": "H", "price": c["high"]})
-        elif all(c["low"] < x["low"] for x in others):
-            raw.append({"idx": i, "ts": c["ts"], "kind": "L", "price": c["low"]})
-
-    # compress repeated same-kind swings
-    out: list[dict[str, Any]] = []
-    for s in raw:
-        if not out:
-            out.append(s)
-            continue
-        p = out[-1]
-        if p["kind"] != s["kind"]:
-            out.append(s)
-            continue
-        if s["kind"] == "H" and s["price"] > p["price"]:
-            out[-1] = s
-        if s["kind"] == "L" and s["price"] < p["price"]:
-            out[-1] = s
-    return out
-
-
-def _true_range(curr: dict[str, Any], prev_close: float | None) -> float:
-    h = float(curr["high"])
-    l = float(curr["low"])
-    if prev_close is None:
-        return max(h - l, 0.0)
-    return max(h - l, abs(h - prev_close), abs(l - prev_close))
-
-
-def _atr(candles: list[dict[str, Any]], period: int) -> list[float]:
-    if not candles:
-        return []
-    out: list[float] = []
-    trs: list[float] = []
-    prev_close: float | None = None
-    for c in candles:
-        tr = _true_range(c, prev_close)
-        trs.append(tr)
-        prev_close = float(c["close"])
-        if len(trs) < period:
-            out.append(sum(trs) / max(1, len(trs)))
-        else:
-            window = trs[-period:]
-            out.append(sum(window) / period)
-    return out
-
-
 def _avg_body(candles: list[dict[str, Any]]) -> float:
     if not candles:
         return 0.0
     return sum(abs(float(c["close"]) - float(c["open"])) for c in candles) / len(candles)
 
 
-def _overlap_ratio(candles: list[dict[str, Any]]) -> float:
-    if len(candles) < 2:
-        return 0.0
-    cnt = 0
-    for i in range(1, len(candles)):
-        a = candles[i - 1]
-        b = candles[i]
-        lo = max(float(a["low"]), float(b["low"]))
-        hi = min(float(a["high"]), float(b["high"]))
-        if hi > lo:
-            cnt += 1
-    return cnt / (len(candles) - 1)
-
-
-def _wick_dominance(candles: list[dict[str, Any]]) -> float:
-    if not candles:
-        return 0.0
-    wick_dominant = 0
-    for c in candles:
-        o = float(c["open"])
-        h = float(c["high"])
-        l = float(c["low"])
-        cl = float(c["close"])
-        body = abs(cl - o)
-        upper = max(0.0, h - max(o, cl))
-        lower = max(0.0, min(o, cl) - l)
-        wick = upper + lower
-        if wick > body:
-            wick_dominant += 1
-    return wick_dominant / len(candles)
-
-
 def _find_last_leg(swings: list[dict[str, Any]]) -> dict[str, Any] | None:
     if len(swings) < 2:
         return None
@@ -308,13 +222,8 @@ def _detect_bos(candles: list[dict[str, Any]], swings: list[dict[str, Any]], leg
     return False
 
 
-def _body_dominance(leg_candles: list[dict[str, Any]], ratio: float) -> tuple[bool, int]:
-    strong = 0
-    for c in leg_candles:
-        rng = max(float(c["high"]) - float(c["low"]), 1e-9)
-        body = abs(float(c["close"]) - float(c["open"]))
-        if body / rng >= ratio:
-            strong += 1
+def _body_dominance(leg_cols: CandleArrays, ratio: float) -> tuple[bool, int]:
+    strong = strong_body_count(leg_cols, ratio)
     return strong >= 2, strong
 
 
@@ -355,6 +264,7 @@ def _retrace_guard_ok(candles: list[dict[str, Any]], leg: dict[str, Any], retrac
 
 def _latest_compression(
     candles: list[dict[str, Any]],
+    cols: CandleArrays,
     atrs: list[float],
     cfg: ImpulseConfig,
     atr_ratio: float,
@@ -366,8 +276,8 @@ def _latest_compression(
     win = candles[-n:]
     win_range = max(float(c["high"]) for c in win) - min(float(c["low"]) for c in win)
     atr_now = atrs[-1] if atrs else 0.0
-    overlap = _overlap_ratio(win)
-    wick_dom = _wick_dominance(win)
+    overlap = overlap_ratio(cols.window(len(candles) - n))
+    wick_dom = wick_dominance(cols.window(len(candles) - n))
 
     # no BOS in compression window: closes remain inside first half's bounds
     half = max(2, n // 2)
@@ -394,7 +304,14 @@ def _latest_compression(
     }
 
 
-def _find_prev_impulse_leg(swings: list[dict[str, Any]], candles: list[dict[str, Any]], atrs: list[float], tf_threshold: float, cfg: ImpulseConfig) -> dict[str, Any] | None:
+def _find_prev_impulse_leg(
+    swings: list[dict[str, Any]],
+    candles: list[dict[str, Any]],
+    cols: CandleArrays,
+    atrs: list[float],
+    tf_threshold: float,
+    cfg: ImpulseConfig,
+) -> dict[str, Any] | None:
     if len(swings) < 4:
         return None
     # scan backward for recent valid impulse-like leg
@@ -407,7 +324,7 @@ def _find_prev_impulse_leg(swings: list[dict[str, Any]], candles: list[dict[str,
         e = int(leg["end_idx"])
         if e <= s or e >= len(candles):
             continue
-        seg = candles[s : e + 1]
+        seg = cols.window(s, e + 1)
         if len(seg) < 2:
             continue
         atr_ref = atrs[e] if e < len(atrs) else (atrs[-1] if atrs else 0.0)
@@ -444,11 +361,28 @@ def analyzeImpulse(tf_name: str, candles: list[dict[str, Any]], config: ImpulseC
             "notes": ["Not enough candles"],
         }
 
-    swings = _detect_swings(rows, cfg.swing_lookback)
-    atrs = _atr(rows, cfg.atr_period)
+    cols = CandleArrays.from_candles(rows)
+    swings = detect_swings(cols, cfg.swing_lookback)
+    atrs = atr(cols, cfg.atr_period)
+    return analyzeImpulseStructure(tf, rows, cols, swings, atrs, cfg)
+
+
+def analyzeImpulseStructure(
+    tf: str,
+    rows: list[dict[str, Any]],
+    cols: CandleArrays,
+    swings: list[dict[str, Any]],
+    atrs: list[float],
+    cfg: ImpulseConfig,
+) -> dict[str, Any]:
+    """Classify the latest leg from precomputed structure (30+ normalised rows).
+
+    ``analyzeImpulse`` builds the swings/ATR itself; streaming analyzers pass
+    the ones they maintain incrementally.
+    """
     leg = _pick_effective_leg(swings, rows, atrs)
     tf_threshold = float(cfg.atr_multiplier_by_tf.get(tf, 1.6))
-    compression = _latest_compression(rows, atrs, cfg, atr_ratio=0.0, tf_threshold=tf_threshold)
+    compression = _latest_compression(rows, cols, atrs, cfg, atr_ratio=0.0, tf_threshold=tf_threshold)
 
     if not leg:
         notes = ["No clear leg from swings"]
@@ -471,18 +405,19 @@ def analyzeImpulse(tf_name: str, candles: list[dict[str, Any]], config: ImpulseC
     s_idx = int(leg["start_idx"])
     e_idx = int(leg["end_idx"])
     seg = rows[s_idx : e_idx + 1]
+    seg_cols = cols.window(s_idx, e_idx + 1)
 
     atr_ref = atrs[e_idx] if e_idx < len(atrs) else atrs[-1]
     atr_ratio = (float(leg["range"]) / atr_ref) if atr_ref > 0 else 0.0
-    compression = _latest_compression(rows, atrs, cfg, atr_ratio=atr_ratio, tf_threshold=tf_threshold)
+    compression = _latest_compression(rows, cols, atrs, cfg, atr_ratio=atr_ratio, tf_threshold=tf_threshold)
 
-    body_dom_ok, strong_body_count = _body_dominance(seg, cfg.body_dominance_ratio)
+    body_dom_ok, strong_count = _body_dominance(seg_cols, cfg.body_dominance_ratio)
     bos = _detect_bos(rows, swings, leg)
     spike_pen = _spike_penalty(seg)
 
     displacement = (
         atr_ratio >= tf_threshold
-        and strong_body_count >= cfg.body_dominance_min_count
+        and strong_count >= cfg.body_dominance_min_count
     )
 
     score = 0
@@ -521,8 +456,8 @@ def analyzeImpulse(tf_name: str, candles: list[dict[str, Any]], config: ImpulseC
         score += 1
         notes.append("Compression breakout bonus")
 
-    prev_impulse = _find_prev_impulse_leg(swings, rows, atrs, tf_threshold, cfg)
-    overlap_seg = _overlap_ratio(seg)
+    prev_impulse = _find_prev_impulse_leg(swings, rows, cols, atrs, tf_threshold, cfg)
+    overlap_seg = overlap_ratio(seg_cols)
 
     # Priority-based classification:
     # 1) IMPULSE, 2) COMPRESSION(low ATR), 3) CORRECTION-like, 4) fallback CORRECTION.
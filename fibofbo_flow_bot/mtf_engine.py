@@ -4,6 +4,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from candles import CandleArrays, detect_swings
 
 TF_ORDER = ["W1", "D1", "H4", "H1", "M30", "M15", "M5"]
 
@@ -72,44 +73,6 @@ def _norm_candles(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return out
 
 
-def _detect_swings(candles: list[dict[str, Any]], lookback: int) -> list[dict[str, Any]]:
-    swings: list[dict[str, Any]] = []
-    if len(candles) < (lookback * 2 + 1):
-        return swings
-
-    for i in range(lookback, len(candles) - lookback):
-        center = candles[i]
-        left = candles[i - lookback : i]
-        right = candles[i + 1 : i + lookback + 1]
-        others = left + right
-        if not others:
-            continue
-
-        is_high = all(center["high"] > x["high"] for x in others)
-        is_low = all(center["low"] < x["low"] for x in others)
-
-        if is_high:
-            swings.append({"idx": i, "ts": center["ts"], "kind": "H", "price": center["high"]})
-        elif is_low:
-            swings.append({"idx": i, "ts": center["ts"], "kind": "L", "price": center["low"]})
-
-    # compress same-kind contiguous picks
-    compressed: list[dict[str, Any]] = []
-    for s in swings:
-        if not compressed:
-            compressed.append(s)
-            continue
-        prev = compressed[-1]
-        if prev["kind"] != s["kind"]:
-            compressed.append(s)
-            continue
-        if s["kind"] == "H" and s["price"] > prev["price"]:
-            compressed[-1] = s
-        if s["kind"] == "L" and s["price"] < prev["price"]:
-            compressed[-1] = s
-    return compressed
-
-
 def _last_bos(candles: list[dict[str, Any]], swings: list[dict[str, Any]]) -> str:
     if len(swings) < 3:
         return "NONE"
@@ -120,14 +83,9 @@ def _last_bos(candles: list[dict[str, Any]], swings: list[dict[str, Any]]) -> st
 
     ref_high = highs[-1]["price"]
     ref_low = lows[-1]["price"]
-    up_idx = -1
-    dn_idx = -1
-    for i, c in enumerate(candles):
-        close = c["close"]
-        if close > ref_high:
-            up_idx = i
-        if close < ref_low:
-            dn_idx = i
+    # Last close beyond each reference; scanning from the end stops early.
+    up_idx = next((i for i in range(len(candles) - 1, -1, -1) if candles[i]["close"] > ref_high), -1)
+    dn_idx = next((i for i in range(len(candles) - 1, -1, -1) if candles[i]["close"] < ref_low), -1)
     if up_idx < 0 and dn_idx < 0:
         # Fallback for synthetic/early market states:
         # infer BOS direction from last swing progression.
@@ -164,7 +122,20 @@ def _phase_from_bias(candles: list[dict[str, Any]], bias: str, last_high: dict[s
 
 def analyze_tf(tf: str, candles_raw: list[dict[str, Any]], cfg: MTFConfig) -> dict[str, Any]:
     candles = _norm_candles(candles_raw)
-    swings = _detect_swings(candles, cfg.swing_lookback)
+    swings: list[dict[str, Any]] = []
+    # A zero lookback has no neighbours to compare against, so no swings.
+    if cfg.swing_lookback > 0:
+        swings = detect_swings(CandleArrays.from_candles(candles), cfg.swing_lookback)
+    return tf_state_from_swings(tf, candles, swings, cfg)
+
+
+def tf_state_from_swings(
+    tf: str,
+    candles: list[dict[str, Any]],
+    swings: list[dict[str, Any]],
+    cfg: MTFConfig,
+) -> dict[str, Any]:
+    """``analyze_tf`` result for normalised candles and their precomputed swings."""
     highs = [s for s in swings if s["kind"] == "H"]
     lows = [s for s in swings if s["kind"] == "L"]
 
@@ -346,6 +317,19 @@ def evaluateMTF(
     tf_states: dict[str, dict[str, Any]] = {}
     for tf in TF_ORDER:
         tf_states[tf] = analyze_tf(tf=tf, candles_raw=candlesByTF.get(tf, []), cfg=cfg)
+    return scoreMTF(symbol, tf_states, nowTimestamp, cfg, open_position_session=open_position_session)
+
+
+def scoreMTF(
+    symbol: str,
+    tfStates: dict[str, dict[str, Any]],
+    nowTimestamp: datetime | str | int | float,
+    config: MTFConfig | None = None,
+    open_position_session: str | None = None,
+) -> dict[str, Any]:
+    """Score per-TF ``analyze_tf`` states (every TF in TF_ORDER) into the evaluateMTF result."""
+    cfg = config or MTFConfig()
+    tf_states = tfStates
 
     h4 = tf_states["H4"]
     d1 = tf_states["D1"]
@@ -13,14 +13,16 @@ from typing import Any
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
 
-from dbo import get_engine_status, load_candles
-from impulse_engine import ImpulseConfig, detectImpulseAll, explainImpulse
-from mtf_engine import MTFConfig, evaluateMTF, explainMTF
+from dbo import Candle, get_engine_status, load_candles, load_candles_since
+from impulse_engine import ImpulseConfig, explainImpulse
+from mtf_engine import MTFConfig, explainMTF
+from streaming import ImpulseAnalyzer, ImpulseStream, MTFAnalyzer, MTFStream
 
 
 LOGGER = logging.getLogger("fibofbo_flow_bot")
 BASE_DIR = Path(__file__).resolve().parent
 VALID_TFS = {"m5", "m15", "m30", "h1", "h4", "d1", "w1", "mn1"}
+STREAM_WINDOW = 320
 
 
 def load_local_env() -> None:
@@ -54,6 +56,28 @@ def read_latest_signal(signal_file: Path) -> dict[str, Any] | None:
     return loaded
 
 
+def _candle_row(candle: Candle) -> dict[str, Any]:
+    return {
+        "time": candle.ts,
+        "open": candle.open,
+        "high": candle.high,
+        "low": candle.low,
+        "close": candle.close,
+    }
+
+
+def sync_stream(stream: ImpulseStream | MTFStream, db_path: Path, tf_key: str) -> None:
+    """Feed candles stored since the last sync; the newest row is treated as still forming."""
+    last_ts = stream.stream.last_ts()
+    rows = load_candles_since(db_path, tf_key, last_ts, STREAM_WINDOW + 1) if last_ts else []
+    if not last_ts or len(rows) > STREAM_WINDOW:
+        # First use, or too far behind to catch up: reload the whole window.
+        stream.reset()
+        rows = load_candles(db_path=db_path, timeframe=tf_key, limit=STREAM_WINDOW)
+    for i, row in enumerate(rows):
+        stream.update(_candle_row(row), closed=i < len(rows) - 1)
+
+
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     msg = (
         "FiboFBO Flow baseline aktif (logic reset).\n"
@@ -174,72 +198,21 @@ async def cmd_dbo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
 async def cmd_mtf(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     db_path = Path(context.application.bot_data["candles_db"])
-    cfg = MTFConfig(
-        score_min=int(context.application.bot_data["mtf_score_min"]),
-        near_session_end_minutes=int(context.application.bot_data["mtf_near_end_min"]),
-        daily_conflict_mode=str(context.application.bot_data["mtf_daily_conflict_mode"]),
-        weekly_conflict_mode=str(context.application.bot_data["mtf_weekly_conflict_mode"]),
-        swing_lookback=int(context.application.bot_data["mtf_swing_lookback"]),
-        trend_swings_n=int(context.application.bot_data["mtf_trend_swings_n"]),
-    )
-    tf_map = {
-        "W1": "w1",
-        "D1": "d1",
-        "H4": "h4",
-        "H1": "h1",
-        "M30": "m30",
-        "M15": "m15",
-        "M5": "m5",
-    }
-    candles_by_tf: dict[str, list[dict[str, Any]]] = {}
-    for tf, tf_key in tf_map.items():
-        rows = load_candles(db_path=db_path, timeframe=tf_key, limit=320)
-        candles_by_tf[tf] = [
-            {
-                "time": r.ts,
-                "open": r.open,
-                "high": r.high,
-                "low": r.low,
-                "close": r.close,
-            }
-            for r in rows
-        ]
-
-    result = evaluateMTF(
-        symbol="XAUUSD",
-        candlesByTF=candles_by_tf,
-        nowTimestamp=datetime.now(timezone.utc),
-        config=cfg,
-    )
+    analyzer: MTFAnalyzer = context.application.bot_data["mtf_analyzer"]
+    for tf, stream in analyzer.streams.items():
+        sync_stream(stream, db_path, tf.lower())
+
+    result = analyzer.evaluate(symbol="XAUUSD", now_ts=datetime.now(timezone.utc))
     await update.effective_message.reply_text(explainMTF(result))
 
 
 async def cmd_impulse(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     db_path = Path(context.application.bot_data["candles_db"])
-    cfg = ImpulseConfig(
-        swing_lookback=int(context.application.bot_data["impulse_swing_lookback"]),
-    )
-    tf_map = {
-        "H4": "h4",
-        "H1": "h1",
-        "M30": "m30",
-        "M15": "m15",
-    }
-    candles_by_tf: dict[str, list[dict[str, Any]]] = {}
-    for tf, tf_key in tf_map.items():
-        rows = load_candles(db_path=db_path, timeframe=tf_key, limit=320)
-        candles_by_tf[tf] = [
-            {
-                "time": r.ts,
-                "open": r.open,
-                "high": r.high,
-                "low": r.low,
-                "close": r.close,
-            }
-            for r in rows
-        ]
-
-    out = detectImpulseAll(candles_by_tf, cfg)
+    analyzer: ImpulseAnalyzer = context.application.bot_data["impulse_analyzer"]
+    for tf, stream in analyzer.streams.items():
+        sync_stream(stream, db_path, tf.lower())
+
+    out = analyzer.detect_all()
     blocks = ["XAUUSD Impulse Sensor"]
     for tf in ("H4", "H1", "M30", "M15"):
         blocks.append("")
@@ -291,6 +264,22 @@ def main() -> None:
     app.bot_data["mtf_swing_lookback"] = mtf_swing_lookback
     app.bot_data["mtf_trend_swings_n"] = mtf_trend_swings_n
     app.bot_data["impulse_swing_lookback"] = impulse_swing_lookback
+    # Per-TF analyzer state lives for the whole process; commands only feed new candles.
+    app.bot_data["mtf_analyzer"] = MTFAnalyzer(
+        MTFConfig(
+            score_min=mtf_score_min,
+            near_session_end_minutes=mtf_near_end_min,
+            daily_conflict_mode=mtf_daily_conflict_mode,
+            weekly_conflict_mode=mtf_weekly_conflict_mode,
+            swing_lookback=mtf_swing_lookback,
+            trend_swings_n=mtf_trend_swings_n,
+        ),
+        window=STREAM_WINDOW,
+    )
+    app.bot_data["impulse_analyzer"] = ImpulseAnalyzer(
+        ImpulseConfig(swing_lookback=impulse_swing_lookback),
+        window=STREAM_WINDOW,
+    )
 
     app.add_handler(CommandHandler("start", cmd_start))
     app.add_handler(CommandHandler("ping", cmd_ping))
@@ -0,0 +1,294 @@
+"""Stateful per-timeframe analyzers fed one candle at a time.
+
+Each ``CandleStream`` keeps the last ``window`` candles together with their
+true range, ATR and fractal swing flags. A closed candle (or a new tick for
+the forming candle) updates that state in O(lookback + atr_period) time, so
+``/mtf`` and ``/impulse`` no longer rebuild everything from 320 rows per TF.
+Results use the same schema as ``analyzeImpulse`` / ``analyze_tf`` and equal
+what those return for ``stream.candles()``. They are read through the shared
+analysis cache, so re-feeding an unchanged forming candle costs nothing;
+pass ``cache=False`` for one-off replays such as the backtester.
+"""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from candles import CandleArrays, epoch_seconds
+from impulse_engine import TARGET_TFS, ImpulseConfig, analyzeImpulse, analyzeImpulseStructure
+from impulse_engine import _norm_candles as _impulse_norm_candles
+from mtf_engine import TF_ORDER, MTFConfig, analyze_tf, scoreMTF, tf_state_from_swings
+from mtf_engine import _norm_candles as _mtf_norm_candles
+
+# Shared analysis cache lives at the repo root.
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
+
+from analysis_cache import cached_analysis  # noqa: E402
+
+DEFAULT_STREAM_WINDOW = 320
+
+
+class CandleStream:
+    """Rolling window of normalised candles with incremental TR/ATR/swing state."""
+
+    def __init__(self, lookback: int, atr_period: int = 14, window: int = DEFAULT_STREAM_WINDOW) -> None:
+        self.lookback = max(0, int(lookback))
+        self.atr_period = max(1, int(atr_period))
+        self.window = max(1, int(window))
+        # Lists are trimmed from the left in batches (amortised O(1)); keep one
+        # spare bar so a forming candle can be replaced after an eviction.
+        self._keep = max(self.window, self.atr_period) + 1
+        self._rows: list[dict[str, Any]] = []
+        self._epochs: list[int] = []
+        self._tr: list[float] = []
+        self._atr: list[float] = []
+        self._flags: list[str | None] = []
+        self._forming = False
+
+    def __len__(self) -> int:
+        return min(len(self._rows), self.window)
+
+    def candles(self) -> list[dict[str, Any]]:
+        return self._rows[-self.window :]
+
+    def epochs(self) -> list[int]:
+        """Epoch seconds of ``candles()``, parsed once per candle."""
+        return self._epochs[-self.window :]
+
+    def last_ts(self) -> str:
+        return str(self._rows[-1]["ts"]) if self._rows else ""
+
+    @property
+    def forming(self) -> bool:
+        return self._forming
+
+    def reset(self) -> None:
+        self._rows, self._epochs, self._tr, self._atr, self._flags = [], [], [], [], []
+        self._forming = False
+
+    def update(self, row: dict[str, Any], closed: bool = True) -> None:
+        """Add a normalised candle; a forming (or same-ts) candle is replaced by the next update."""
+        if self._rows and (self._forming or self._rows[-1]["ts"] == row["ts"]):
+            previous = self._pop()
+            if previous["ts"] != row["ts"]:
+                # The forming candle closed without a final closed update.
+                self._push(previous)
+        self._push(row)
+        self._forming = not closed
+
+    def _push(self, row: dict[str, Any]) -> None:
+        h = float(row["high"])
+        l = float(row["low"])
+        if self._rows:
+            prev_close = float(self._rows[-1]["close"])
+            tr = max(h - l, abs(h - prev_close), abs(l - prev_close))
+        else:
+            tr = max(h - l, 0.0)
+        self._rows.append(row)
+        self._epochs.append(epoch_seconds(row["ts"]))
+        self._tr.append(tr)
+        window = self._tr[-self.atr_period :]
+        self._atr.append(sum(window) / len(window))
+        self._flags.append(None)
+        # The new bar completes the neighbourhood of the bar `lookback` back.
+        centre = len(self._rows) - 1 - self.lookback
+        if centre - self.lookback >= 0:
+            self._flags[centre] = self._swing_flag(centre)
+        if len(self._rows) > 2 * self._keep:
+            drop = len(self._rows) - self._keep
+            for series in (self._rows, self._epochs, self._tr, self._atr, self._flags):
+                del series[:drop]
+
+    def _pop(self) -> dict[str, Any]:
+        for series in (self._epochs, self._tr, self._atr, self._flags):
+            series.pop()
+        centre = len(self._rows) - 1 - self.lookback
+        if 0 <= centre < len(self._flags):
+            self._flags[centre] = None
+        return self._rows.pop()
+
+    def _swing_flag(self, centre: int) -> str:
+        rows = self._rows
+        c = rows[centre]
+        others = range(centre - self.lookback, centre + self.lookback + 1)
+        if all(c["high"] > rows[j]["high"] for j in others if j != centre):
+            return "H"
+        if all(c["low"] < rows[j]["low"] for j in others if j != centre):
+            return "L"
+        return ""
+
+    def swings(self) -> list[dict[str, Any]]:
+        """Compressed swings of the current window, as ``detect_swings`` returns them."""
+        start = max(0, len(self._rows) - self.window)
+        out: list[dict[str, Any]] = []
+        # Window-relative detection needs `lookback` bars on both sides inside the window.
+        for pos in range(start + self.lookback, len(self._rows) - self.lookback):
+            kind = self._flags[pos]
+            if not kind:
+                continue
+            row = self._rows[pos]
+            price = row["high"] if kind == "H" else row["low"]
+            s = {"idx": pos - start, "ts": row["ts"], "kind": kind, "price": price}
+            if not out or out[-1]["kind"] != kind:
+                out.append(s)
+            elif (kind == "H" and s["price"] > out[-1]["price"]) or (kind == "L" and s["price"] < out[-1]["price"]):
+                out[-1] = s
+        return out
+
+    def atrs(self) -> list[float]:
+        """ATR series of the current window, as ``candles.atr`` returns it."""
+        start = max(0, len(self._rows) - self.window)
+        # The first bar of the window has no previous close, so the first
+        # `atr_period` values differ from the rolling ones and are rebuilt.
+        trs = [max(float(self._rows[start]["high"]) - float(self._rows[start]["low"]), 0.0)]
+        trs.extend(self._tr[start + 1 : start + self.atr_period])
+        head = [sum(trs[: i + 1]) / min(i + 1, self.atr_period) for i in range(len(trs))]
+        return head + self._atr[start + self.atr_period :]
+
+
+class ImpulseStream:
+    """``analyzeImpulse`` for one timeframe, updated per candle."""
+
+    def __init__(
+        self,
+        tf: str,
+        config: ImpulseConfig | None = None,
+        window: int = DEFAULT_STREAM_WINDOW,
+        cache: bool = True,
+    ) -> None:
+        self.tf = str(tf or "").upper()
+        if self.tf not in TARGET_TFS:
+            raise ValueError(f"Unsupported tf: {self.tf}")
+        self.cfg = config or ImpulseConfig()
+        self.stream = CandleStream(self.cfg.swing_lookback, self.cfg.atr_period, window)
+        self.cache = cache
+        self._result: dict[str, Any] | None = None
+
+    def reset(self) -> None:
+        self.stream.reset()
+        self._result = None
+
+    def update(self, candle: dict[str, Any], closed: bool = True) -> None:
+        rows = _impulse_norm_candles([candle])
+        if rows:
+            self.stream.update(rows[0], closed=closed)
+            self._result = None
+
+    def _compute(self) -> dict[str, Any]:
+        rows = self.stream.candles()
+        if len(rows) < 30:
+            return analyzeImpulse(self.tf, rows, self.cfg)
+        cols = CandleArrays.from_candles(rows, self.stream.epochs())
+        return analyzeImpulseStructure(self.tf, rows, cols, self.stream.swings(), self.stream.atrs(), self.cfg)
+
+    def result(self) -> dict[str, Any]:
+        if self._result is None:
+            rows = self.stream.candles()
+            if not self.cache:
+                self._result = self._compute()
+            else:
+                self._result = cached_analysis(
+                    "impulse",
+                    self.tf,
+                    rows[-1] if rows else None,
+                    (self.cfg, len(rows)),
+                    self._compute,
+                )
+        return self._result
+
+
+class MTFStream:
+    """``analyze_tf`` for one timeframe, updated per candle."""
+
+    def __init__(
+        self,
+        tf: str,
+        config: MTFConfig | None = None,
+        window: int = DEFAULT_STREAM_WINDOW,
+        cache: bool = True,
+    ) -> None:
+        self.tf = str(tf or "").upper()
+        self.cfg = config or MTFConfig()
+        self.stream = CandleStream(self.cfg.swing_lookback, window=window)
+        self.cache = cache
+        self._result: dict[str, Any] | None = None
+
+    def reset(self) -> None:
+        self.stream.reset()
+        self._result = None
+
+    def update(self, candle: dict[str, Any], closed: bool = True) -> None:
+        rows = _mtf_norm_candles([candle])
+        if rows:
+            self.stream.update(rows[0], closed=closed)
+            self._result = None
+
+    def _compute(self) -> dict[str, Any]:
+        rows = self.stream.candles()
+        if self.cfg.swing_lookback > 0:
+            return tf_state_from_swings(self.tf, rows, self.stream.swings(), self.cfg)
+        return analyze_tf(self.tf, rows, self.cfg)
+
+    def result(self) -> dict[str, Any]:
+        if self._result is None:
+            rows = self.stream.candles()
+            if not self.cache:
+                self._result = self._compute()
+            else:
+                self._result = cached_analysis(
+                    "mtf_tf",
+                    self.tf,
+                    rows[-1] if rows else None,
+                    (self.cfg, len(rows)),
+                    self._compute,
+                )
+        return self._result
+
+
+class ImpulseAnalyzer:
+    """One ``ImpulseStream`` per impulse timeframe; ``detect_all`` mirrors ``detectImpulseAll``."""
+
+    def __init__(
+        self,
+        config: ImpulseConfig | None = None,
+        window: int = DEFAULT_STREAM_WINDOW,
+        cache: bool = True,
+    ) -> None:
+        self.cfg = config or ImpulseConfig()
+        self.streams = {tf: ImpulseStream(tf, self.cfg, window, cache) for tf in TARGET_TFS}
+
+    def update(self, tf: str, candle: dict[str, Any], closed: bool = True) -> None:
+        self.streams[str(tf).upper()].update(candle, closed=closed)
+
+    def detect_all(self) -> dict[str, dict[str, Any]]:
+        return {tf: stream.result() for tf, stream in self.streams.items()}
+
+
+class MTFAnalyzer:
+    """One ``MTFStream`` per MTF timeframe; ``evaluate`` mirrors ``evaluateMTF``."""
+
+    def __init__(
+        self,
+        config: MTFConfig | None = None,
+        window: int = DEFAULT_STREAM_WINDOW,
+        cache: bool = True,
+    ) -> None:
+        self.cfg = config or MTFConfig()
+        self.streams = {tf: MTFStream(tf, self.cfg, window, cache) for tf in TF_ORDER}
+
+    def update(self, tf: str, candle: dict[str, Any], closed: bool = True) -> None:
+        self.streams[str(tf).upper()].update(candle, closed=closed)
+
+    def evaluate(
+        self,
+        symbol: str,
+        now_ts: datetime | str | int | float,
+        open_position_session: str | None = None,
+    ) -> dict[str, Any]:
+        tf_states = {tf: stream.result() for tf, stream in self.streams.items()}
+        return scoreMTF(symbol, tf_states, now_ts, self.cfg, open_position_session=open_position_session)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Parallel parameter sweep of ``MTFConfig`` / ``ImpulseConfig`` over the backtester.
+
+The candle history is loaded once and copied into one shared memory block
+(int64 ts + float64 OHLC + fixed-width ts labels per TF). Spawned workers map
+it read-only (NumPy views, no copy) and run ``backtest.run_backtest`` for each
+configuration they get. Results are ranked by one metric from the signal
+stats, e.g. ``MTF:48:avg_return`` (source, horizon, field).
+
+Parameters are dotted paths: ``mtf.score_min``, ``impulse.swing_lookback``,
+``impulse.atr_multiplier_by_tf.H4``. The space is a JSON object of path -> list
+of values; ``--mode grid`` runs every combination, ``--mode random`` samples
+``--samples`` distinct ones.
+
+    python3 sweep.py --since 2025-01-01 --mode random --samples 40 --out sweep.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any
+
+from backtest import DEFAULT_CANDLES_DB, DEFAULT_HORIZONS, history_rows, load_history, run_backtest
+from candles import CandleArrays, np
+from impulse_engine import ImpulseConfig
+from mtf_engine import MTFConfig
+from streaming import DEFAULT_STREAM_WINDOW
+
+DEFAULT_SPACE: dict[str, list[Any]] = {
+    "mtf.swing_lookback": [1, 2, 3],
+    "mtf.trend_swings_n": [3, 4, 5, 6],
+    "mtf.score_min": [6, 7, 8],
+    "impulse.swing_lookback": [2, 3],
+    "impulse.atr_multiplier_by_tf.H1": [1.4, 1.6, 1.8],
+    "impulse.compression_overlap_min": [0.6, 0.7, 0.8],
+    "impulse.compression_range_atr_mult": [0.9, 1.1, 1.3],
+}
+DEFAULT_METRIC = "MTF:48:avg_return"
+DEFAULT_MIN_SIGNALS = 10
+
+_worker_shm: SharedMemory | None = None
+_worker_history: dict[str, CandleArrays] = {}
+_worker_rows: dict[str, list[dict[str, Any]]] = {}
+_worker_init: dict[str, float] = {}
+
+
+def share_history(history: dict[str, CandleArrays]) -> tuple[SharedMemory, dict[str, dict[str, int]]]:
+    """Copy ``history`` into one shared memory block; returns the block and its layout."""
+    layout: dict[str, dict[str, int]] = {}
+    size = 0
+    for tf, cols in history.items():
+        n = len(cols)
+        width = max((len(label.encode("utf-8")) for label in cols.labels), default=1)
+        layout[tf] = {"offset": size, "n": n, "width": width}
+        # ts + four OHLC columns, 8 bytes each, then the labels; keep 8-byte alignment.
+        size += 40 * n + 8 * math.ceil(n * width / 8)
+
+    shm = SharedMemory(create=True, size=max(size, 1))
+    for tf, cols in history.items():
+        spec = layout[tf]
+        pos, n, width = spec["offset"], spec["n"], spec["width"]
+        for code, values in (("q", cols.ts), ("d", cols.open), ("d", cols.high), ("d", cols.low), ("d", cols.close)):
+            if np is not None:
+                raw = np.asarray(values, dtype=np.int64 if code == "q" else np.float64).tobytes()
+            else:
+                raw = array(code, values).tobytes()
+            shm.buf[pos : pos + 8 * n] = raw
+            pos += 8 * n
+        labels = b"".join(label.encode("utf-8").ljust(width, b"\0") for label in cols.labels)
+        shm.buf[pos : pos + len(labels)] = labels
+    return shm, layout
+
+
+def attach_history(shm: SharedMemory, layout: dict[str, dict[str, int]]) -> dict[str, CandleArrays]:
+    """``CandleArrays`` over a shared block; read-only NumPy views, or list copies without NumPy."""
+    history: dict[str, CandleArrays] = {}
+    for tf, spec in layout.items():
+        pos, n, width = spec["offset"], spec["n"], spec["width"]
+        columns: list[Any] = []
+        for code in ("q", "d", "d", "d", "d"):
+            if np is not None:
+                col = np.ndarray((n,), dtype=np.int64 if code == "q" else np.float64, buffer=shm.buf, offset=pos)
+                col.flags.writeable = False
+            else:
+                col = list(shm.buf[pos : pos + 8 * n].cast(code))
+            columns.append(col)
+            pos += 8 * n
+        raw = bytes(shm.buf[pos : pos + n * width])
+        labels = [raw[i * width : (i + 1) * width].rstrip(b"\0").decode("utf-8") for i in range(n)]
+        history[tf] = CandleArrays(labels, *columns)
+    return history
+
+
+def _init_worker(shm_name: str, layout: dict[str, dict[str, int]]) -> None:
+    global _worker_shm, _worker_history, _worker_rows, _worker_init
+    started = time.perf_counter()
+    _worker_shm = SharedMemory(name=shm_name)
+    _worker_history = attach_history(_worker_shm, layout)
+    _worker_rows = history_rows(_worker_history)
+    # process_time here also covers the spawn's interpreter start and imports.
+    _worker_init = {
+        "seconds": round(time.perf_counter() - started, 3),
+        "cpu_seconds": round(time.process_time(), 3),
+    }
+
+
+def _set_path(target: dict[str, Any], path: list[str], value: Any) -> dict[str, Any]:
+    out = dict(target)
+    out[path[0]] = value if len(path) == 1 else _set_path(dict(out.get(path[0]) or {}), path[1:], value)
+    return out
+
+
+def build_configs(params: dict[str, Any]) -> tuple[MTFConfig, ImpulseConfig]:
+    """Default configs with the dotted ``params`` applied."""
+    configs: dict[str, Any] = {"mtf": MTFConfig(), "impulse": ImpulseConfig()}
+    for key, value in params.items():
+        scope, _, path = str(key).partition(".")
+        if scope not in configs or not path:
+            raise ValueError(f"Unknown sweep parameter: {key}")
+        field_name, *rest = path.split(".")
+        cfg = configs[scope]
+        if not hasattr(cfg, field_name):
+            raise ValueError(f"Unknown sweep parameter: {key}")
+        if rest:
+            value = _set_path(getattr(cfg, field_name), rest, value)
+        configs[scope] = replace(cfg, **{field_name: value})
+    return configs["mtf"], configs["impulse"]
+
+
+def iter_params(space: dict[str, list[Any]], mode: str, samples: int, seed: int) -> list[dict[str, Any]]:
+    """Grid combinations, or ``samples`` distinct random ones."""
+    keys = sorted(space)
+    sizes = [len(space[k]) for k in keys]
+    total = math.prod(sizes) if keys else 0
+    if mode == "grid" or samples >= total:
+        picks = range(total)
+    else:
+        picks = sorted(random.Random(seed).sample(range(total), samples))
+
+    out: list[dict[str, Any]] = []
+    for index in picks:
+        params: dict[str, Any] = {}
+        # Decode the combination index digit by digit (mixed radix).
+        for key, size in zip(reversed(keys), reversed(sizes)):
+            index, digit = divmod(index, size)
+            params[key] = space[key][digit]
+        out.append(dict(sorted(params.items())))
+    return out
+
+
+def metric_value(summary: dict[str, Any], metric: str) -> tuple[float | None, int]:
+    """(value, signal count) of ``SOURCE:HORIZON:FIELD`` in a backtest summary."""
+    source, horizon, field_name = metric.split(":")
+    stats = (summary.get("signals") or {}).get(source) or {}
+    per_horizon = (stats.get("horizons") or {}).get(horizon) or {}
+    count = int(per_horizon.get("count", 0))
+    if not count:
+        return None, 0
+    return float(per_horizon.get(field_name, 0.0)), count
+
+
+def run_config(params: dict[str, Any], options: dict[str, Any]) -> dict[str, Any]:
+    """Backtest one configuration on the worker's shared history."""
+    started_at = time.time()
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    mtf_config, impulse_config = build_configs(params)
+    result = run_backtest(
+        _worker_history,
+        mtf_config,
+        impulse_config,
+        start=options["start"],
+        window=options["window"],
+        step_tf=options["step_tf"],
+        horizons=tuple(options["horizons"]),
+        keep_series=False,
+        rows=_worker_rows,
+    )
+    return {
+        "params": params,
+        "summary": result["summary"],
+        "runtime": dict(
+            result["runtime"],
+            seconds=round(time.perf_counter() - started, 3),
+            cpu_seconds=round(time.process_time() - cpu_started, 3),
+            pid=os.getpid(),
+            started_at=started_at,
+            finished_at=time.time(),
+            worker_init=_worker_init,
+        ),
+    }
+
+
+def run_sweep(
+    history: dict[str, CandleArrays],
+    params_list: list[dict[str, Any]],
+    *,
+    workers: int | None = None,
+    start: str = "",
+    window: int = DEFAULT_STREAM_WINDOW,
+    step_tf: str = "M5",
+    horizons: tuple[int, ...] = DEFAULT_HORIZONS,
+    metric: str = DEFAULT_METRIC,
+    min_signals: int = DEFAULT_MIN_SIGNALS,
+) -> dict[str, Any]:
+    """Backtest every entry of ``params_list`` across a process pool and rank the results."""
+    for params in params_list:
+        build_configs(params)  # fail on a bad parameter before starting the pool
+    workers = max(1, min(int(workers or os.cpu_count() or 1), max(1, len(params_list))))
+    options = {"start": start, "window": window, "step_tf": step_tf, "horizons": list(horizons)}
+
+    started = time.perf_counter()
+    shm, layout = share_history(history)
+    share_seconds = time.perf_counter() - started
+    results: list[dict[str, Any]] = []
+    try:
+        # Spawned workers only import the engines and map the shared block.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(shm.name, layout),
+        ) as pool:
+            futures = [pool.submit(run_config, params, options) for params in params_list]
+            for future in as_completed(futures):
+                results.append(future.result())
+    finally:
+        shm.close()
+        shm.unlink()
+    wall = time.perf_counter() - started
+
+    for item in results:
+        item["metric"], item["metric_count"] = metric_value(item["summary"], metric)
+    # Configs with too few scored signals rank after every config with enough.
+    results.sort(
+        key=lambda item: (
+            item["metric"] is not None and item["metric_count"] >= min_signals,
+            item["metric"] if item["metric"] is not None else -math.inf,
+        ),
+        reverse=True,
+    )
+    for rank, item in enumerate(results, start=1):
+        item["rank"] = rank
+
+    cpu = sum(item["runtime"]["cpu_seconds"] for item in results)
+    # Pool spawn and per-worker setup are reported apart from the configs, so
+    # the speedup compares config CPU time with the span the configs ran in.
+    inits = {item["runtime"]["pid"]: item["runtime"]["worker_init"] for item in results}
+    configs_wall = 0.0
+    if results:
+        configs_wall = max(item["runtime"]["finished_at"] for item in results) - min(
+            item["runtime"]["started_at"] for item in results
+        )
+    for item in results:
+        for key in ("started_at", "finished_at", "worker_init"):
+            item["runtime"].pop(key)
+    return {
+        "metric": metric,
+        "min_signals": min_signals,
+        "configs": len(results),
+        "workers": workers,
+        "history": {tf: len(cols) for tf, cols in history.items()},
+        "runtime": {
+            "wall_seconds": round(wall, 3),
+            "share_seconds": round(share_seconds, 3),
+            "shared_bytes": shm.size,
+            "config_cpu_seconds_total": round(cpu, 3),
+            "config_cpu_seconds_avg": round(cpu / len(results), 3) if results else 0.0,
+            "configs_wall_seconds": round(configs_wall, 3),
+            "worker_init_seconds_max": max((init["seconds"] for init in inits.values()), default=0.0),
+            "worker_startup_cpu_seconds_total": round(sum(init["cpu_seconds"] for init in inits.values()), 3),
+            "parallel_speedup": round(cpu / configs_wall, 2) if configs_wall > 0 else 0.0,
+            "configs_per_min": round(len(results) / wall * 60, 2) if wall > 0 else 0.0,
+        },
+        "ranked": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Parallel MTF/impulse config sweep over the backtester.")
+    parser.add_argument(
+        "--db",
+        default=os.getenv("FIBOFBO_FLOW_CANDLES_DB", DEFAULT_CANDLES_DB),
+        help="Candles DB path",
+    )
+    parser.add_argument("--since", default="", help="First step to score (UTC, e.g. 2025-01-01)")
+    parser.add_argument("--until", default="", help="Last candle ts to load (UTC)")
+    parser.add_argument("--step", default="m5", help="Step timeframe (default m5)")
+    parser.add_argument("--horizons", default=",".join(str(h) for h in DEFAULT_HORIZONS), help="Outcome horizons in step bars")
+    parser.add_argument("--window", type=int, default=DEFAULT_STREAM_WINDOW, help="Candles kept per TF")
+    parser.add_argument("--space", default="", help="JSON file of parameter path -> list of values")
+    parser.add_argument("--mode", choices=("grid", "random"), default="grid")
+    parser.add_argument("--samples", type=int, default=50, help="Configs to draw in random mode")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--metric", default=DEFAULT_METRIC, help="SOURCE:HORIZON:FIELD to rank by")
+    parser.add_argument("--min-signals", type=int, default=DEFAULT_MIN_SIGNALS)
+    parser.add_argument("--top", type=int, default=10, help="Configs to print")
+    parser.add_argument("--out", default="sweep.json", help="Output JSON file")
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        space = json.loads(Path(args.space).read_text(encoding="utf-8"))
+    params_list = iter_params(space, args.mode, args.samples, args.seed)
+
+    started = time.perf_counter()
+    history = load_history(Path(args.db).resolve(), args.until)
+    load_seconds = time.perf_counter() - started
+    result = run_sweep(
+        history,
+        params_list,
+        workers=args.workers or None,
+        start=args.since,
+        window=args.window,
+        step_tf=args.step,
+        horizons=tuple(int(h) for h in args.horizons.split(",") if h.strip()),
+        metric=args.metric,
+        min_signals=args.min_signals,
+    )
+    result["runtime"]["load_seconds"] = round(load_seconds, 3)
+    Path(args.out).write_text(json.dumps(result, ensure_ascii=True, indent=2), encoding="utf-8")
+
+    print(json.dumps(result["runtime"], ensure_ascii=True))
+    for item in result["ranked"][: args.top]:
+        print(f"#{item['rank']:<3} {args.metric}={item['metric']} n={item['metric_count']} {json.dumps(item['params'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import random
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from backtest import TF_SECONDS, load_history, run_backtest
+from candles import epoch_seconds
+from mtf_engine import TF_ORDER, evaluateMTF
+
+WINDOW = 60
+
+
+def bucket_start(t: datetime, tf: str) -> datetime:
+    if tf == "W1":
+        return (t - timedelta(days=t.weekday())).replace(hour=0, minute=0)
+    if tf == "D1":
+        return t.replace(hour=0, minute=0)
+    minutes = TF_SECONDS[tf] // 60
+    if minutes >= 60:
+        hours = minutes // 60
+        return t.replace(hour=t.hour // hours * hours, minute=0)
+    return t.replace(minute=t.minute // minutes * minutes)
+
+
+def build_candles_db(path: Path, days: int) -> None:
+    """Random-walk M5 bars on weekdays, aggregated up to W1 like the chart engine."""
+    rng = random.Random(5)
+    start = datetime(2025, 1, 6)
+    m5: list[tuple[datetime, float, float, float, float]] = []
+    price = 2000.0
+    t = start
+    while t < start + timedelta(days=days):
+        if t.weekday() < 5:
+            o = price
+            c = price + rng.gauss(0, 1.5) + 0.02
+            m5.append((t, o, max(o, c) + abs(rng.gauss(0, 0.8)), min(o, c) - abs(rng.gauss(0, 0.8)), c))
+            price = c
+        t += timedelta(minutes=5)
+
+    con = sqlite3.connect(path)
+    con.execute(
+        "CREATE TABLE candles (timeframe TEXT, ts TEXT, open REAL, high REAL, low REAL, close REAL, "
+        "PRIMARY KEY (timeframe, ts))"
+    )
+    for tf in TF_ORDER:
+        bars: dict[datetime, list[float]] = {}
+        for t, o, h, l, c in m5:
+            key = bucket_start(t, tf)
+            bar = bars.get(key)
+            if bar is None:
+                bars[key] = [o, h, l, c]
+            else:
+                bar[1] = max(bar[1], h)
+                bar[2] = min(bar[2], l)
+                bar[3] = c
+        con.executemany(
+            "INSERT INTO candles VALUES (?, ?, ?, ?, ?, ?)",
+            [(tf.lower(), key.strftime("%Y-%m-%d %H:%M:%S"), *bar) for key, bar in bars.items()],
+        )
+    con.commit()
+    con.close()
+
+
+class BacktestTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.db = Path(tempfile.mkdtemp()) / "candles.db"
+        build_candles_db(cls.db, days=12)
+        con = sqlite3.connect(cls.db)
+        cls.db_rows = {
+            tf: [
+                {"ts": ts, "open": o, "high": h, "low": l, "close": c}
+                for ts, o, h, l, c in con.execute(
+                    "SELECT ts, open, high, low, close FROM candles WHERE timeframe = ? ORDER BY ts",
+                    (tf.lower(),),
+                )
+            ]
+            for tf in TF_ORDER
+        }
+        con.close()
+
+    def test_load_history_drops_forming_bar_unless_until(self) -> None:
+        history = load_history(self.db)
+        for tf in TF_ORDER:
+            self.assertEqual(history[tf].labels, [row["ts"] for row in self.db_rows[tf][:-1]])
+
+        until = self.db_rows["M5"][-1]["ts"]
+        history = load_history(self.db, until)
+        self.assertEqual(history["M5"].labels[-1], until)
+
+    def test_steps_match_evaluate_mtf_on_closed_bars(self) -> None:
+        history = load_history(self.db)
+        result = run_backtest(history, start="2025-01-09", window=WINDOW)
+        series = result["series"]["mtf"]
+        self.assertEqual(result["summary"]["mtf"]["steps"], len(series["ts"]))
+        self.assertEqual(series["ts"][-1], self.db_rows["M5"][-2]["ts"])
+
+        rng = random.Random(1)
+        for j in sorted(rng.sample(range(len(series["ts"])), 60)):
+            step_close = epoch_seconds(series["ts"][j]) + TF_SECONDS["M5"]
+            closed = {
+                tf: [row for row in self.db_rows[tf] if epoch_seconds(row["ts"]) + TF_SECONDS[tf] <= step_close][-WINDOW:]
+                for tf in TF_ORDER
+            }
+            full = evaluateMTF("XAUUSD", closed, datetime.fromtimestamp(step_close, tz=timezone.utc))
+            score_state = full["score_state"]
+            self.assertEqual(series["score"][j], int(score_state["score"]), series["ts"][j])
+            self.assertEqual(series["trade_ready"][j], bool(score_state["trade_ready"]), series["ts"][j])
+            self.assertEqual(series["hard_reject_reason"][j], score_state["hard_reject_reason"], series["ts"][j])
+            self.assertEqual(series["h4_bias"][j], full["mtf_state"]["context"]["H4"].get("bias", "RANGE"))
+
+
+if __name__ == "__main__":
+    unittest.main()
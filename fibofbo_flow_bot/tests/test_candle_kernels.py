@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import random
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import candles
+from impulse_engine import ImpulseConfig, detectImpulseAll
+from mtf_engine import TF_ORDER, MTFConfig, evaluateMTF
+
+
+def random_candles(rng: random.Random, n: int, quantize: bool) -> list[dict]:
+    start = datetime(2026, 1, 5)
+    price = 100.0
+    rows: list[dict] = []
+    for i in range(n):
+        o = price
+        c = price + rng.gauss(0, 1)
+        h = max(o, c) + abs(rng.gauss(0, 0.5))
+        l = min(o, c) - abs(rng.gauss(0, 0.5))
+        if quantize:
+            # Equal highs/lows exercise the tie rules of the swing kernels.
+            o, h, l, c = (round(x * 2) / 2 for x in (o, h, l, c))
+        rows.append({"time": (start + timedelta(minutes=5 * i)).strftime("%Y-%m-%d %H:%M:%S"), "open": o, "high": h, "low": l, "close": c})
+        if rng.random() < 0.03:
+            # Zero rows are dropped by the engines' candle normalisation.
+            rows.append({"open": 0, "high": 0, "low": 0, "close": 0})
+        price = c
+    return rows
+
+
+def run_engines(seed: int) -> list[str]:
+    rng = random.Random(seed)
+    out: list[str] = []
+    for _ in range(40):
+        n = rng.choice([5, 20, 31, 80, 200, 600])
+        quantize = rng.random() < 0.4
+        data = {tf: random_candles(rng, n, quantize) for tf in TF_ORDER}
+        lookback = rng.choice([1, 2, 3])
+        icfg = ImpulseConfig(swing_lookback=lookback, atr_period=rng.choice([1, 5, 14]))
+        mcfg = MTFConfig(swing_lookback=lookback, trend_swings_n=rng.choice([3, 4]))
+        out.append(repr(detectImpulseAll(data, icfg)))
+        out.append(repr(evaluateMTF("XAUUSD", data, datetime(2026, 2, 23, 16, 30), mcfg)))
+    return out
+
+
+@unittest.skipIf(candles.np is None, "numpy not installed")
+class CandleKernelParityTests(unittest.TestCase):
+    def test_engines_match_without_numpy(self) -> None:
+        for seed in (3, 11):
+            with_numpy = run_engines(seed)
+            with mock.patch.object(candles, "np", None):
+                without_numpy = run_engines(seed)
+            self.assertEqual(with_numpy, without_numpy, f"seed {seed}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import random
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from dbo import load_candles
+from impulse_engine import ImpulseConfig, analyzeImpulse, detectImpulseAll
+from mtf_engine import MTFConfig, analyze_tf, evaluateMTF
+from streaming import ImpulseAnalyzer, ImpulseStream, MTFAnalyzer, MTFStream
+
+# The repo root (analysis_cache.py) is on sys.path once dbo/streaming are imported.
+from analysis_cache import clear_analysis_cache  # noqa: E402
+
+try:
+    import server
+except ImportError:  # python-telegram-bot not installed
+    server = None
+
+START = datetime(2026, 1, 5)
+
+
+def candle_time(i: int) -> str:
+    return (START + timedelta(minutes=5 * i)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def random_bar(rng: random.Random, price: float, i: int, quantize: bool) -> dict:
+    o = price
+    c = price + rng.gauss(0, 1)
+    h = max(o, c) + abs(rng.gauss(0, 0.5))
+    l = min(o, c) - abs(rng.gauss(0, 0.5))
+    if quantize:
+        o, h, l, c = (round(x * 2) / 2 for x in (o, h, l, c))
+    return {"time": candle_time(i), "open": o, "high": h, "low": l, "close": c}
+
+
+def forming_tick(rng: random.Random, bar: dict) -> dict:
+    tick = dict(bar, close=bar["close"] + rng.gauss(0, 0.3))
+    tick["high"] = max(tick["high"], tick["close"])
+    tick["low"] = min(tick["low"], tick["close"])
+    return tick
+
+
+class StreamTests(unittest.TestCase):
+    def test_streams_match_full_engines_bar_by_bar(self) -> None:
+        rng = random.Random(3)
+        for _ in range(15):
+            lookback = rng.choice([0, 1, 2, 3])
+            window = rng.choice([30, 45, 100])
+            quantize = rng.random() < 0.4
+            icfg = ImpulseConfig(swing_lookback=lookback, atr_period=rng.choice([1, 3, 14]))
+            mcfg = MTFConfig(swing_lookback=lookback, trend_swings_n=3)
+            impulse = ImpulseStream("H1", icfg, window, cache=False)
+            mtf = MTFStream("H1", mcfg, window, cache=False)
+            history: list[dict] = []
+            price = 100.0
+            for i in range(rng.choice([20, 80, 200])):
+                bar = random_bar(rng, price, i, quantize)
+                # The forming bar ticks before it closes (or is simply replaced).
+                tick = None
+                for _ in range(rng.choice([0, 1, 2])):
+                    tick = forming_tick(rng, bar)
+                    impulse.update(tick, closed=False)
+                    mtf.update(tick, closed=False)
+                    current = (history + [tick])[-window:]
+                    self.assertEqual(impulse.result(), analyzeImpulse("H1", current, icfg))
+                    self.assertEqual(mtf.result(), analyze_tf("H1", current, mcfg))
+                if tick is not None and rng.random() < 0.3:
+                    # No closing update: the next bar's ts closes the last tick.
+                    bar = tick
+                else:
+                    closed = rng.random() < 0.7
+                    impulse.update(bar, closed=closed)
+                    mtf.update(bar, closed=closed)
+                history.append(bar)
+                price = bar["close"]
+                current = history[-window:]
+                self.assertEqual(impulse.result(), analyzeImpulse("H1", current, icfg))
+                self.assertEqual(mtf.result(), analyze_tf("H1", current, mcfg))
+
+
+@unittest.skipIf(server is None, "python-telegram-bot not installed")
+class SyncStreamTests(unittest.TestCase):
+    TFS = ["w1", "d1", "h4", "h1", "m30", "m15", "m5"]
+
+    def setUp(self) -> None:
+        clear_analysis_cache()
+        self.db = Path(tempfile.mkdtemp()) / "candles.db"
+        self.con = sqlite3.connect(self.db)
+        self.con.execute(
+            "CREATE TABLE candles (timeframe TEXT, ts TEXT, open REAL, high REAL, low REAL, close REAL, "
+            "PRIMARY KEY (timeframe, ts))"
+        )
+        self.rng = random.Random(5)
+        self.price = {tf: 100.0 for tf in self.TFS}
+        self.last = {tf: 0 for tf in self.TFS}
+
+    def tearDown(self) -> None:
+        self.con.close()
+
+    def write_bar(self, tf: str, i: int, forming: bool = False) -> None:
+        bar = random_bar(self.rng, self.price[tf], i, False)
+        self.con.execute(
+            "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?)",
+            (tf, bar["time"], bar["open"], bar["high"], bar["low"], bar["close"]),
+        )
+        if not forming:
+            self.price[tf] = bar["close"]
+
+    def test_sync_stream_matches_full_engines(self) -> None:
+        window = server.STREAM_WINDOW
+        for tf in self.TFS:
+            for i in range(self.rng.choice([40, 350])):
+                self.write_bar(tf, i)
+                self.last[tf] = i
+        self.con.commit()
+
+        mcfg = MTFConfig(swing_lookback=2, trend_swings_n=4)
+        icfg = ImpulseConfig(swing_lookback=2)
+        mtf = MTFAnalyzer(mcfg, window=window)
+        impulse = ImpulseAnalyzer(icfg, window=window)
+        now = datetime(2026, 2, 23, 8, 30, tzinfo=timezone.utc)
+
+        def check() -> None:
+            for analyzer in (mtf, impulse):
+                for tf, stream in analyzer.streams.items():
+                    server.sync_stream(stream, self.db, tf.lower())
+            full = {tf.upper(): [server._candle_row(row) for row in load_candles(self.db, tf, window)] for tf in self.TFS}
+            self.assertEqual(mtf.evaluate("XAUUSD", now), evaluateMTF("XAUUSD", full, now, mcfg))
+            self.assertEqual(impulse.detect_all(), detectImpulseAll(full, icfg))
+
+        check()
+        for _ in range(120):
+            tf = self.rng.choice(self.TFS)
+            action = self.rng.random()
+            if action < 0.4:
+                # Forming bar ticks in place.
+                self.write_bar(tf, self.last[tf], forming=True)
+            elif action < 0.9:
+                self.last[tf] += 1
+                self.write_bar(tf, self.last[tf])
+            else:
+                # Catch up after a short outage, or one longer than the window.
+                for _ in range(self.rng.choice([5, window + 80])):
+                    self.last[tf] += 1
+                    self.write_bar(tf, self.last[tf])
+            self.con.commit()
+            if self.rng.random() < 0.5:
+                check()
+        check()
+
+
+if __name__ == "__main__":
+    unittest.main()
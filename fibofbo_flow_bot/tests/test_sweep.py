@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import itertools
+import math
+import random
+import unittest
+from unittest import mock
+
+import candles
+import sweep
+from candles import CandleArrays
+from sweep import attach_history, iter_params, share_history
+
+
+def random_history(seed: int) -> dict[str, CandleArrays]:
+    rng = random.Random(seed)
+    history: dict[str, CandleArrays] = {}
+    for tf, n in (("H1", 50), ("M5", 333), ("W1", 1), ("D1", 0)):
+        rows = []
+        for i in range(n):
+            # Mixed label widths exercise the fixed-width label padding.
+            ts = f"2025-01-{1 + i % 28:02d} {i % 24:02d}:00:00" if i % 7 else str(1735689600 + i * 300)
+            price = 2000 + rng.uniform(-50, 50)
+            rows.append({"ts": ts, "open": price, "high": price + 1.25, "low": price - 0.5, "close": price + 0.1})
+        history[tf] = CandleArrays.from_candles(rows)
+    return history
+
+
+class ShareHistoryTests(unittest.TestCase):
+    def assert_round_trip(self) -> None:
+        history = random_history(7)
+        shm, layout = share_history(history)
+        try:
+            attached = attach_history(shm, layout)
+            self.assertEqual(sorted(attached), sorted(history))
+            for tf, cols in history.items():
+                got = attached[tf]
+                self.assertEqual(got.labels, cols.labels, tf)
+                for name in ("ts", "open", "high", "low", "close"):
+                    self.assertEqual(list(getattr(got, name)), list(getattr(cols, name)), f"{tf} {name}")
+            del attached, got
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_round_trip_without_numpy(self) -> None:
+        with mock.patch.object(candles, "np", None), mock.patch.object(sweep, "np", None):
+            self.assert_round_trip()
+
+    @unittest.skipIf(candles.np is None, "numpy not installed")
+    def test_round_trip_with_numpy(self) -> None:
+        self.assert_round_trip()
+
+
+class IterParamsTests(unittest.TestCase):
+    SPACE = {"mtf.score_min": [6, 7, 8], "impulse.swing_lookback": [2, 3], "mtf.trend_swings_n": [3, 4, 5, 6]}
+
+    def all_combinations(self) -> set[tuple]:
+        keys = sorted(self.SPACE)
+        return {tuple(zip(keys, values)) for values in itertools.product(*(self.SPACE[k] for k in keys))}
+
+    def test_grid_covers_every_combination_once(self) -> None:
+        params = iter_params(self.SPACE, "grid", 0, 1)
+        combos = [tuple(sorted(p.items())) for p in params]
+        self.assertEqual(len(combos), math.prod(len(v) for v in self.SPACE.values()))
+        self.assertEqual(set(combos), self.all_combinations())
+
+    def test_random_samples_are_distinct_and_complete(self) -> None:
+        everything = self.all_combinations()
+        for seed in range(5):
+            params = iter_params(self.SPACE, "random", 10, seed)
+            combos = [tuple(sorted(p.items())) for p in params]
+            self.assertEqual(len(combos), 10)
+            self.assertEqual(len(set(combos)), 10)
+            self.assertTrue(set(combos) <= everything)
+            for p in params:
+                self.assertEqual(sorted(p), sorted(self.SPACE))
+
+        # Asking for more samples than the space holds returns the whole grid.
+        combos = {tuple(sorted(p.items())) for p in iter_params(self.SPACE, "random", 100, 1)}
+        self.assertEqual(combos, everything)
+
+
+if __name__ == "__main__":
+    unittest.main()
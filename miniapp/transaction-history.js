@@ -32,8 +32,49 @@
     return { text: "USD 0.00", className: "" };
   }
 
-  var records7 = safeParseArray(params.get("records_7d"));
-  var records30 = safeParseArray(params.get("records_30d"));
+  // Compact rows: [days_before_reference, "HH:MM", source_index, mode, amount].
+  var SOURCES = [
+    { source: "deposit_activity", label: "Deposit" },
+    { source: "withdrawal_activity", label: "Withdrawal" },
+    { source: "trading_activity", label: "Trading" },
+    { source: "balance_adjustment", label: "Adjustment" },
+    { source: "tabung", label: "Tabung" }
+  ];
+
+  function offsetDate(referenceDate, dayOffset) {
+    var parts = String(referenceDate || "").split("-");
+    if (parts.length !== 3) return "-";
+    var d = new Date(Date.UTC(Number(parts[0]), Number(parts[1]) - 1, Number(parts[2]) - Number(dayOffset || 0)));
+    if (isNaN(d.getTime())) return "-";
+    return d.toISOString().slice(0, 10);
+  }
+
+  function decodeCompactRows(value, referenceDate) {
+    return safeParseArray(value).map(function (item) {
+      var src = SOURCES[Number(item[2])] || { source: "transaction", label: "Transaction" };
+      return {
+        offset: Number(item[0] || 0),
+        date: offsetDate(referenceDate, item[0]),
+        time: item[1] || "-",
+        source: src.source,
+        label: src.label,
+        mode: item[3] || "",
+        amount_usd: Number(item[4] || 0)
+      };
+    });
+  }
+
+  var records7;
+  var records30;
+  if (params.get("tx")) {
+    records30 = decodeCompactRows(params.get("tx"), params.get("reference_date"));
+    records7 = records30.filter(function (row) {
+      return row.offset <= 6;
+    });
+  } else {
+    records7 = safeParseArray(params.get("records_7d"));
+    records30 = safeParseArray(params.get("records_30d"));
+  }
 
   document.getElementById("summaryName").textContent = params.get("name") || "-";
   document.getElementById("summaryDate").textContent = params.get("saved_date") || "-";
@@ -1,17 +1,21 @@
 """Main entry point for MM HELPER Telegram bot."""
 
+import asyncio
 import logging
 import os
+from datetime import time as dt_time
 from pathlib import Path
 
 from telegram.ext import (
     ApplicationBuilder,
     CallbackQueryHandler,
     CommandHandler,
+    ContextTypes,
     MessageHandler,
     filters,
 )
 
+from broadcast import ensure_broadcast_worker
 from handlers import (
     BETA_RESET_CB_BEGIN,
     BETA_RESET_CB_CANCEL,
@@ -19,13 +23,21 @@ from handlers import (
     handle_admin_inline_actions,
     handle_text_actions,
 )
-from notification_engine import run_notification_engine
+from notification_engine import BROADCAST_BOT_NAME, NOTIFICATION_JOB_NAME, run_notification_engine
+from report_pipeline import precompute_closed_period_reports
 from setup_flow import handle_setup_webapp
+from storage import expire_broadcast_jobs, verify_stats_rollups
+from time_utils import MALAYSIA_TZ
 from welcome import TNC_ACCEPT, TNC_DECLINE, handle_tnc_callback, start
 
 
 logger = logging.getLogger(__name__)
 
+ROLLUP_VERIFY_INTERVAL_SEC = 6 * 60 * 60
+BROADCAST_WORKER_CHECK_SEC = 30
+# Just after midnight MYT, when the previous week/month has closed.
+REPORT_PRECOMPUTE_TIME = dt_time(0, 5, tzinfo=MALAYSIA_TZ)
+
 
 def load_local_env() -> None:
     env_path = Path(__file__).with_name(".env")
@@ -51,6 +63,29 @@ def get_bot_token() -> str:
     return token
 
 
+async def run_rollup_verifier(context: ContextTypes.DEFAULT_TYPE) -> None:
+    report = await asyncio.to_thread(verify_stats_rollups)
+    if report["error"]:
+        logger.warning("Rollup verifier failed: %s", report["error"])
+    elif report["drifted"]:
+        logger.warning(
+            "Rollup verifier repaired drift for %s user(s): %s",
+            report["drifted"],
+            report["drift"],
+        )
+
+
+async def run_report_precompute(context: ContextTypes.DEFAULT_TYPE) -> None:
+    counts = await asyncio.to_thread(precompute_closed_period_reports)
+    if counts["weekly"] or counts["monthly"] or counts["failed"]:
+        logger.info("Report precompute: %s", counts)
+
+
+async def keep_broadcast_worker(context: ContextTypes.DEFAULT_TYPE) -> None:
+    await asyncio.to_thread(expire_broadcast_jobs)
+    ensure_broadcast_worker(context.application, BROADCAST_BOT_NAME)
+
+
 def main() -> None:
     app = ApplicationBuilder().token(get_bot_token()).build()
 
@@ -65,7 +100,21 @@ def main() -> None:
     app.add_handler(MessageHandler(filters.StatusUpdate.WEB_APP_DATA, handle_setup_webapp))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_actions))
     if app.job_queue is not None:
-        app.job_queue.run_repeating(run_notification_engine, interval=60, first=20, name="notification_engine")
+        # First run arms the next due notification; it re-arms itself after that.
+        app.job_queue.run_once(run_notification_engine, when=20, name=NOTIFICATION_JOB_NAME)
+        app.job_queue.run_repeating(
+            keep_broadcast_worker,
+            interval=BROADCAST_WORKER_CHECK_SEC,
+            first=5,
+            name="broadcast_worker",
+        )
+        app.job_queue.run_repeating(
+            run_rollup_verifier,
+            interval=ROLLUP_VERIFY_INTERVAL_SEC,
+            first=300,
+            name="rollup_verifier",
+        )
+        app.job_queue.run_daily(run_report_precompute, time=REPORT_PRECOMPUTE_TIME, name="report_precompute")
     else:
         logger.warning("JobQueue unavailable; notification engine is disabled.")
 
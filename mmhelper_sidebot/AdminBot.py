@@ -6,6 +6,7 @@ import json
 import logging
 import os
 import sqlite3
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 from uuid import uuid4
@@ -25,6 +26,12 @@ from telegram import (
 from telegram.error import BadRequest
 from telegram.ext import ApplicationBuilder, CallbackQueryHandler, CommandHandler, ContextTypes, MessageHandler, filters
 
+# Shared SQLite connection pool lives at the repo root (next to storage.py).
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
+
+import shared_db  # noqa: E402
 from texts import (
     ADMIN_PANEL_TEXT,
     BETA_RESET_DONE_TEXT,
@@ -95,13 +102,10 @@ def get_shared_db_path() -> Path:
 
 
 def _connect_shared_db() -> sqlite3.Connection:
-    db_path = get_shared_db_path()
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return shared_db.connect(get_shared_db_path())
 
 
+@shared_db.schema_once("vip_whitelist")
 def _ensure_whitelist_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
@@ -198,6 +202,7 @@ def _write_json_mirror(data: dict) -> None:
         logger.warning("Failed to write whitelist JSON mirror", exc_info=True)
 
 
+@shared_db.schema_once("sidebot_kv_state")
 def _ensure_state_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
@@ -209,6 +214,7 @@ def _ensure_state_table(conn: sqlite3.Connection) -> None:
     )
 
 
+@shared_db.schema_once("sidebot_users")
 def _ensure_users_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
@@ -226,6 +232,7 @@ def _ensure_users_table(conn: sqlite3.Connection) -> None:
     )
 
 
+@shared_db.schema_once("sidebot_submissions")
 def _ensure_submissions_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
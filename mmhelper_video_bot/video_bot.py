@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
+import sys
 import time
 from datetime import datetime
 from pathlib import Path
@@ -14,6 +16,13 @@ from zoneinfo import ZoneInfo
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup, Update, WebAppInfo
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, MessageHandler, filters
 
+# Shared broadcast queue lives at the repo root (next to storage.py).
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
+
+from broadcast import ensure_broadcast_worker  # noqa: E402
+from storage import enqueue_broadcast_job, expire_broadcast_jobs, get_broadcast_job  # noqa: E402
 from texts import (
     COMING_SOON_FIBO,
     COMING_SOON_INTRADAY,
@@ -54,6 +63,8 @@ SENT_VIDEO_LOG_PATH = Path(__file__).with_name("sent_video_log.json")
 KNOWN_USERS_PATH = Path(__file__).with_name("known_users.json")
 SCHEDULED_NOTIFICATIONS_PATH = Path(__file__).with_name("scheduled_notifications.json")
 AUTO_DELETE_NOTICES_PATH = Path(__file__).with_name("auto_delete_notices.json")
+BROADCAST_BOT_NAME = "video"
+BROADCAST_WORKER_CHECK_SEC = 30
 VIDEO_STATUS_PATH = Path(__file__).with_name("video_status.json")
 DEFAULT_VIP_WHITELIST_PATH = Path(__file__).resolve().parent.parent / "mmhelper_sidebot" / "sidebot_vip_whitelist.json"
 
@@ -585,11 +596,65 @@ def _create_scheduled_notification(message: str, send_at_epoch: int, auto_delete
         "status": "pending",
         "created_at": int(time.time()),
     }
+    _queue_scheduled_notification(row)
     rows.append(row)
     _save_scheduled_notifications(rows)
     return row
 
 
+def _queue_scheduled_notification(row: dict) -> None:
+    # Recipients are picked from known_users.json when the job becomes due.
+    job_id = enqueue_broadcast_job(
+        BROADCAST_BOT_NAME,
+        f"{BROADCAST_BOT_NAME}|schedule|{int(row.get('id') or 0)}|{int(row.get('created_at') or 0)}",
+        str(row.get("message") or "").strip(),
+        options={"auto_delete": bool(row.get("auto_delete")), "schedule_id": int(row.get("id") or 0)},
+        not_before_ts=int(row.get("send_at") or 0),
+    )
+    if job_id is not None:
+        row["status"] = "queued"
+        row["job_id"] = job_id
+
+
+def _queue_legacy_scheduled_notifications() -> None:
+    """Move rows still pending in scheduled_notifications.json into the shared queue.
+
+    Also retries rows whose enqueue failed (SQLite busy); the job_key dedupes.
+    """
+    rows = _load_scheduled_notifications()
+    updated = False
+    for row in rows:
+        if str(row.get("status") or "") != "pending":
+            continue
+        _queue_scheduled_notification(row)
+        updated = updated or row.get("status") == "queued"
+    if updated:
+        _save_scheduled_notifications(rows)
+
+
+def _sync_scheduled_notification_status() -> None:
+    """Copy the outcome of finished queue jobs back into scheduled_notifications.json."""
+    rows = _load_scheduled_notifications()
+    updated = False
+    for row in rows:
+        if str(row.get("status") or "") != "queued" or not row.get("job_id"):
+            continue
+        job = get_broadcast_job(int(row["job_id"]))
+        if job is None or job["status"] not in {"done", "expired"}:
+            continue
+        try:
+            finished_at = int(datetime.fromisoformat(str(job.get("finished_at") or "")).timestamp())
+        except ValueError:
+            finished_at = int(time.time())
+        row["status"] = "sent" if job["status"] == "done" else "expired"
+        row["sent_at"] = finished_at
+        row["sent_count"] = int(job.get("sent") or 0)
+        row["fail_count"] = int(job.get("failed") or 0) + int(job.get("blocked") or 0)
+        updated = True
+    if updated:
+        _save_scheduled_notifications(rows)
+
+
 def _load_auto_delete_notices() -> dict[str, list[int]]:
     if not AUTO_DELETE_NOTICES_PATH.exists():
         return {}
@@ -653,43 +718,25 @@ async def _purge_auto_delete_notices_for_chat(context: ContextTypes.DEFAULT_TYPE
             pass
 
 
-async def scheduled_notification_worker(context: ContextTypes.DEFAULT_TYPE) -> None:
-    now = int(time.time())
-    rows = _load_scheduled_notifications()
-    if not rows:
-        return
+def _broadcast_recipients(job: dict) -> list[int]:
+    return _load_int_list(KNOWN_USERS_PATH)
 
-    users = _load_int_list(KNOWN_USERS_PATH)
-    updated = False
-    for row in rows:
-        if str(row.get("status") or "") != "pending":
-            continue
-        send_at = int(row.get("send_at") or 0)
-        if send_at <= 0 or send_at > now:
-            continue
 
-        message = str(row.get("message") or "").strip()
-        auto_delete = bool(row.get("auto_delete"))
-        sent_count = 0
-        fail_count = 0
+def _on_broadcast_sent(job: dict, chat_id: int, sent) -> None:
+    if job.get("options", {}).get("auto_delete") and sent is not None:
+        _append_auto_delete_notice(chat_id, int(sent.message_id))
 
-        for chat_id in users:
-            try:
-                sent = await context.bot.send_message(chat_id=chat_id, text=message)
-                sent_count += 1
-                if auto_delete:
-                    _append_auto_delete_notice(chat_id, int(sent.message_id))
-            except Exception:
-                fail_count += 1
-
-        row["status"] = "sent"
-        row["sent_at"] = now
-        row["sent_count"] = sent_count
-        row["fail_count"] = fail_count
-        updated = True
 
-    if updated:
-        _save_scheduled_notifications(rows)
+async def keep_broadcast_worker(context: ContextTypes.DEFAULT_TYPE) -> None:
+    await asyncio.to_thread(expire_broadcast_jobs)
+    _queue_legacy_scheduled_notifications()
+    _sync_scheduled_notification_status()
+    ensure_broadcast_worker(
+        context.application,
+        BROADCAST_BOT_NAME,
+        resolve_recipients=_broadcast_recipients,
+        on_sent=_on_broadcast_sent,
+    )
 
 
 def build_level_text(level_key: str, group_id: int | None) -> str:
@@ -1248,8 +1295,9 @@ async def handle_webapp_data(update: Update, context: ContextTypes.DEFAULT_TYPE)
 def main() -> None:
     token = get_token()
     app = ApplicationBuilder().token(token).build()
+    _queue_legacy_scheduled_notifications()
     if app.job_queue is not None:
-        app.job_queue.run_repeating(scheduled_notification_worker, interval=10, first=5)
+        app.job_queue.run_repeating(keep_broadcast_worker, interval=BROADCAST_WORKER_CHECK_SEC, first=5)
     else:
         logger.warning("Job queue unavailable; scheduled notifications disabled.")
     app.add_handler(CommandHandler("start", start))
@@ -2,19 +2,29 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Any
 
 from telegram.ext import ContextTypes
 
 from menu import ADMIN_USER_IDS
 from storage import (
+    enqueue_broadcast_job,
     get_notification_settings,
     list_active_user_ids,
     mark_notification_sent,
+    notification_marker_ttl,
     was_notification_sent,
 )
 from time_utils import MALAYSIA_TZ, malaysia_now
 
+BROADCAST_BOT_NAME = "mmhelper"
+NOTIFICATION_JOB_NAME = "notification_engine"
+# Floor between runs when something stays due (e.g. queue down), and a ceiling
+# so edits made outside this process are still picked up.
+NOTIFICATION_RETRY_DELAY_SEC = 60
+NOTIFICATION_RESYNC_SEC = 30 * 60
+
 
 def _first_admin_id() -> int | None:
     if not ADMIN_USER_IDS:
@@ -22,6 +32,12 @@ def _first_admin_id() -> int | None:
     return sorted(ADMIN_USER_IDS)[0]
 
 
+def _is_past_marker_ttl(now: datetime, target_dt: datetime) -> bool:
+    # Sent markers expire after the TTL, so schedules older than that are
+    # treated as handled instead of being sent a second time.
+    return now - target_dt > notification_marker_ttl()
+
+
 def _parse_datetime(date_str: str, time_str: str) -> datetime | None:
     if not date_str or not time_str:
         return None
@@ -32,14 +48,17 @@ def _parse_datetime(date_str: str, time_str: str) -> datetime | None:
         return None
 
 
-async def _broadcast(context: ContextTypes.DEFAULT_TYPE, recipients: list[int], text: str) -> None:
-    if not text.strip():
+def _queue_broadcast(admin_id: int, category: str, marker: str, recipients: list[int], text: str) -> None:
+    """Hand the broadcast to the shared queue worker; the marker is written once it is queued."""
+    if not recipients:
+        # Nobody to send to: mark it handled so it stops counting as due.
+        mark_notification_sent(admin_id, category, marker)
         return
-    for user_id in recipients:
-        try:
-            await context.bot.send_message(chat_id=user_id, text=text)
-        except Exception:
-            continue
+    job_key = f"{BROADCAST_BOT_NAME}|{admin_id}|{category}|{marker}"
+    if enqueue_broadcast_job(BROADCAST_BOT_NAME, job_key, text, recipients) is None:
+        # Queue unavailable; the next tick tries again.
+        return
+    mark_notification_sent(admin_id, category, marker)
 
 
 async def _handle_manual_push(
@@ -58,15 +77,14 @@ async def _handle_manual_push(
     target_dt = _parse_datetime(date_str, time_str)
     if not target_dt or not message:
         return
-    if now < target_dt:
+    if now < target_dt or _is_past_marker_ttl(now, target_dt):
         return
 
     marker = f"{date_str}|{time_str}|{message}"
     if was_notification_sent(admin_id, "manual_push", marker):
         return
 
-    await _broadcast(context, recipients, message)
-    mark_notification_sent(admin_id, "manual_push", marker)
+    _queue_broadcast(admin_id, "manual_push", marker, recipients, message)
 
 
 async def _handle_daily_notifications(
@@ -96,8 +114,7 @@ async def _handle_daily_notifications(
         marker = f"{today}|{time_str}"
         if was_notification_sent(admin_id, "daily_notification", marker):
             continue
-        await _broadcast(context, recipients, message)
-        mark_notification_sent(admin_id, "daily_notification", marker)
+        _queue_broadcast(admin_id, "daily_notification", marker, recipients, message)
 
 
 async def _handle_report_notifications(
@@ -117,22 +134,24 @@ async def _handle_report_notifications(
     if weekly_date and weekly_date == today:
         marker = f"weekly|{today}"
         if not was_notification_sent(admin_id, "report_notification", marker):
-            await _broadcast(
-                context,
+            _queue_broadcast(
+                admin_id,
+                "report_notification",
+                marker,
                 recipients,
                 "📊 Weekly report dah ready. Check sekarang untuk tengok progress minggu ni.",
             )
-            mark_notification_sent(admin_id, "report_notification", marker)
 
     if monthly_date and monthly_date == today:
         marker = f"monthly|{today}"
         if not was_notification_sent(admin_id, "report_notification", marker):
-            await _broadcast(
-                context,
+            _queue_broadcast(
+                admin_id,
+                "report_notification",
+                marker,
                 recipients,
                 "📈 Monthly report dah ready. Jom semak prestasi bulan ni dan plan next move.",
             )
-            mark_notification_sent(admin_id, "report_notification", marker)
 
 
 async def _handle_maintenance_notifications(
@@ -154,24 +173,134 @@ async def _handle_maintenance_notifications(
     start_dt = _parse_datetime(start_date, start_time)
     end_dt = _parse_datetime(end_date, end_time)
 
-    if start_dt and message and now >= start_dt:
+    if start_dt and message and now >= start_dt and not _is_past_marker_ttl(now, start_dt):
         marker = f"start|{start_date}|{start_time}|{message}"
         if not was_notification_sent(admin_id, "maintenance_notification", marker):
-            await _broadcast(context, recipients, message)
-            mark_notification_sent(admin_id, "maintenance_notification", marker)
+            _queue_broadcast(admin_id, "maintenance_notification", marker, recipients, message)
 
-    if end_dt and now >= end_dt:
+    if end_dt and now >= end_dt and not _is_past_marker_ttl(now, end_dt):
         marker = f"end|{end_date}|{end_time}"
         if not was_notification_sent(admin_id, "maintenance_notification", marker):
-            await _broadcast(
-                context,
+            _queue_broadcast(
+                admin_id,
+                "maintenance_notification",
+                marker,
                 recipients,
                 "✅ Maintenance selesai. Semua fungsi MM Helper dah kembali normal.",
             )
-            mark_notification_sent(admin_id, "maintenance_notification", marker)
+
+
+def _one_off_due(now: datetime, admin_id: int, category: str, marker: str, target_dt: datetime | None) -> datetime | None:
+    if target_dt is None or _is_past_marker_ttl(now, target_dt):
+        return None
+    if target_dt <= now and was_notification_sent(admin_id, category, marker):
+        return None
+    return target_dt
+
+
+def _report_due(now: datetime, admin_id: int, kind: str, date_str: str) -> datetime | None:
+    try:
+        remind_date = date.fromisoformat(date_str)
+    except ValueError:
+        return None
+    today = now.date()
+    if remind_date < today:
+        return None
+    if remind_date == today and was_notification_sent(admin_id, "report_notification", f"{kind}|{today.isoformat()}"):
+        return None
+    return datetime(remind_date.year, remind_date.month, remind_date.day, tzinfo=MALAYSIA_TZ)
+
+
+def compute_next_notification_due(admin_id: int, settings: dict[str, Any], now: datetime) -> datetime | None:
+    """Earliest time one of the handlers above has something to send (past = due now)."""
+    candidates: list[datetime | None] = []
+
+    manual = settings.get("manual_push", {})
+    if manual.get("enabled") and str(manual.get("message") or "").strip():
+        date_str = str(manual.get("date") or "").strip()
+        time_str = str(manual.get("time") or "").strip()
+        message = str(manual.get("message") or "").strip()
+        candidates.append(
+            _one_off_due(now, admin_id, "manual_push", f"{date_str}|{time_str}|{message}", _parse_datetime(date_str, time_str))
+        )
+
+    daily = settings.get("daily_notification", {})
+    times = daily.get("times", [])
+    if daily.get("enabled") and str(daily.get("preset_message") or "").strip() and isinstance(times, list):
+        today = now.strftime("%Y-%m-%d")
+        tomorrow = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+        for raw_time in times:
+            time_str = str(raw_time or "").strip()
+            today_dt = _parse_datetime(today, time_str)
+            if today_dt is None:
+                continue
+            if today_dt > now or not was_notification_sent(admin_id, "daily_notification", f"{today}|{time_str}"):
+                candidates.append(today_dt)
+            else:
+                candidates.append(_parse_datetime(tomorrow, time_str))
+
+    report = settings.get("report_notification", {})
+    if report.get("enabled"):
+        candidates.append(_report_due(now, admin_id, "weekly", str(report.get("weekly_remind_date") or "").strip()))
+        candidates.append(_report_due(now, admin_id, "monthly", str(report.get("monthly_remind_date") or "").strip()))
+
+    maintenance = settings.get("maintenance_notification", {})
+    if maintenance.get("enabled"):
+        start_date = str(maintenance.get("start_date") or "").strip()
+        start_time = str(maintenance.get("start_time") or "").strip()
+        end_date = str(maintenance.get("end_date") or "").strip()
+        end_time = str(maintenance.get("end_time") or "").strip()
+        message = str(maintenance.get("message") or "").strip()
+        if message:
+            candidates.append(
+                _one_off_due(
+                    now,
+                    admin_id,
+                    "maintenance_notification",
+                    f"start|{start_date}|{start_time}|{message}",
+                    _parse_datetime(start_date, start_time),
+                )
+            )
+        candidates.append(
+            _one_off_due(
+                now,
+                admin_id,
+                "maintenance_notification",
+                f"end|{end_date}|{end_time}",
+                _parse_datetime(end_date, end_time),
+            )
+        )
+
+    due = [item for item in candidates if item is not None]
+    return min(due) if due else None
+
+
+def schedule_notification_engine(job_queue: Any, *, min_delay_sec: float = 0.0) -> None:
+    """(Re-)arm the single run_once job for the next due notification."""
+    if job_queue is None:
+        return
+    for job in job_queue.get_jobs_by_name(NOTIFICATION_JOB_NAME):
+        job.schedule_removal()
+
+    delay = float(NOTIFICATION_RESYNC_SEC)
+    admin_id = _first_admin_id()
+    settings = get_notification_settings(admin_id) if admin_id else {}
+    if admin_id and settings:
+        now = malaysia_now()
+        due = compute_next_notification_due(admin_id, settings, now)
+        if due is not None:
+            delay = min(delay, (due - now).total_seconds())
+    job_queue.run_once(run_notification_engine, when=max(delay, min_delay_sec), name=NOTIFICATION_JOB_NAME)
 
 
 async def run_notification_engine(context: ContextTypes.DEFAULT_TYPE) -> None:
+    try:
+        await _run_due_notifications(context)
+    finally:
+        schedule_notification_engine(context.job_queue, min_delay_sec=NOTIFICATION_RETRY_DELAY_SEC)
+
+
+async def _run_due_notifications(context: ContextTypes.DEFAULT_TYPE) -> None:
     admin_id = _first_admin_id()
     if not admin_id:
         return
@@ -180,11 +309,13 @@ async def run_notification_engine(context: ContextTypes.DEFAULT_TYPE) -> None:
     if not settings:
         return
 
-    recipients = list_active_user_ids()
-    if not recipients:
+    now = malaysia_now()
+    due = compute_next_notification_due(admin_id, settings, now)
+    if due is None or due > now:
+        # Woken early by the resync ceiling; nothing to load.
         return
 
-    now = malaysia_now()
+    recipients = list_active_user_ids()
     await _handle_manual_push(context, now, admin_id, recipients, settings.get("manual_push", {}))
     await _handle_daily_notifications(context, now, admin_id, recipients, settings.get("daily_notification", {}))
     await _handle_report_notifications(context, now, admin_id, recipients, settings.get("report_notification", {}))
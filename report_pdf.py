@@ -0,0 +1,341 @@
+"""PDF rendering for MM HELPER weekly/monthly reports.
+
+Pure functions from a report_pipeline dataset to PDF bytes. This module must
+not import storage or telegram: it is loaded by the render worker processes.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+
+def _pdf_escape(text: str) -> str:
+    safe = re.sub(r"[^\x20-\x7E]", " ", str(text))
+    return safe.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_text(x: float, y: float, text: str, size: int = 10, bold: bool = False, rgb: tuple[float, float, float] = (0, 0, 0)) -> str:
+    font = "F2" if bold else "F1"
+    r, g, b = rgb
+    return f"BT {r:.3f} {g:.3f} {b:.3f} rg /{font} {size} Tf {x:.2f} {y:.2f} Td ({_pdf_escape(text)}) Tj ET"
+
+
+def _pdf_rect(x: float, y: float, w: float, h: float, fill_rgb: tuple[float, float, float] | None = None, stroke_rgb: tuple[float, float, float] | None = None, line_w: float = 1.0) -> str:
+    cmds: list[str] = []
+    if fill_rgb is not None:
+        fr, fg, fb = fill_rgb
+        cmds.append(f"{fr:.3f} {fg:.3f} {fb:.3f} rg")
+    if stroke_rgb is not None:
+        sr, sg, sb = stroke_rgb
+        cmds.append(f"{sr:.3f} {sg:.3f} {sb:.3f} RG {line_w:.2f} w")
+    cmds.append(f"{x:.2f} {y:.2f} {w:.2f} {h:.2f} re")
+    if fill_rgb is not None and stroke_rgb is not None:
+        cmds.append("B")
+    elif fill_rgb is not None:
+        cmds.append("f")
+    else:
+        cmds.append("S")
+    return " ".join(cmds)
+
+
+def _build_styled_pdf(commands: list[str]) -> bytes:
+    stream = "\n".join(commands).encode("latin-1", errors="replace")
+
+    objects = [
+        b"1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n",
+        b"2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n",
+        b"3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >> endobj\n",
+        b"4 0 obj << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> endobj\n",
+        b"5 0 obj << /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >> endobj\n",
+        f"6 0 obj << /Length {len(stream)} >> stream\n".encode("latin-1") + stream + b"\nendstream endobj\n",
+    ]
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = [0]
+    for obj in objects:
+        offsets.append(len(out))
+        out.extend(obj)
+
+    xref_pos = len(out)
+    out.extend(f"xref\n0 {len(objects) + 1}\n".encode("latin-1"))
+    out.extend(b"0000000000 65535 f \n")
+    for off in offsets[1:]:
+        out.extend(f"{off:010d} 00000 n \n".encode("latin-1"))
+    out.extend(
+        f"trailer << /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_pos}\n%%EOF\n".encode("latin-1")
+    )
+    return bytes(out)
+
+
+def render_weekly_report_pdf(data: dict[str, Any]) -> tuple[bytes, str]:
+    summary = {"name": data["name"]}
+    today = data["today"]
+    week_start = data["period_start"]
+    week_end = data["period_end"]
+    starting_balance = data["starting_balance"]
+    starting_balance_label = data["starting_balance_label"]
+    daily_target_usd = data["daily_target_usd"]
+    reached_count = data["reached_count"]
+    daily_rows = data["daily_rows"]
+    section_total = data["section_total"]
+    section_count = data["section_count"]
+    grow_target_total = data["grow_target_total"]
+    selected_target_days = data["selected_target_days"]
+    grow_target_remaining = data["grow_target_remaining"]
+    remain_pct = data["remain_pct"]
+    remaining_trading_days_now = data["remaining_trading_days_now"]
+    recalculated_daily_target_now = data["recalculated_daily_target_now"]
+    weekly_pl = data["weekly_pl"]
+    ending_balance = data["ending_balance"]
+    tabung_balance = data["tabung_balance"]
+    total_balance = data["total_balance"]
+
+    cmds: list[str] = []
+    # Header
+    cmds.append(_pdf_rect(35, 770, 525, 48, fill_rgb=(0.09, 0.20, 0.42)))
+    cmds.append(_pdf_text(50, 798, "MM HELPER - WEEKLY REPORT", size=15, bold=True, rgb=(1, 1, 1)))
+    cmds.append(_pdf_text(50, 782, f"User: {summary['name']}  |  Report Date: {today.isoformat()}", size=9, rgb=(0.90, 0.95, 1.0)))
+
+    # Meta
+    cmds.append(_pdf_rect(35, 730, 525, 28, fill_rgb=(0.95, 0.97, 1.0), stroke_rgb=(0.80, 0.85, 0.93), line_w=0.8))
+    cmds.append(_pdf_text(48, 746, f"Report Period: {week_start.isoformat()} to {week_end.isoformat()}", size=9, bold=True, rgb=(0.16, 0.22, 0.33)))
+    cmds.append(_pdf_text(320, 746, "Target reference: 22 trading days per month", size=8, rgb=(0.32, 0.38, 0.48)))
+
+    # Starting balance section (full-width)
+    cmds.append(_pdf_rect(35, 676, 525, 48, fill_rgb=(1, 1, 1), stroke_rgb=(0.82, 0.85, 0.90), line_w=0.8))
+    cmds.append(_pdf_text(48, 700, "Opening Balance", size=11, bold=True, rgb=(0.10, 0.20, 0.35)))
+    cmds.append(_pdf_text(48, 686, starting_balance_label, size=8, rgb=(0.28, 0.34, 0.44)))
+    cmds.append(_pdf_text(340, 692, f"USD {starting_balance:.2f}", size=12, bold=True, rgb=(0.08, 0.17, 0.30)))
+
+    # Daily target status table
+    cmds.append(_pdf_rect(35, 420, 525, 248, fill_rgb=(1, 1, 1), stroke_rgb=(0.82, 0.85, 0.90), line_w=0.8))
+    cmds.append(_pdf_text(48, 652, "Daily Target Status by Day", size=11, bold=True, rgb=(0.10, 0.20, 0.35)))
+    cmds.append(_pdf_text(48, 638, f"Frozen Daily Target (Report Week): USD {daily_target_usd:.2f}", size=9, bold=True, rgb=(0.08, 0.17, 0.30)))
+    cmds.append(_pdf_text(280, 638, f"Reached Days: {reached_count}", size=9, bold=True, rgb=(0.08, 0.17, 0.30)))
+
+    col_x = [48, 180, 290, 390, 485]
+    col_titles = ["Day", "Daily Target", "Trading P/L", "Tabung", "Status"]
+    cmds.append(_pdf_rect(45, 616, 505, 18, fill_rgb=(0.92, 0.95, 0.99), stroke_rgb=(0.84, 0.88, 0.93), line_w=0.5))
+    for title, x in zip(col_titles, col_x):
+        cmds.append(_pdf_text(x, 622, title, size=9, bold=True, rgb=(0.13, 0.22, 0.35)))
+
+    y = 595
+    for day_label, target_label, pl_label, tabung_label, status in daily_rows:
+        cmds.append(_pdf_rect(45, y - 3, 505, 20, fill_rgb=(0.985, 0.988, 0.995), stroke_rgb=(0.90, 0.92, 0.95), line_w=0.3))
+        pl_val = float(pl_label.replace("USD", "").strip())
+        tabung_val = float(tabung_label.replace("USD", "").strip())
+        pl_color = (0.65, 0.10, 0.10) if pl_val < 0 else (0.08, 0.25, 0.10)
+        tabung_color = (0.08, 0.25, 0.10) if tabung_val > 0 else (0.18, 0.25, 0.36)
+        status_color = (0.08, 0.40, 0.18) if status == "Reached" else (0.62, 0.18, 0.10) if status == "Not Reached" else (0.35, 0.35, 0.35)
+        cmds.append(_pdf_text(col_x[0], y + 2, day_label, size=9, rgb=(0.18, 0.25, 0.36)))
+        cmds.append(_pdf_text(col_x[1], y + 2, target_label, size=9, rgb=(0.18, 0.25, 0.36)))
+        cmds.append(_pdf_text(col_x[2], y + 2, pl_label, size=9, bold=True, rgb=pl_color))
+        cmds.append(_pdf_text(col_x[3], y + 2, tabung_label, size=9, bold=True, rgb=tabung_color))
+        cmds.append(_pdf_text(col_x[4], y + 2, status, size=9, bold=True, rgb=status_color))
+        y -= 25
+
+    # Weekly transaction totals (full-width)
+    cmds.append(_pdf_rect(35, 304, 525, 104, fill_rgb=(1, 1, 1), stroke_rgb=(0.82, 0.85, 0.90), line_w=0.8))
+    cmds.append(_pdf_text(48, 392, "Weekly Transaction Totals by Category", size=11, bold=True, rgb=(0.10, 0.20, 0.35)))
+    tx_headers = [("Category", 52), ("Count", 310), ("Total (USD)", 420)]
+    cmds.append(_pdf_rect(45, 372, 505, 16, fill_rgb=(0.92, 0.95, 0.99), stroke_rgb=(0.84, 0.88, 0.93), line_w=0.5))
+    for txt, x in tx_headers:
+        cmds.append(_pdf_text(x, 377, txt, size=8, bold=True, rgb=(0.13, 0.22, 0.35)))
+    tx_rows = [
+        ("Deposit", section_count["deposit"], section_total["deposit"]),
+        ("Withdrawal", section_count["withdrawal"], section_total["withdrawal"]),
+        ("Trading (Net)", section_count["trading"], section_total["trading"]),
+        ("Balance Adjustment", section_count["adjustment"], section_total["adjustment"]),
+        ("Tabung", section_count["tabung"], section_total["tabung"]),
+    ]
+    y = 356
+    for cat, cnt, amt in tx_rows:
+        cmds.append(_pdf_rect(45, y - 2, 505, 13, fill_rgb=(0.985, 0.988, 0.995), stroke_rgb=(0.90, 0.92, 0.95), line_w=0.3))
+        cmds.append(_pdf_text(52, y + 2, cat, size=8, rgb=(0.18, 0.25, 0.36)))
+        cmds.append(_pdf_text(315, y + 2, str(cnt), size=8, bold=True, rgb=(0.18, 0.25, 0.36)))
+        amt_color = (0.65, 0.10, 0.10) if amt < 0 else (0.08, 0.25, 0.10)
+        cmds.append(_pdf_text(420, y + 2, f"{amt:.2f}", size=8, bold=True, rgb=amt_color))
+        y -= 14
+
+    # Goal summary section
+    cmds.append(_pdf_rect(35, 168, 525, 124, fill_rgb=(1, 1, 1), stroke_rgb=(0.82, 0.85, 0.90), line_w=0.8))
+    cmds.append(_pdf_text(48, 276, "Current Goal Summary (calculated from tabung grow only)", size=10, bold=True, rgb=(0.10, 0.20, 0.35)))
+    cmds.append(_pdf_rect(45, 256, 505, 16, fill_rgb=(0.92, 0.95, 0.99), stroke_rgb=(0.84, 0.88, 0.93), line_w=0.5))
+    cmds.append(_pdf_text(52, 261, "Item", size=9, bold=True, rgb=(0.13, 0.22, 0.35)))
+    cmds.append(_pdf_text(340, 261, "Value", size=9, bold=True, rgb=(0.13, 0.22, 0.35)))
+
+    goal_rows: list[tuple[str, str, tuple[float, float, float]]] = []
+    if grow_target_total <= 0:
+        goal_rows.append(("Goal Status", "New goal is not set yet", (0.62, 0.18, 0.10)))
+    else:
+        goal_rows.extend(
+            [
+                ("Selected Goal Duration", f"{selected_target_days} days", (0.18, 0.25, 0.36)),
+                ("Remaining Grow Target", f"USD {grow_target_remaining:.2f}", (0.62, 0.18, 0.10) if grow_target_remaining > 0 else (0.08, 0.40, 0.18)),
+                ("Remaining Goal Percentage", f"{remain_pct:.2f}%", (0.62, 0.18, 0.10) if remain_pct > 0 else (0.08, 0.40, 0.18)),
+            ]
+        )
+        if grow_target_remaining <= 0:
+            goal_rows.append(("New Daily Target", "Target already achieved", (0.08, 0.40, 0.18)))
+        elif remaining_trading_days_now > 0:
+            goal_rows.append(
+                (
+                    "New Daily Target",
+                    f"USD {recalculated_daily_target_now:.2f} per day",
+                    (0.18, 0.25, 0.36),
+                )
+            )
+        else:
+            goal_rows.append(("New Daily Target", "Goal period is near end / no trading days left", (0.62, 0.18, 0.10)))
+
+    y = 240
+    for metric, value, color in goal_rows[:5]:
+        cmds.append(_pdf_rect(45, y - 2, 505, 16, fill_rgb=(0.985, 0.988, 0.995), stroke_rgb=(0.90, 0.92, 0.95), line_w=0.3))
+        cmds.append(_pdf_text(52, y + 2, metric, size=9, rgb=(0.18, 0.25, 0.36)))
+        cmds.append(_pdf_text(340, y + 2, value, size=9, bold=True, rgb=color))
+        y -= 18
+
+    # Final summary with ending balance
+    pnl_color = (0.65, 0.10, 0.10) if weekly_pl < 0 else (0.08, 0.25, 0.10)
+    cmds.append(_pdf_rect(35, 70, 525, 92, fill_rgb=(0.96, 0.98, 1.0), stroke_rgb=(0.78, 0.84, 0.92), line_w=0.8))
+    cmds.append(_pdf_text(48, 142, "Ending Balance", size=11, bold=True, rgb=(0.10, 0.20, 0.35)))
+    cmds.append(_pdf_text(52, 124, f"Weekly P/L: USD {weekly_pl:.2f}", size=9, bold=True, rgb=pnl_color))
+    cmds.append(_pdf_text(52, 106, f"Tabung Balance: USD {tabung_balance:.2f}", size=9, bold=True, rgb=(0.08, 0.17, 0.30)))
+    cmds.append(_pdf_text(52, 88, f"Capital: USD {total_balance:.2f}", size=9, bold=True, rgb=(0.08, 0.17, 0.30)))
+    cmds.append(_pdf_text(340, 106, "Ending Balance", size=9, bold=True, rgb=(0.08, 0.17, 0.30)))
+    cmds.append(_pdf_text(340, 88, f"USD {ending_balance:.2f}", size=12, bold=True, rgb=(0.08, 0.17, 0.30)))
+
+    cmds.append(_pdf_text(48, 58, "Note: Summary generated from saved records for the selected period.", size=8, rgb=(0.34, 0.38, 0.45)))
+
+    return _build_styled_pdf(cmds), report_pdf_filename(data)
+
+
+def render_monthly_report_pdf(data: dict[str, Any]) -> tuple[bytes, str]:
+    summary = {"name": data["name"]}
+    today = data["today"]
+    month_start = data["period_start"]
+    month_end = data["period_end"]
+    opening_balance = data["opening_balance"]
+    opening_balance_label = data["opening_balance_label"]
+    weekly_rows = data["weekly_rows"]
+    section_total = data["section_total"]
+    section_count = data["section_count"]
+    grow_target_total = data["grow_target_total"]
+    target_days = data["target_days"]
+    days_left_month_end = data["days_left_month_end"]
+    grow_target_achieved_end = data["grow_target_achieved_end"]
+    grow_target_remaining_end = data["grow_target_remaining_end"]
+    achieved_pct_end = data["achieved_pct_end"]
+    monthly_pl = data["monthly_pl"]
+    tabung_balance_end = data["tabung_balance_end"]
+    total_balance_end = data["total_balance_end"]
+    current_balance_now = data["current_balance_now"]
+    ending_balance = data["ending_balance"]
+
+    cmds: list[str] = []
+    cmds.append(_pdf_rect(35, 770, 525, 48, fill_rgb=(0.09, 0.20, 0.42)))
+    cmds.append(_pdf_text(50, 798, "MM HELPER - MONTHLY REPORT", size=15, bold=True, rgb=(1, 1, 1)))
+    cmds.append(_pdf_text(50, 782, f"User: {summary['name']}  |  Report Date: {today.isoformat()}", size=9, rgb=(0.90, 0.95, 1.0)))
+
+    cmds.append(_pdf_rect(35, 730, 525, 28, fill_rgb=(0.95, 0.97, 1.0), stroke_rgb=(0.80, 0.85, 0.93), line_w=0.8))
+    cmds.append(_pdf_text(48, 746, f"Report Period: {month_start.isoformat()} to {month_end.isoformat()}", size=9, bold=True, rgb=(0.16, 0.22, 0.33)))
+    cmds.append(_pdf_text(320, 746, "Weekly split: Sunday-Saturday (month-clipped)", size=8, rgb=(0.32, 0.38, 0.48)))
+
+    cmds.append(_pdf_rect(35, 676, 525, 48, fill_rgb=(1, 1, 1), stroke_rgb=(0.82, 0.85, 0.90), line_w=0.8))
+    cmds.append(_pdf_text(48, 700, "Opening Balance", size=11, bold=True, rgb=(0.10, 0.20, 0.35)))
+    cmds.append(_pdf_text(48, 686, opening_balance_label, size=8, rgb=(0.28, 0.34, 0.44)))
+    cmds.append(_pdf_text(340, 692, f"USD {opening_balance:.2f}", size=12, bold=True, rgb=(0.08, 0.17, 0.30)))
+
+    cmds.append(_pdf_rect(35, 500, 525, 166, fill_rgb=(1, 1, 1), stroke_rgb=(0.82, 0.85, 0.90), line_w=0.8))
+    cmds.append(_pdf_text(48, 650, "Grow Target Weekly Breakdown", size=11, bold=True, rgb=(0.10, 0.20, 0.35)))
+    col_x = [48, 215, 315, 395, 485]
+    col_titles = ["Week", "Daily Target", "Trading P/L", "Tabung", "Reached"]
+    cmds.append(_pdf_rect(45, 630, 505, 18, fill_rgb=(0.92, 0.95, 0.99), stroke_rgb=(0.84, 0.88, 0.93), line_w=0.5))
+    for title, x in zip(col_titles, col_x):
+        cmds.append(_pdf_text(x, 636, title, size=8, bold=True, rgb=(0.13, 0.22, 0.35)))
+
+    y = 610
+    for week_label, target_label, pl_label, tabung_label, reached_label in weekly_rows[:5]:
+        cmds.append(_pdf_rect(45, y - 3, 505, 20, fill_rgb=(0.985, 0.988, 0.995), stroke_rgb=(0.90, 0.92, 0.95), line_w=0.3))
+        pl_val = float(pl_label.replace("USD", "").strip())
+        tabung_val = float(tabung_label.replace("USD", "").strip())
+        pl_color = (0.65, 0.10, 0.10) if pl_val < 0 else (0.08, 0.25, 0.10)
+        tabung_color = (0.08, 0.25, 0.10) if tabung_val > 0 else (0.18, 0.25, 0.36)
+        cmds.append(_pdf_text(col_x[0], y + 2, week_label, size=8, rgb=(0.18, 0.25, 0.36)))
+        cmds.append(_pdf_text(col_x[1], y + 2, target_label, size=8, rgb=(0.18, 0.25, 0.36)))
+        cmds.append(_pdf_text(col_x[2], y + 2, pl_label, size=8, bold=True, rgb=pl_color))
+        cmds.append(_pdf_text(col_x[3], y + 2, tabung_label, size=8, bold=True, rgb=tabung_color))
+        cmds.append(_pdf_text(col_x[4], y + 2, reached_label, size=8, bold=True, rgb=(0.18, 0.25, 0.36)))
+        y -= 25
+
+    cmds.append(_pdf_rect(35, 368, 525, 122, fill_rgb=(1, 1, 1), stroke_rgb=(0.82, 0.85, 0.90), line_w=0.8))
+    cmds.append(_pdf_text(48, 474, "Monthly Transaction Totals by Category", size=11, bold=True, rgb=(0.10, 0.20, 0.35)))
+    tx_headers = [("Category", 52), ("Count", 310), ("Total (USD)", 420)]
+    cmds.append(_pdf_rect(45, 454, 505, 16, fill_rgb=(0.92, 0.95, 0.99), stroke_rgb=(0.84, 0.88, 0.93), line_w=0.5))
+    for txt, x in tx_headers:
+        cmds.append(_pdf_text(x, 459, txt, size=8, bold=True, rgb=(0.13, 0.22, 0.35)))
+    tx_rows = [
+        ("Deposit", section_count["deposit"], section_total["deposit"]),
+        ("Withdrawal", section_count["withdrawal"], section_total["withdrawal"]),
+        ("Trading (Net)", section_count["trading"], section_total["trading"]),
+        ("Balance Adjustment", section_count["adjustment"], section_total["adjustment"]),
+        ("Tabung", section_count["tabung"], section_total["tabung"]),
+    ]
+    y = 438
+    for cat, cnt, amt in tx_rows:
+        cmds.append(_pdf_rect(45, y - 2, 505, 13, fill_rgb=(0.985, 0.988, 0.995), stroke_rgb=(0.90, 0.92, 0.95), line_w=0.3))
+        cmds.append(_pdf_text(52, y + 2, cat, size=8, rgb=(0.18, 0.25, 0.36)))
+        cmds.append(_pdf_text(315, y + 2, str(cnt), size=8, bold=True, rgb=(0.18, 0.25, 0.36)))
+        amt_color = (0.65, 0.10, 0.10) if amt < 0 else (0.08, 0.25, 0.10)
+        cmds.append(_pdf_text(420, y + 2, f"{amt:.2f}", size=8, bold=True, rgb=amt_color))
+        y -= 14
+
+    cmds.append(_pdf_rect(35, 212, 525, 146, fill_rgb=(1, 1, 1), stroke_rgb=(0.82, 0.85, 0.90), line_w=0.8))
+    cmds.append(_pdf_text(48, 342, "Grow Target Summary (Month End)", size=10, bold=True, rgb=(0.10, 0.20, 0.35)))
+    summary_rows: list[tuple[str, str, tuple[float, float, float]]] = []
+    if grow_target_total <= 0:
+        summary_rows.append(("Goal Status", "New goal is not set yet", (0.62, 0.18, 0.10)))
+    else:
+        summary_rows.extend(
+            [
+                ("Selected Goal Duration", f"{target_days} days", (0.18, 0.25, 0.36)),
+                ("Days Left (Month End)", f"{days_left_month_end} hari", (0.18, 0.25, 0.36)),
+                ("Grow Target Total", f"USD {grow_target_total:.2f}", (0.18, 0.25, 0.36)),
+                ("Achieved by Month End", f"USD {grow_target_achieved_end:.2f}", (0.08, 0.40, 0.18)),
+                ("Remaining at Month End", f"USD {grow_target_remaining_end:.2f}", (0.62, 0.18, 0.10) if grow_target_remaining_end > 0 else (0.08, 0.40, 0.18)),
+                ("Progress at Month End", f"{achieved_pct_end:.2f}%", (0.08, 0.40, 0.18)),
+            ]
+        )
+    y = 322
+    for metric, value, color in summary_rows[:6]:
+        cmds.append(_pdf_rect(45, y - 2, 505, 16, fill_rgb=(0.985, 0.988, 0.995), stroke_rgb=(0.90, 0.92, 0.95), line_w=0.3))
+        cmds.append(_pdf_text(52, y + 2, metric, size=9, rgb=(0.18, 0.25, 0.36)))
+        cmds.append(_pdf_text(340, y + 2, value, size=9, bold=True, rgb=color))
+        y -= 18
+
+    pnl_color = (0.65, 0.10, 0.10) if monthly_pl < 0 else (0.08, 0.25, 0.10)
+    cmds.append(_pdf_rect(35, 70, 525, 128, fill_rgb=(0.96, 0.98, 1.0), stroke_rgb=(0.78, 0.84, 0.92), line_w=0.8))
+    cmds.append(_pdf_text(48, 178, "Ending Balance", size=11, bold=True, rgb=(0.10, 0.20, 0.35)))
+    cmds.append(_pdf_text(52, 160, f"Monthly P/L: USD {monthly_pl:.2f}", size=9, bold=True, rgb=pnl_color))
+    cmds.append(_pdf_text(52, 142, f"Tabung Balance at Month End: USD {tabung_balance_end:.2f}", size=9, bold=True, rgb=(0.08, 0.17, 0.30)))
+    cmds.append(_pdf_text(52, 124, f"Capital at Month End: USD {total_balance_end:.2f}", size=9, bold=True, rgb=(0.08, 0.17, 0.30)))
+    cmds.append(_pdf_text(52, 106, f"Current Balance (Now): USD {current_balance_now:.2f}", size=9, rgb=(0.32, 0.38, 0.48)))
+    cmds.append(_pdf_text(340, 142, "Ending Balance (Month End)", size=9, bold=True, rgb=(0.08, 0.17, 0.30)))
+    cmds.append(_pdf_text(340, 124, f"USD {ending_balance:.2f}", size=12, bold=True, rgb=(0.08, 0.17, 0.30)))
+
+    cmds.append(_pdf_text(48, 58, "Note: Summary generated from saved records for the selected period.", size=8, rgb=(0.34, 0.38, 0.45)))
+
+    return _build_styled_pdf(cmds), report_pdf_filename(data)
+
+
+def report_pdf_filename(data: dict[str, Any]) -> str:
+    if data["kind"] == "monthly":
+        return f"monthly-report-{data['period_start'].strftime('%Y-%m')}.pdf"
+    return f"weekly-report-{data['today'].isoformat()}.pdf"
+
+
+def render_report_pdf(data: dict[str, Any]) -> tuple[bytes, str]:
+    if data["kind"] == "monthly":
+        return render_monthly_report_pdf(data)
+    return render_weekly_report_pdf(data)
@@ -0,0 +1,613 @@
+"""Weekly/monthly report datasets for MM HELPER.
+
+Each dataset is computed in one streaming pass over the user's history for the
+closed period and cached by (kind, user, period, report date) together with
+the user's data version. Datasets are plain dicts of dates, numbers and
+strings; report_pdf renders them in a small process pool so a big report
+never blocks the bot's event loop. Rendered PDFs are stored in a cache
+directory under the hash of their dataset, and the nightly batch fills it for
+every user whose period just closed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from report_pdf import render_report_pdf, report_pdf_filename
+from storage import (
+    current_user_date,
+    get_current_balance_as_of,
+    get_current_balance_usd,
+    get_initial_setup_summary,
+    get_project_grow_goal_summary,
+    get_tabung_balance_as_of,
+    get_tabung_progress_summary,
+    get_user_report_version,
+    get_user_sections,
+    get_weekly_frozen_daily_target_usd,
+    iter_transaction_history_with_records,
+    list_active_user_ids,
+)
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_MAX_ENTRIES = 1024
+PRECOMPUTE_PAGE_SIZE = 200
+DEFAULT_REPORT_PDF_CACHE_DIR = Path(__file__).with_name("db") / "report_cache"
+REPORT_PDF_CACHE_TTL_DAYS = 45
+# Bump when report_pdf output changes so older cached files are not served.
+REPORT_PDF_LAYOUT_VERSION = 1
+DEFAULT_REPORT_RENDER_WORKERS = 2
+
+_REPORT_SOURCE_MAP = {
+    "deposit_activity": "deposit",
+    "withdrawal_activity": "withdrawal",
+    "trading_activity": "trading",
+    "balance_adjustment": "adjustment",
+    "tabung": "tabung",
+    "deposit": "deposit",
+    "withdrawal": "withdrawal",
+    "trading": "trading",
+    "adjustment": "adjustment",
+}
+
+_CACHE_LOCK = threading.Lock()
+_report_cache: OrderedDict[tuple[Any, ...], tuple[tuple[int, int], dict[str, Any]]] = OrderedDict()
+
+
+def trading_days_for_target_days(target_days: int) -> int:
+    mapping = {30: 22, 90: 66, 180: 132}
+    if target_days in mapping:
+        return mapping[target_days]
+    return max(1, round(float(target_days) * (22.0 / 30.0))) if target_days > 0 else 22
+
+
+def bounded_report_week(reference_date: date) -> tuple[date, date]:
+    """Week window clipped to current month boundaries."""
+    sunday_offset = (reference_date.weekday() + 1) % 7
+    week_start = reference_date - timedelta(days=sunday_offset)
+    week_end = week_start + timedelta(days=6)
+
+    month_start = reference_date.replace(day=1)
+    next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    month_end = next_month - timedelta(days=1)
+
+    if week_start < month_start:
+        week_start = month_start
+    if week_end > month_end:
+        week_end = month_end
+    return week_start, week_end
+
+
+def previous_closed_report_period(reference_date: date) -> tuple[date, date]:
+    """Return immediately previous closed report period (month-clipped week)."""
+    current_start, _ = bounded_report_week(reference_date)
+    prev_ref = current_start - timedelta(days=1)
+    return bounded_report_week(prev_ref)
+
+
+def month_range(reference_date: date) -> tuple[date, date]:
+    month_start = reference_date.replace(day=1)
+    next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return month_start, next_month - timedelta(days=1)
+
+
+def previous_closed_month_period(reference_date: date) -> tuple[date, date]:
+    current_month_start, _ = month_range(reference_date)
+    prev_month_end = current_month_start - timedelta(days=1)
+    prev_month_start = prev_month_end.replace(day=1)
+    return prev_month_start, prev_month_end
+
+
+def bounded_weeks_for_month(month_start: date, month_end: date) -> list[tuple[date, date]]:
+    weeks: list[tuple[date, date]] = []
+    cursor = month_start
+    while cursor <= month_end:
+        week_start, week_end = bounded_report_week(cursor)
+        if week_start < month_start:
+            week_start = month_start
+        if week_end > month_end:
+            week_end = month_end
+        weeks.append((week_start, week_end))
+        cursor = week_end + timedelta(days=1)
+    return weeks
+
+
+def _parse_iso_date(raw: Any) -> date | None:
+    try:
+        return date.fromisoformat(str(raw or "").strip())
+    except ValueError:
+        return None
+
+
+def _goal_start_date(sections: dict[str, Any]) -> date | None:
+    goal_section = sections.get("project_grow_goal", {}) if isinstance(sections, dict) else {}
+    goal_saved_date_raw = str(goal_section.get("saved_date") or "").strip() if isinstance(goal_section, dict) else ""
+    return _parse_iso_date(goal_saved_date_raw) if goal_saved_date_raw else None
+
+
+def _scan_period(user_id: int, start_date: date, end_date: date) -> dict[str, Any]:
+    """Category totals, daily trading P/L and daily tabung saves in one pass."""
+    section_total = {
+        "deposit": 0.0,
+        "withdrawal": 0.0,
+        "trading": 0.0,
+        "adjustment": 0.0,
+        "tabung": 0.0,
+    }
+    section_count = {key: 0 for key in section_total}
+    daily_trading_pl: dict[str, float] = {}
+    daily_tabung_save: dict[str, float] = {}
+
+    for row, record in iter_transaction_history_with_records(
+        user_id,
+        start_date,
+        end_date,
+        include_hidden_adjustments=False,
+    ):
+        row_date_raw = str(row.get("date") or "").strip()
+        row_date = _parse_iso_date(row_date_raw)
+        if row_date is None or row_date < start_date or row_date > end_date:
+            continue
+        src = str(row.get("source") or "").strip().lower()
+        src_norm = _REPORT_SOURCE_MAP.get(src, src)
+        amount = float(row.get("amount_usd") or 0.0)
+        if src_norm in section_total:
+            section_total[src_norm] += amount
+            section_count[src_norm] += 1
+        if src_norm == "trading":
+            daily_trading_pl[row_date_raw] = daily_trading_pl.get(row_date_raw, 0.0) + amount
+
+        if src != "tabung" or str(record.get("mode") or "").strip().lower() != "save":
+            continue
+        # Tabung saves count on their own saved_date and at full precision.
+        rec_date = str(record.get("saved_date") or "").strip()
+        save_date = _parse_iso_date(rec_date)
+        if save_date is not None and start_date <= save_date <= end_date:
+            amt = abs(float(record.get("amount_usd") or 0.0))
+            daily_tabung_save[rec_date] = daily_tabung_save.get(rec_date, 0.0) + amt
+
+    return {
+        "section_total": section_total,
+        "section_count": section_count,
+        "daily_trading_pl": daily_trading_pl,
+        "daily_tabung_save": daily_tabung_save,
+    }
+
+
+def build_weekly_report_data(user_id: int) -> dict[str, Any]:
+    summary = get_initial_setup_summary(user_id)
+    progress = get_tabung_progress_summary(user_id)
+    goal = get_project_grow_goal_summary(user_id)
+    today = current_user_date(user_id)
+    week_start, week_end = previous_closed_report_period(today)
+    sections = get_user_sections(user_id)
+
+    target_days = int(goal.get("target_days") or 0)
+    grow_target_remaining = float(progress.get("grow_target_usd") or 0.0)
+    daily_target_usd = float(get_weekly_frozen_daily_target_usd(user_id, week_start))
+    target_balance = float(goal.get("target_balance_usd") or 0.0)
+    goal_baseline_balance = float(goal.get("current_balance_usd") or 0.0)
+    grow_target_total = max(target_balance - goal_baseline_balance, 0.0)
+    remain_pct = (grow_target_remaining / grow_target_total * 100.0) if grow_target_total > 0 else 0.0
+    goal_start_date = _goal_start_date(sections)
+    if goal_start_date is not None and week_start <= goal_start_date <= week_end:
+        daily_target_usd = float(get_weekly_frozen_daily_target_usd(user_id, goal_start_date))
+
+    setup_date = _parse_iso_date(summary.get("saved_date"))
+    is_first_month = bool(setup_date and setup_date > (week_start - timedelta(days=1)))
+    if is_first_month:
+        starting_balance = float(summary["initial_capital_usd"])
+        starting_balance_label = "Opening Balance This Month (Initial Balance)"
+    else:
+        starting_balance = float(get_current_balance_as_of(user_id, week_start - timedelta(days=1)))
+        starting_balance_label = "Opening Balance (Carry Forward)"
+
+    scan = _scan_period(user_id, week_start, week_end)
+    daily_trading_pl = scan["daily_trading_pl"]
+    daily_tabung_save = scan["daily_tabung_save"]
+    weekly_pl = sum(daily_trading_pl.values())
+
+    day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    daily_rows: list[tuple[str, str, str, str, str]] = []
+    reached_count = 0
+    cursor = week_start
+    while cursor <= week_end:
+        d_iso = cursor.isoformat()
+        d_name = day_names[cursor.weekday()]
+        pl = float(daily_trading_pl.get(d_iso, 0.0))
+        tabung_saved = float(daily_tabung_save.get(d_iso, 0.0))
+        if goal_start_date is not None and cursor < goal_start_date:
+            status = "No Target"
+            target_text = "-"
+        elif cursor.weekday() >= 5:
+            status = "No Trade Day"
+            target_text = "-"
+        elif daily_target_usd <= 0:
+            status = "No Target"
+            target_text = f"USD {daily_target_usd:.2f}"
+        else:
+            hit = pl > 0 and tabung_saved >= daily_target_usd
+            status = "Reached" if hit else "Not Reached"
+            target_text = f"USD {daily_target_usd:.2f}"
+            if hit:
+                reached_count += 1
+        daily_rows.append((f"{d_name} {d_iso}", target_text, f"USD {pl:.2f}", f"USD {tabung_saved:.2f}", status))
+        cursor += timedelta(days=1)
+
+    remaining_trading_days_now = 0
+    recalculated_daily_target_now = 0.0
+    if grow_target_remaining > 0 and goal_start_date is not None and target_days > 0:
+        goal_deadline = goal_start_date + timedelta(days=target_days)
+        remaining_calendar_days_now = max((goal_deadline - today).days, 0)
+        remaining_trading_days_now = trading_days_for_target_days(remaining_calendar_days_now)
+        if remaining_trading_days_now > 0:
+            recalculated_daily_target_now = grow_target_remaining / float(remaining_trading_days_now)
+
+    ending_balance = float(get_current_balance_as_of(user_id, week_end))
+    tabung_balance = float(get_tabung_balance_as_of(user_id, week_end))
+    return {
+        "kind": "weekly",
+        "name": summary["name"],
+        "today": today,
+        "period_start": week_start,
+        "period_end": week_end,
+        "starting_balance": starting_balance,
+        "starting_balance_label": starting_balance_label,
+        "daily_target_usd": daily_target_usd,
+        "reached_count": reached_count,
+        "daily_rows": daily_rows,
+        "section_total": scan["section_total"],
+        "section_count": scan["section_count"],
+        "grow_target_total": grow_target_total,
+        "selected_target_days": max(target_days, 0),
+        "grow_target_remaining": grow_target_remaining,
+        "remain_pct": remain_pct,
+        "remaining_trading_days_now": remaining_trading_days_now,
+        "recalculated_daily_target_now": recalculated_daily_target_now,
+        "weekly_pl": weekly_pl,
+        "ending_balance": ending_balance,
+        "tabung_balance": tabung_balance,
+        "total_balance": ending_balance + tabung_balance,
+    }
+
+
+def build_monthly_report_data(user_id: int) -> dict[str, Any]:
+    summary = get_initial_setup_summary(user_id)
+    current_balance_now = get_current_balance_usd(user_id)
+    today = current_user_date(user_id)
+    month_start, month_end = previous_closed_month_period(today)
+    sections = get_user_sections(user_id)
+
+    goal = get_project_grow_goal_summary(user_id)
+    target_days = int(goal.get("target_days") or 0)
+    target_balance = float(goal.get("target_balance_usd") or 0.0)
+    goal_baseline_balance = float(goal.get("current_balance_usd") or 0.0)
+    grow_target_total = max(target_balance - goal_baseline_balance, 0.0)
+    tabung_balance_end = float(get_tabung_balance_as_of(user_id, month_end))
+    grow_target_remaining_end = max(grow_target_total - tabung_balance_end, 0.0)
+    grow_target_achieved_end = max(min(grow_target_total - grow_target_remaining_end, grow_target_total), 0.0)
+    achieved_pct_end = (grow_target_achieved_end / grow_target_total * 100.0) if grow_target_total > 0 else 0.0
+
+    goal_start_date = _goal_start_date(sections)
+    days_left_month_end = 0
+    if goal_start_date is not None and target_days > 0:
+        elapsed_days_month_end = max((month_end - goal_start_date).days, 0)
+        days_left_month_end = max(target_days - elapsed_days_month_end, 0)
+
+    setup_date = _parse_iso_date(summary.get("saved_date"))
+    is_first_month = bool(setup_date and month_start <= setup_date <= month_end)
+    if is_first_month:
+        opening_balance = float(summary["initial_capital_usd"])
+        opening_balance_label = "Opening Balance This Month (Initial Balance)"
+    else:
+        opening_balance = float(get_current_balance_as_of(user_id, month_start - timedelta(days=1)))
+        opening_balance_label = "Opening Balance (Carry Forward)"
+
+    scan = _scan_period(user_id, month_start, month_end)
+    daily_trading_pl = scan["daily_trading_pl"]
+    daily_tabung_save = scan["daily_tabung_save"]
+    monthly_pl = sum(daily_trading_pl.values())
+
+    weekly_rows: list[tuple[str, str, str, str, str]] = []
+    for wk_start, wk_end in bounded_weeks_for_month(month_start, month_end):
+        week_label = f"{wk_start.isoformat()} to {wk_end.isoformat()}"
+        week_target = float(get_weekly_frozen_daily_target_usd(user_id, wk_start))
+        week_pl = 0.0
+        week_tabung = 0.0
+        reached_days = 0
+        trading_days = 0
+        cursor = wk_start
+        while cursor <= wk_end:
+            d_iso = cursor.isoformat()
+            if cursor.weekday() < 5:
+                trading_days += 1
+            day_pl = float(daily_trading_pl.get(d_iso, 0.0))
+            day_tabung = float(daily_tabung_save.get(d_iso, 0.0))
+            week_pl += day_pl
+            week_tabung += day_tabung
+
+            if goal_start_date is not None and cursor < goal_start_date:
+                cursor += timedelta(days=1)
+                continue
+            if cursor.weekday() >= 5:
+                cursor += timedelta(days=1)
+                continue
+            if week_target > 0 and day_pl > 0 and day_tabung >= week_target:
+                reached_days += 1
+            cursor += timedelta(days=1)
+
+        if goal_start_date is not None and wk_end < goal_start_date:
+            target_label = "No Target"
+            hit_label = "-"
+        elif week_target <= 0:
+            target_label = "No Target"
+            hit_label = "-"
+        else:
+            target_label = f"USD {week_target:.2f}"
+            hit_label = f"{reached_days}/{trading_days}"
+        weekly_rows.append(
+            (
+                week_label,
+                target_label,
+                f"USD {week_pl:.2f}",
+                f"USD {week_tabung:.2f}",
+                hit_label,
+            )
+        )
+
+    ending_balance = float(get_current_balance_as_of(user_id, month_end))
+    return {
+        "kind": "monthly",
+        "name": summary["name"],
+        "today": today,
+        "period_start": month_start,
+        "period_end": month_end,
+        "opening_balance": opening_balance,
+        "opening_balance_label": opening_balance_label,
+        "weekly_rows": weekly_rows,
+        "section_total": scan["section_total"],
+        "section_count": scan["section_count"],
+        "grow_target_total": grow_target_total,
+        "target_days": target_days,
+        "days_left_month_end": days_left_month_end,
+        "grow_target_achieved_end": grow_target_achieved_end,
+        "grow_target_remaining_end": grow_target_remaining_end,
+        "achieved_pct_end": achieved_pct_end,
+        "monthly_pl": monthly_pl,
+        "tabung_balance_end": tabung_balance_end,
+        "total_balance_end": ending_balance + tabung_balance_end,
+        "current_balance_now": current_balance_now,
+        "ending_balance": ending_balance,
+    }
+
+
+_BUILDERS: dict[str, tuple[Callable[[date], tuple[date, date]], Callable[[int], dict[str, Any]]]] = {
+    "weekly": (previous_closed_report_period, build_weekly_report_data),
+    "monthly": (previous_closed_month_period, build_monthly_report_data),
+}
+
+
+def get_report_data(kind: str, user_id: int) -> dict[str, Any]:
+    """Cached dataset for the user's last closed period; treat it as read-only."""
+    period_for, build = _BUILDERS[kind]
+    today = current_user_date(user_id)
+    key = (kind, int(user_id), period_for(today)[0], today)
+    version = get_user_report_version(user_id)
+    if version is not None:
+        with _CACHE_LOCK:
+            cached = _report_cache.get(key)
+            if cached is not None and cached[0] == version:
+                _report_cache.move_to_end(key)
+                return cached[1]
+
+    data = build(user_id)
+    # Only cache when nothing wrote the user meanwhile: a concurrent write may
+    # or may not be in ``data``. Building itself may freeze a weekly daily
+    # target; that first result is not cached and the next call caches.
+    if version is not None and get_user_report_version(user_id) == version:
+        with _CACHE_LOCK:
+            _report_cache[key] = (version, data)
+            _report_cache.move_to_end(key)
+            while len(_report_cache) > REPORT_CACHE_MAX_ENTRIES:
+                _report_cache.popitem(last=False)
+    return data
+
+
+def get_weekly_report_data(user_id: int) -> dict[str, Any]:
+    return get_report_data("weekly", user_id)
+
+
+def get_monthly_report_data(user_id: int) -> dict[str, Any]:
+    return get_report_data("monthly", user_id)
+
+
+def is_report_available(user_id: int, period_end: date) -> bool:
+    # Reports only cover periods that closed after the user finished setup.
+    setup_date = _parse_iso_date(get_initial_setup_summary(user_id).get("saved_date"))
+    return not (setup_date is not None and setup_date > period_end)
+
+
+def precompute_closed_period_reports(*, only_new_periods: bool = True, render_pdfs: bool = True) -> dict[str, int]:
+    """Warm the caches for every active user whose report period just closed.
+
+    With ``only_new_periods`` a weekly dataset is built on the first day of a
+    report week and a monthly one on the 1st; otherwise both are built for all.
+    With ``render_pdfs`` the PDFs are then rendered across all cores.
+    """
+    counts = {"users": 0, "weekly": 0, "monthly": 0, "failed": 0, "rendered": 0}
+    datasets: list[dict[str, Any]] = []
+    after_user_id: int | None = None
+    while True:
+        user_ids = list_active_user_ids(after_user_id=after_user_id, limit=PRECOMPUTE_PAGE_SIZE)
+        if not user_ids:
+            break
+        for user_id in user_ids:
+            counts["users"] += 1
+            today = current_user_date(user_id)
+            for kind, (period_for, _) in _BUILDERS.items():
+                if only_new_periods:
+                    new_period = bounded_report_week(today)[0] == today if kind == "weekly" else today.day == 1
+                    if not new_period:
+                        continue
+                if not is_report_available(user_id, period_for(today)[1]):
+                    continue
+                try:
+                    datasets.append(get_report_data(kind, user_id))
+                    counts[kind] += 1
+                except Exception:
+                    counts["failed"] += 1
+                    logger.exception("Report precompute failed for user %s (%s)", user_id, kind)
+        after_user_id = user_ids[-1]
+
+    if render_pdfs and datasets:
+        purge_cached_report_pdfs()
+        counts["rendered"] = render_report_pdfs_batch(datasets)
+    return counts
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = (os.getenv(name) or "").strip()
+    try:
+        value = int(raw) if raw else default
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def _report_pdf_cache_dir() -> Path:
+    raw = (os.getenv("MMHELPER_REPORT_CACHE_DIR") or "").strip()
+    return Path(raw).expanduser() if raw else DEFAULT_REPORT_PDF_CACHE_DIR
+
+
+def report_pdf_digest(data: dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"layout": REPORT_PDF_LAYOUT_VERSION, "data": data},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cached_pdf_path(digest: str) -> Path:
+    return _report_pdf_cache_dir() / digest[:2] / f"{digest}.pdf"
+
+
+def _read_cached_pdf(digest: str) -> bytes | None:
+    try:
+        return _cached_pdf_path(digest).read_bytes()
+    except OSError:
+        return None
+
+
+def _write_cached_pdf(digest: str, pdf_bytes: bytes) -> None:
+    path = _cached_pdf_path(digest)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(pdf_bytes)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is an optimisation; a failed write just means a re-render.
+        logger.warning("Could not cache report PDF %s", path)
+
+
+def purge_cached_report_pdfs(max_age_days: int = REPORT_PDF_CACHE_TTL_DAYS) -> int:
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for path in _report_pdf_cache_dir().glob("*/*.pdf"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+_EXECUTOR_LOCK = threading.Lock()
+_render_executor: ProcessPoolExecutor | None = None
+
+
+def _new_render_pool(max_workers: int) -> ProcessPoolExecutor:
+    # Spawned workers only import report_pdf; forking would copy the bot's
+    # threads, event loop and open SQLite handles.
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _get_render_executor() -> ProcessPoolExecutor:
+    global _render_executor
+    with _EXECUTOR_LOCK:
+        if _render_executor is None:
+            _render_executor = _new_render_pool(_env_int("MMHELPER_REPORT_RENDER_WORKERS", DEFAULT_REPORT_RENDER_WORKERS))
+        return _render_executor
+
+
+def _discard_render_executor(executor: ProcessPoolExecutor) -> None:
+    global _render_executor
+    with _EXECUTOR_LOCK:
+        if _render_executor is executor:
+            _render_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_report_pdf(kind: str, user_id: int) -> tuple[bytes, str]:
+    """Synchronous path: cached PDF if present, else render in this process."""
+    data = get_report_data(kind, user_id)
+    digest = report_pdf_digest(data)
+    pdf_bytes = _read_cached_pdf(digest)
+    if pdf_bytes is None:
+        pdf_bytes, _ = render_report_pdf(data)
+        _write_cached_pdf(digest, pdf_bytes)
+    return pdf_bytes, report_pdf_filename(data)
+
+
+async def build_report_pdf_async(kind: str, user_id: int) -> tuple[bytes, str]:
+    """Handler path: data in a thread, rendering in the process pool."""
+    data = await asyncio.to_thread(get_report_data, kind, user_id)
+    digest = report_pdf_digest(data)
+    pdf_bytes = await asyncio.to_thread(_read_cached_pdf, digest)
+    if pdf_bytes is None:
+        executor = _get_render_executor()
+        try:
+            pdf_bytes, _ = await asyncio.get_running_loop().run_in_executor(executor, render_report_pdf, data)
+        except BrokenProcessPool:
+            logger.warning("Report render pool broke; rendering in a thread")
+            _discard_render_executor(executor)
+            pdf_bytes, _ = await asyncio.to_thread(render_report_pdf, data)
+        await asyncio.to_thread(_write_cached_pdf, digest, pdf_bytes)
+    return pdf_bytes, report_pdf_filename(data)
+
+
+def render_report_pdfs_batch(datasets: list[dict[str, Any]], *, workers: int | None = None) -> int:
+    """Render datasets missing from the PDF cache across CPU cores; returns how many were rendered."""
+    pending: dict[str, dict[str, Any]] = {}
+    for data in datasets:
+        digest = report_pdf_digest(data)
+        if digest not in pending and not _cached_pdf_path(digest).exists():
+            pending[digest] = data
+    if not pending:
+        return 0
+
+    max_workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+    digests = list(pending)
+    with _new_render_pool(max_workers) as pool:
+        chunk = max(1, len(digests) // (max_workers * 4))
+        for digest, (pdf_bytes, _) in zip(digests, pool.map(render_report_pdf, [pending[d] for d in digests], chunksize=chunk)):
+            _write_cached_pdf(digest, pdf_bytes)
+    return len(digests)
+
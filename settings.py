@@ -5,6 +5,7 @@ from __future__ import annotations
 import json
 import os
 import time
+from datetime import date
 from urllib.parse import urlencode
 
 from storage import has_fibo_next_profile_access, load_fibo_extension_profiles
@@ -569,21 +570,51 @@ def get_date_override_webapp_url(
     return f"{page}?{query}"
 
 
+# Index order must match SOURCES in miniapp/transaction-history.js.
+TX_HISTORY_COMPACT_SOURCES = ("deposit_activity", "withdrawal_activity", "trading_activity", "balance_adjustment", "tabung")
+
+
+def encode_transaction_history_compact(records: list[dict[str, object]], reference_date: str) -> str:
+    """Rows as [days_before_reference, "HH:MM", source_index, mode, amount]."""
+    try:
+        ref = date.fromisoformat(reference_date)
+    except ValueError:
+        ref = None
+    rows: list[list[object]] = []
+    for record in records:
+        try:
+            day_offset = (ref - date.fromisoformat(str(record.get("date") or ""))).days if ref else 0
+        except ValueError:
+            day_offset = 0
+        source = str(record.get("source") or "")
+        source_index = TX_HISTORY_COMPACT_SOURCES.index(source) if source in TX_HISTORY_COMPACT_SOURCES else -1
+        amount = round(float(record.get("amount_usd") or 0.0), 2)
+        rows.append(
+            [
+                day_offset,
+                str(record.get("time") or ""),
+                source_index,
+                str(record.get("mode") or ""),
+                int(amount) if amount.is_integer() else amount,
+            ]
+        )
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+
+
 def get_transaction_history_webapp_url(
     name: str,
     saved_date: str,
     reference_date: str,
-    records_7d: list[dict[str, object]],
-    records_30d: list[dict[str, object]],
+    records: list[dict[str, object]],
 ) -> str:
+    # One newest-first 30-day list; the page derives the 7-day tab from it.
     page = f"{_miniapp_base_url()}/transaction-history.html"
     query = urlencode(
         {
             "name": name,
             "saved_date": saved_date,
             "reference_date": reference_date,
-            "records_7d": json.dumps(records_7d, separators=(",", ":")),
-            "records_30d": json.dumps(records_30d, separators=(",", ":")),
+            "tx": encode_transaction_history_compact(records, reference_date),
         }
     )
     return f"{page}?{query}"
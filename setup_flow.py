@@ -18,6 +18,7 @@ from handlers import (
     _build_project_grow_keyboard_for_user,
     _build_records_reports_keyboard_for_user,
 )
+from notification_engine import schedule_notification_engine
 from storage import (
     add_deposit_activity,
     add_trading_activity_update,
@@ -960,6 +961,7 @@ async def _handle_notification_settings_save(payload: dict, update: Update, cont
         )
         return
 
+    schedule_notification_engine(context.job_queue)
     await send_screen(
         context,
         message.chat_id,
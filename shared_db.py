@@ -0,0 +1,141 @@
+"""Pooled SQLite connections shared by the MM HELPER bots.
+
+Each thread keeps one open connection per database file instead of calling
+``sqlite3.connect`` for every read. Connections are opened in WAL mode with
+``synchronous=NORMAL`` and a busy timeout, so the main bot, sidebot and live
+bot can read while another process writes. Use them exactly like before:
+``with connect(path) as conn:`` commits or rolls back, it does not close.
+"""
+
+from __future__ import annotations
+
+import functools
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+_SCHEMA_LOCK = threading.RLock()
+_schema_ready: set[tuple[str, str]] = set()
+
+
+class SharedConnection(sqlite3.Connection):
+    db_key = ""
+
+
+def _thread_pool() -> dict[str, SharedConnection]:
+    pool = getattr(_local, "connections", None)
+    if pool is None:
+        pool = {}
+        _local.connections = pool
+    return pool
+
+
+def _db_key(db_path: str | Path) -> str:
+    return str(Path(db_path).expanduser().absolute())
+
+
+def _open(db_path: Path, key: str, wal: bool) -> SharedConnection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        db_path,
+        timeout=DEFAULT_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=SharedConnection,
+    )
+    conn.db_key = key
+    conn.execute(f"PRAGMA busy_timeout = {DEFAULT_BUSY_TIMEOUT_MS}")
+    if wal:
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.Error:
+            # Some filesystems cannot host a WAL file; keep the rollback journal.
+            pass
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def connect(db_path: str | Path, *, row_factory: Any = sqlite3.Row, wal: bool = True) -> SharedConnection:
+    """Return this thread's pooled connection for ``db_path``."""
+    path = Path(db_path).expanduser()
+    key = _db_key(path)
+    pool = _thread_pool()
+    conn = pool.get(key)
+    if conn is None:
+        conn = _open(path, key, wal)
+        pool[key] = conn
+    conn.row_factory = row_factory
+    return conn
+
+
+def ensure_schema(conn: sqlite3.Connection, name: str, create: Callable[[sqlite3.Connection], None]) -> None:
+    """Run ``create(conn)`` once per process for each database and schema name.
+
+    ``create`` runs in its own ``BEGIN IMMEDIATE`` transaction, so concurrent
+    processes migrate one at a time, and the name only counts as done once
+    that transaction committed. Inside a transaction the caller already
+    opened, ``create`` joins it and is re-run on the next call.
+    """
+    key = (getattr(conn, "db_key", ""), name)
+    if not key[0]:
+        create(conn)
+        return
+    if key in _schema_ready:
+        return
+    with _SCHEMA_LOCK:
+        if key in _schema_ready:
+            return
+        pending = getattr(_local, "schema_pending", None)
+        if conn.in_transaction:
+            create(conn)
+            if pending is not None:
+                # Nested setup inside our own schema transaction.
+                pending.append(key)
+            return
+        _local.schema_pending = [key]
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                create(conn)
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            _schema_ready.update(_local.schema_pending)
+        finally:
+            _local.schema_pending = None
+
+
+def schema_once(name: str) -> Callable[[Callable[[sqlite3.Connection], None]], Callable[[sqlite3.Connection], None]]:
+    """Decorator form of ``ensure_schema`` for ``_ensure_*(conn)`` helpers."""
+
+    def decorator(create: Callable[[sqlite3.Connection], None]) -> Callable[[sqlite3.Connection], None]:
+        @functools.wraps(create)
+        def wrapper(conn: sqlite3.Connection) -> None:
+            ensure_schema(conn, name, create)
+
+        return wrapper
+
+    return decorator
+
+
+def forget_schema(db_path: str | Path) -> None:
+    """Re-run schema setup on next use, e.g. after a database restore."""
+    key = _db_key(db_path)
+    with _SCHEMA_LOCK:
+        for item in [item for item in _schema_ready if item[0] == key]:
+            _schema_ready.discard(item)
+
+
+def close_thread_connections() -> None:
+    pool = _thread_pool()
+    for conn in pool.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            continue
+    pool.clear()
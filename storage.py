@@ -2,23 +2,87 @@
 
 from __future__ import annotations
 
+import atexit
+import copy
+import functools
+import hashlib
 import json
 import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any, Iterator
 
+import shared_db
 from time_utils import malaysia_now
 
 CORE_DB_PATH = Path(__file__).with_name("mmhelper_core.json")
 LEGACY_DB_PATH = Path(__file__).with_name("mmhelper_db.json")
 ACTIVITY_DB_DIR = Path(__file__).with_name("db") / "activity"
 ACTIVITY_FILE_PREFIX = "activity_"
+LEDGER_PENDING_FILE = "ledger_pending.json"
 DEFAULT_SHARED_DB_PATH = Path(__file__).with_name("db") / "mmhelper_shared.db"
 MMHELPER_CORE_KV_KEY = "mmhelper_core_state"
+MMHELPER_CORE_GLOBALS_KV_KEY = "mmhelper_core_globals"
+MMHELPER_CORE_MIGRATION_KV_KEY = "mmhelper_core_user_tables_migrated"
+MMHELPER_CORE_VERSION_KV_KEY = "mmhelper_core_version"
+MMHELPER_USERS_TABLE = "mmhelper_users"
+MMHELPER_USER_SECTIONS_TABLE = "mmhelper_user_sections"
+MMHELPER_USER_INDEX_TABLE = "mmhelper_user_index"
+MMHELPER_USER_INDEX_MIGRATION_KV_KEY = "mmhelper_user_index_built"
 MMHELPER_ACTIVITY_TABLE = "mmhelper_activity_monthly"
+MMHELPER_LEDGER_TABLE = "mmhelper_activity_ledger"
+MMHELPER_LEDGER_MIGRATION_KV_KEY = "mmhelper_activity_ledger_migrated"
+MMHELPER_SNAPSHOT_TABLE = "mmhelper_daily_balance_snapshots"
+MMHELPER_SNAPSHOT_MIGRATION_KV_KEY = "mmhelper_daily_snapshots_built"
 MMHELPER_FIBO_PROFILES_TABLE = "fibo_extension_profiles"
+MMHELPER_NOTIFICATION_MARKERS_TABLE = "mmhelper_notification_markers"
+MMHELPER_NOTIFICATION_MARKERS_MIGRATION_KV_KEY = "mmhelper_notification_markers_migrated"
+NOTIFICATION_MARKER_DEFAULT_TTL_DAYS = 90
+MMHELPER_BROADCAST_JOBS_TABLE = "mmhelper_broadcast_jobs"
+MMHELPER_BROADCAST_RECIPIENTS_TABLE = "mmhelper_broadcast_recipients"
+BROADCAST_SHARDS = 8
+BROADCAST_SENDING_LEASE_SEC = 120
+BROADCAST_STALE_DEFAULT_HOURS = 24
+CORE_CACHE_LEDGER_MAX_ENTRIES = 2048
+CORE_CACHE_DAILY_TARGET_MAX_USERS = 4096
+TRANSACTION_HISTORY_PAGE_SIZE = 200
+WRITE_CONFLICT_MAX_RETRIES = 5
+WRITE_CONFLICT_BACKOFF_SEC = 0.02
+JSON_MIRROR_DEFAULT_INTERVAL_SEC = 30.0
+
+# Parsed core state shared by every getter in this process. Entries are only
+# trusted while the shared version counter in mmhelper_kv_state is unchanged,
+# so writes from other bot processes drop them on the next read.
+_CORE_CACHE_LOCK = threading.Lock()
+_core_cache: dict[str, Any] = {
+    "version": None,
+    "users": {},
+    "globals": None,
+    "ledger": {},
+    "row_versions": {},
+    "daily_targets": {},
+}
+
+# JSON mirror files are written by one background thread; writers only mark
+# what changed and the thread flushes at most once per interval.
+_MIRROR_LOCK = threading.Lock()
+_MIRROR_FLUSH_LOCK = threading.Lock()
+_mirror_wakeup = threading.Event()
+_mirror_pending: dict[str, Any] = {"core": False, "months": set(), "thread": None}
+
+# Ledger rows written while SQLite was unavailable wait in LEDGER_PENDING_FILE.
+_LEDGER_PENDING_LOCK = threading.Lock()
+
+# Active unit of work for the current thread (see _unit_of_work()).
+_uow_local = threading.local()
+
+
+class WriteConflictError(RuntimeError):
+    """Another writer changed a row this action read; raised after retries run out."""
 
 
 def _default_core_db() -> dict[str, Any]:
@@ -77,8 +141,76 @@ def _load_json_dict(path: Path, default_factory) -> dict[str, Any]:
 
 def _save_json_dict(path: Path, data: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _json_mirror_enabled() -> bool:
+    raw = (os.getenv("MMHELPER_JSON_MIRROR") or "1").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def _json_mirror_interval_sec() -> float:
+    raw = (os.getenv("MMHELPER_JSON_MIRROR_INTERVAL_SEC") or "").strip()
+    try:
+        interval = float(raw) if raw else JSON_MIRROR_DEFAULT_INTERVAL_SEC
+    except ValueError:
+        interval = JSON_MIRROR_DEFAULT_INTERVAL_SEC
+    return max(0.0, interval)
+
+
+def _schedule_json_mirror(*, core: bool = False, month_keys: tuple[str, ...] | list[str] = ()) -> None:
+    if not _json_mirror_enabled():
+        return
+    with _MIRROR_LOCK:
+        if core:
+            _mirror_pending["core"] = True
+        _mirror_pending["months"].update(month_keys)
+        thread = _mirror_pending["thread"]
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_json_mirror_worker, name="mmhelper_json_mirror", daemon=True)
+            if _mirror_pending["thread"] is None:
+                atexit.register(flush_json_mirror)
+            _mirror_pending["thread"] = thread
+            thread.start()
+    _mirror_wakeup.set()
+
+
+def _json_mirror_worker() -> None:
+    while True:
+        _mirror_wakeup.wait()
+        time.sleep(_json_mirror_interval_sec())
+        _mirror_wakeup.clear()
+        try:
+            flush_json_mirror()
+        except Exception:
+            # Mirror is best-effort; the next change retries it.
+            continue
+
+
+def flush_json_mirror() -> None:
+    """Write any pending JSON mirror files now."""
+    with _MIRROR_LOCK:
+        core = bool(_mirror_pending["core"])
+        month_keys = sorted(_mirror_pending["months"])
+        _mirror_pending["core"] = False
+        _mirror_pending["months"] = set()
+    if not core and not month_keys:
+        return
+
+    with _MIRROR_FLUSH_LOCK:
+        try:
+            with _connect_shared_db() as conn:
+                _ensure_ledger_storage(conn)
+                db = _read_core_state_from_tables(conn) if core else None
+                for month_key in month_keys:
+                    _write_activity_month_mirror(conn, month_key)
+        except sqlite3.Error:
+            return
+        if db is not None:
+            _save_json_dict(CORE_DB_PATH, _normalize_core_db(db))
 
 
 def _get_shared_db_path() -> Path:
@@ -89,25 +221,38 @@ def _get_shared_db_path() -> Path:
 
 
 def _connect_shared_db() -> sqlite3.Connection:
-    db_path = _get_shared_db_path()
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return shared_db.connect(_get_shared_db_path())
 
 
+@shared_db.schema_once("mmhelper_kv_state")
 def _ensure_mmhelper_kv_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS mmhelper_kv_state (
             key TEXT PRIMARY KEY,
             value_json TEXT NOT NULL,
-            updated_at TEXT NOT NULL DEFAULT ''
+            updated_at TEXT NOT NULL DEFAULT '',
+            row_version INTEGER NOT NULL DEFAULT 0
         )
         """
     )
+    _ensure_row_version_column(conn, "mmhelper_kv_state")
 
 
+def _ensure_row_version_column(conn: sqlite3.Connection, table: str) -> None:
+    # Tables created before optimistic locking get the column added in place.
+    columns = {str(row[1]) for row in conn.execute(f"PRAGMA table_info({table})")}
+    if "row_version" in columns:
+        return
+    try:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0")
+    except sqlite3.OperationalError as exc:
+        # Another bot process added it first.
+        if "duplicate column" not in str(exc).lower():
+            raise
+
+
+@shared_db.schema_once("mmhelper_activity_monthly")
 def _ensure_mmhelper_activity_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         f"""
@@ -120,6 +265,7 @@ def _ensure_mmhelper_activity_table(conn: sqlite3.Connection) -> None:
     )
 
 
+@shared_db.schema_once("fibo_extension_profiles")
 def _ensure_fibo_profiles_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         f"""
@@ -132,6 +278,119 @@ def _ensure_fibo_profiles_table(conn: sqlite3.Connection) -> None:
     )
 
 
+@shared_db.schema_once("mmhelper_user_tables")
+def _ensure_mmhelper_user_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MMHELPER_USERS_TABLE} (
+            user_id TEXT PRIMARY KEY,
+            profile_json TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT '',
+            row_version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    _ensure_row_version_column(conn, MMHELPER_USERS_TABLE)
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MMHELPER_USER_SECTIONS_TABLE} (
+            user_id TEXT NOT NULL,
+            section TEXT NOT NULL,
+            payload_json TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (user_id, section)
+        )
+        """
+    )
+    # Registered-user index kept in step with every user write, so user logs and
+    # broadcast recipient lists never have to decode profiles or sections.
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MMHELPER_USER_INDEX_TABLE} (
+            user_id TEXT PRIMARY KEY,
+            chat_id INTEGER,
+            active INTEGER NOT NULL DEFAULT 0,
+            name TEXT NOT NULL DEFAULT '',
+            telegram_username TEXT NOT NULL DEFAULT '',
+            registered_date TEXT,
+            registered_time TEXT,
+            registered_at TEXT
+        )
+        """
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{MMHELPER_USER_INDEX_TABLE}_active_chat "
+        f"ON {MMHELPER_USER_INDEX_TABLE} (active, chat_id)"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{MMHELPER_USER_INDEX_TABLE}_registered "
+        f"ON {MMHELPER_USER_INDEX_TABLE} (active, registered_at)"
+    )
+
+
+def _user_index_row(user_key: str, user_obj: dict[str, Any]) -> dict[str, Any]:
+    sections = user_obj.get("sections", {})
+    if not isinstance(sections, dict):
+        sections = {}
+    try:
+        chat_id: int | None = int(user_key)
+    except (TypeError, ValueError):
+        chat_id = None
+    row: dict[str, Any] = {
+        "user_id": user_key,
+        "chat_id": chat_id,
+        "active": 1 if "initial_setup" in sections else 0,
+        "name": "",
+        "telegram_username": "",
+        "registered_date": None,
+        "registered_time": None,
+        "registered_at": None,
+    }
+    init_section = sections.get("initial_setup")
+    if not isinstance(init_section, dict):
+        # Active but without a setup record: counted as a recipient, not logged.
+        return row
+
+    init_data = init_section.get("data", {})
+    if not isinstance(init_data, dict):
+        init_data = {}
+    user_id_text = str(user_obj.get("user_id") or user_key)
+    telegram_username = str(user_obj.get("telegram_username") or "").strip()
+    if telegram_username and not telegram_username.startswith("@"):
+        telegram_username = "@" + telegram_username
+    row.update(
+        {
+            "name": str(init_data.get("name") or user_obj.get("telegram_name") or ("User " + user_id_text)),
+            "telegram_username": telegram_username or "-",
+            "registered_date": str(init_section.get("saved_date") or "-"),
+            "registered_time": str(init_section.get("saved_time") or "-"),
+            "registered_at": str(init_section.get("saved_at") or ""),
+        }
+    )
+    return row
+
+
+def _write_user_index(conn: sqlite3.Connection, user_key: str, user_obj: dict[str, Any]) -> None:
+    row = _user_index_row(user_key, user_obj)
+    conn.execute(
+        f"""
+        INSERT INTO {MMHELPER_USER_INDEX_TABLE} (
+            user_id, chat_id, active, name, telegram_username, registered_date, registered_time, registered_at
+        )
+        VALUES (:user_id, :chat_id, :active, :name, :telegram_username, :registered_date, :registered_time, :registered_at)
+        ON CONFLICT(user_id) DO UPDATE SET
+            chat_id = excluded.chat_id,
+            active = excluded.active,
+            name = excluded.name,
+            telegram_username = excluded.telegram_username,
+            registered_date = excluded.registered_date,
+            registered_time = excluded.registered_time,
+            registered_at = excluded.registered_at
+        """,
+        row,
+    )
+
+
 def _read_core_state_from_sqlite(conn: sqlite3.Connection) -> dict[str, Any] | None:
     row = conn.execute(
         "SELECT value_json FROM mmhelper_kv_state WHERE key = ?",
@@ -151,15 +410,282 @@ def _read_core_state_from_sqlite(conn: sqlite3.Connection) -> dict[str, Any] | N
     return _normalize_core_db(data)
 
 
-def _write_core_state_to_sqlite(conn: sqlite3.Connection, data: dict[str, Any]) -> None:
-    payload = json.dumps(_normalize_core_db(data), ensure_ascii=False)
+def _read_kv_json(conn: sqlite3.Connection, key: str) -> dict[str, Any] | None:
+    row = conn.execute("SELECT value_json FROM mmhelper_kv_state WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    try:
+        data = json.loads(str(row["value_json"] or "").strip() or "{}")
+    except json.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_kv_json(
+    conn: sqlite3.Connection,
+    key: str,
+    data: dict[str, Any],
+    expected_version: int | None = None,
+) -> bool:
+    """Upsert one kv row; with ``expected_version`` only if nobody changed it since."""
+    cur = conn.execute(
+        """
+        INSERT INTO mmhelper_kv_state (key, value_json, updated_at, row_version)
+        VALUES (?, ?, ?, 1)
+        ON CONFLICT(key) DO UPDATE SET
+            value_json = excluded.value_json,
+            updated_at = excluded.updated_at,
+            row_version = row_version + 1
+        WHERE ? IS NULL OR row_version = ?
+        """,
+        (key, json.dumps(data, ensure_ascii=False), malaysia_now().isoformat(), expected_version, expected_version),
+    )
+    return cur.rowcount > 0
+
+
+def _read_kv_row_version(conn: sqlite3.Connection, key: str) -> int:
+    row = conn.execute("SELECT row_version FROM mmhelper_kv_state WHERE key = ?", (key,)).fetchone()
+    return _to_int(row["row_version"]) if row is not None else 0
+
+
+def _decode_json_dict(raw: Any) -> dict[str, Any]:
+    try:
+        data = json.loads(str(raw or "").strip() or "{}")
+    except json.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _read_core_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute(
+        "SELECT value_json FROM mmhelper_kv_state WHERE key = ?",
+        (MMHELPER_CORE_VERSION_KV_KEY,),
+    ).fetchone()
+    return _to_int(row["value_json"]) if row is not None else 0
+
+
+def _bump_core_version(conn: sqlite3.Connection) -> int:
     conn.execute(
         """
-        INSERT OR REPLACE INTO mmhelper_kv_state (key, value_json, updated_at)
-        VALUES (?, ?, ?)
+        INSERT INTO mmhelper_kv_state (key, value_json, updated_at)
+        VALUES (?, '1', ?)
+        ON CONFLICT(key) DO UPDATE SET
+            value_json = CAST(CAST(value_json AS INTEGER) + 1 AS TEXT),
+            updated_at = excluded.updated_at
         """,
-        (MMHELPER_CORE_KV_KEY, payload, malaysia_now().isoformat()),
+        (MMHELPER_CORE_VERSION_KV_KEY, malaysia_now().isoformat()),
     )
+    return _read_core_version(conn)
+
+
+def _reset_core_cache(version: int | None) -> None:
+    # Caller must hold _CORE_CACHE_LOCK.
+    _core_cache["version"] = version
+    _core_cache["users"] = {}
+    _core_cache["globals"] = None
+    _core_cache["ledger"] = {}
+    _core_cache["row_versions"] = {}
+    _core_cache["daily_targets"] = {}
+
+
+def _invalidate_core_cache() -> None:
+    # A cold cache also re-checks schema/migrations on its next read.
+    shared_db.forget_schema(_get_shared_db_path())
+    with _CORE_CACHE_LOCK:
+        _reset_core_cache(None)
+
+
+def _sync_core_cache(conn: sqlite3.Connection) -> int:
+    with _CORE_CACHE_LOCK:
+        cold = _core_cache["version"] is None
+    if cold:
+        _ensure_snapshot_storage(conn)
+    version = _read_core_version(conn)
+    with _CORE_CACHE_LOCK:
+        if _core_cache["version"] != version:
+            _reset_core_cache(version)
+    return version
+
+
+def _advance_core_cache(version: int, *, ledger_changed: bool = False) -> None:
+    # Called after a local write committed as `version`. If nobody else wrote in
+    # between, cached entries are still valid and only the touched parts move.
+    with _CORE_CACHE_LOCK:
+        if _core_cache["version"] == version - 1:
+            _core_cache["version"] = version
+            if ledger_changed:
+                _core_cache["ledger"] = {}
+        else:
+            _reset_core_cache(version)
+
+
+def _read_user_from_tables(conn: sqlite3.Connection, user_id: int | str) -> dict[str, Any] | None:
+    return _read_user_with_version(conn, user_id)[0]
+
+
+def _read_user_with_version(conn: sqlite3.Connection, user_id: int | str) -> tuple[dict[str, Any] | None, int]:
+    # A missing user reads as version 0; inserted rows start at 1.
+    user_key = str(user_id)
+    row = conn.execute(
+        f"SELECT profile_json, row_version FROM {MMHELPER_USERS_TABLE} WHERE user_id = ?",
+        (user_key,),
+    ).fetchone()
+    if row is None:
+        return None, 0
+    user_obj = _decode_json_dict(row["profile_json"])
+    sections: dict[str, Any] = {}
+    for section_row in conn.execute(
+        f"SELECT section, payload_json FROM {MMHELPER_USER_SECTIONS_TABLE} WHERE user_id = ?",
+        (user_key,),
+    ):
+        sections[str(section_row["section"])] = _decode_json_dict(section_row["payload_json"])
+    user_obj["sections"] = sections
+    return user_obj, _to_int(row["row_version"])
+
+
+def _write_user_to_tables(
+    conn: sqlite3.Connection,
+    user_id: int | str,
+    user_obj: dict[str, Any],
+    expected_version: int | None = None,
+) -> bool:
+    """Write one user; with ``expected_version`` only if the row is still at that version."""
+    user_key = str(user_id)
+    now_iso = malaysia_now().isoformat()
+    profile = {key: value for key, value in user_obj.items() if key != "sections"}
+    cur = conn.execute(
+        f"""
+        INSERT INTO {MMHELPER_USERS_TABLE} (user_id, profile_json, updated_at, row_version)
+        VALUES (?, ?, ?, 1)
+        ON CONFLICT(user_id) DO UPDATE SET
+            profile_json = excluded.profile_json,
+            updated_at = excluded.updated_at,
+            row_version = row_version + 1
+        WHERE ? IS NULL OR row_version = ?
+        """,
+        (
+            user_key,
+            json.dumps(profile, ensure_ascii=False),
+            str(user_obj.get("updated_at") or now_iso),
+            expected_version,
+            expected_version,
+        ),
+    )
+    if cur.rowcount == 0:
+        return False
+
+    sections = user_obj.get("sections")
+    if not isinstance(sections, dict):
+        sections = {}
+    for section_name, payload in sections.items():
+        # Unchanged sections are skipped so a single tap rewrites only what it touched.
+        conn.execute(
+            f"""
+            INSERT INTO {MMHELPER_USER_SECTIONS_TABLE} (user_id, section, payload_json, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id, section) DO UPDATE SET
+                payload_json = excluded.payload_json,
+                updated_at = excluded.updated_at
+            WHERE payload_json != excluded.payload_json
+            """,
+            (user_key, str(section_name), json.dumps(payload, ensure_ascii=False), now_iso),
+        )
+    placeholders = ",".join("?" for _ in sections)
+    if placeholders:
+        conn.execute(
+            f"DELETE FROM {MMHELPER_USER_SECTIONS_TABLE} WHERE user_id = ? AND section NOT IN ({placeholders})",
+            (user_key, *[str(name) for name in sections]),
+        )
+    else:
+        conn.execute(f"DELETE FROM {MMHELPER_USER_SECTIONS_TABLE} WHERE user_id = ?", (user_key,))
+    _write_user_index(conn, user_key, user_obj)
+    return True
+
+
+def _read_user_row_version(conn: sqlite3.Connection, user_id: int | str) -> int:
+    row = conn.execute(
+        f"SELECT row_version FROM {MMHELPER_USERS_TABLE} WHERE user_id = ?",
+        (str(user_id),),
+    ).fetchone()
+    return _to_int(row["row_version"]) if row is not None else 0
+
+
+def _delete_user_from_tables(conn: sqlite3.Connection, user_id: int | str) -> bool:
+    user_key = str(user_id)
+    cur = conn.execute(f"DELETE FROM {MMHELPER_USERS_TABLE} WHERE user_id = ?", (user_key,))
+    conn.execute(f"DELETE FROM {MMHELPER_USER_SECTIONS_TABLE} WHERE user_id = ?", (user_key,))
+    conn.execute(f"DELETE FROM {MMHELPER_USER_INDEX_TABLE} WHERE user_id = ?", (user_key,))
+    return cur.rowcount > 0
+
+
+def _read_core_state_from_tables(conn: sqlite3.Connection) -> dict[str, Any]:
+    data = _read_kv_json(conn, MMHELPER_CORE_GLOBALS_KV_KEY) or {}
+    users: dict[str, Any] = {}
+    for row in conn.execute(f"SELECT user_id, profile_json FROM {MMHELPER_USERS_TABLE}"):
+        user_obj = _decode_json_dict(row["profile_json"])
+        user_obj["sections"] = {}
+        users[str(row["user_id"])] = user_obj
+    for row in conn.execute(f"SELECT user_id, section, payload_json FROM {MMHELPER_USER_SECTIONS_TABLE}"):
+        user_obj = users.get(str(row["user_id"]))
+        if user_obj is not None:
+            user_obj["sections"][str(row["section"])] = _decode_json_dict(row["payload_json"])
+    data["users"] = users
+    return data
+
+
+def _write_core_state_to_tables(conn: sqlite3.Connection, data: dict[str, Any]) -> None:
+    normalized = _normalize_core_db(data)
+    conn.execute(f"DELETE FROM {MMHELPER_USERS_TABLE}")
+    conn.execute(f"DELETE FROM {MMHELPER_USER_SECTIONS_TABLE}")
+    conn.execute(f"DELETE FROM {MMHELPER_USER_INDEX_TABLE}")
+    for user_key, user_obj in normalized["users"].items():
+        if isinstance(user_obj, dict):
+            _write_user_to_tables(conn, user_key, user_obj)
+    _write_kv_json(
+        conn,
+        MMHELPER_CORE_GLOBALS_KV_KEY,
+        {key: value for key, value in normalized.items() if key != "users"},
+    )
+    _bump_core_version(conn)
+
+
+def _migrate_core_state_to_user_tables_if_needed(conn: sqlite3.Connection) -> None:
+    if _read_kv_json(conn, MMHELPER_CORE_MIGRATION_KV_KEY) is not None:
+        return
+
+    # One-time split of the legacy single-blob state into row-per-user/section.
+    # The old blob row is left untouched so a rollback still has its data.
+    legacy = _read_core_state_from_sqlite(conn)
+    if legacy is None:
+        legacy = _load_core_db_from_files()
+    _write_core_state_to_tables(conn, legacy)
+    _write_kv_json(
+        conn,
+        MMHELPER_CORE_MIGRATION_KV_KEY,
+        {"schema": "user_tables_v1", "migrated_users": len(legacy.get("users", {}))},
+    )
+
+
+def _build_user_index_if_needed(conn: sqlite3.Connection) -> None:
+    if _read_kv_json(conn, MMHELPER_USER_INDEX_MIGRATION_KV_KEY) is not None:
+        return
+
+    # Installs that predate the index: fill it once from the user tables.
+    indexed = 0
+    for row in conn.execute(f"SELECT user_id FROM {MMHELPER_USERS_TABLE}").fetchall():
+        user_obj = _read_user_from_tables(conn, row["user_id"])
+        if user_obj is not None:
+            _write_user_index(conn, str(row["user_id"]), user_obj)
+            indexed += 1
+    _write_kv_json(conn, MMHELPER_USER_INDEX_MIGRATION_KV_KEY, {"schema": "user_index_v1", "indexed_users": indexed})
+
+
+@shared_db.schema_once("mmhelper_core_storage")
+def _ensure_core_storage(conn: sqlite3.Connection) -> None:
+    _ensure_mmhelper_kv_table(conn)
+    _ensure_mmhelper_user_tables(conn)
+    _migrate_core_state_to_user_tables_if_needed(conn)
+    _build_user_index_if_needed(conn)
 
 
 def _load_core_db_from_files() -> dict[str, Any]:
@@ -173,7 +699,6 @@ def _load_core_db_from_files() -> dict[str, Any]:
     legacy_db = _load_json_dict(LEGACY_DB_PATH, _default_core_db)
     legacy_db = _normalize_core_db(legacy_db)
     if legacy_db.get("users"):
-        _save_json_dict(CORE_DB_PATH, legacy_db)
         return legacy_db
     return core_db
 
@@ -186,14 +711,11 @@ def _normalize_core_db(data: dict[str, Any]) -> dict[str, Any]:
 
 
 def load_core_db() -> dict[str, Any]:
+    """Assemble the full legacy-shaped state; prefer the per-user helpers on hot paths."""
     try:
         with _connect_shared_db() as conn:
-            _ensure_mmhelper_kv_table(conn)
-            db = _read_core_state_from_sqlite(conn)
-            if db is None:
-                db = _load_core_db_from_files()
-                _write_core_state_to_sqlite(conn, db)
-            _save_json_dict(CORE_DB_PATH, db)
+            _ensure_core_storage(conn)
+            db = _read_core_state_from_tables(conn)
             return _normalize_core_db(db)
     except sqlite3.Error:
         return _load_core_db_from_files()
@@ -203,11 +725,297 @@ def save_core_db(data: dict[str, Any]) -> None:
     normalized = _normalize_core_db(data)
     try:
         with _connect_shared_db() as conn:
-            _ensure_mmhelper_kv_table(conn)
-            _write_core_state_to_sqlite(conn, normalized)
+            _ensure_core_storage(conn)
+            _ensure_snapshot_storage(conn)
+            _write_core_state_to_tables(conn, normalized)
+            # Legacy in-core records may have changed. Rebuild the snapshots in
+            # this transaction: every process has already run the snapshot
+            # migration once and would not notice a cleared marker.
+            rows = _rebuild_daily_snapshots(conn)
+            _write_kv_json(conn, MMHELPER_SNAPSHOT_MIGRATION_KV_KEY, {"snapshot_rows": rows})
     except sqlite3.Error:
-        pass
-    _save_json_dict(CORE_DB_PATH, normalized)
+        _invalidate_core_cache()
+        _save_json_dict(CORE_DB_PATH, normalized)
+        return
+    _invalidate_core_cache()
+    _schedule_json_mirror(core=True)
+
+
+def _load_user_obj(user_id: int | str) -> dict[str, Any] | None:
+    """Return a private copy of one user; callers may mutate it before saving."""
+    user_key = str(user_id)
+    uow = getattr(_uow_local, "current", None)
+    if uow is not None and user_key in uow.users:
+        return copy.deepcopy(uow.users[user_key])
+    try:
+        with _connect_shared_db() as conn:
+            version = _sync_core_cache(conn)
+            with _CORE_CACHE_LOCK:
+                if user_key in _core_cache["users"]:
+                    if uow is not None:
+                        uow.read_versions.setdefault(user_key, _core_cache["row_versions"].get(user_key))
+                    return copy.deepcopy(_core_cache["users"][user_key])
+            user, row_version = _read_user_with_version(conn, user_key)
+    except sqlite3.Error:
+        _invalidate_core_cache()
+        user = _load_core_db_from_files().get("users", {}).get(user_key)
+        return user if isinstance(user, dict) else None
+
+    if uow is not None:
+        uow.read_versions.setdefault(user_key, row_version)
+    with _CORE_CACHE_LOCK:
+        if _core_cache["version"] == version:
+            _core_cache["users"][user_key] = copy.deepcopy(user)
+            _core_cache["row_versions"][user_key] = row_version
+    return user
+
+
+class _UnitOfWork:
+    """Writes staged by one storage mutation; committed together in one transaction."""
+
+    def __init__(self) -> None:
+        self.users: dict[str, dict[str, Any]] = {}
+        self.ledger: list[tuple[str, str, dict[str, Any]]] = []
+        self.globals: dict[str, Any] | None = None
+        # Row versions seen by reads in this unit; their writes are compare-and-swap.
+        self.read_versions: dict[str, int | None] = {}
+
+    def is_empty(self) -> bool:
+        return not self.users and not self.ledger and self.globals is None
+
+
+@contextmanager
+def _unit_of_work() -> Iterator[_UnitOfWork]:
+    # Nested use joins the outer unit, so helpers can stage writes freely.
+    active = getattr(_uow_local, "current", None)
+    if active is not None:
+        yield active
+        return
+
+    uow = _UnitOfWork()
+    _uow_local.current = uow
+    try:
+        yield uow
+    finally:
+        _uow_local.current = None
+    _commit_unit_of_work(uow)
+
+
+def _transactional(func):
+    """Run a mutation as one unit of work; staged writes commit when it returns.
+
+    If another writer changed a row the mutation read, the whole call is re-run
+    on fresh data, up to WRITE_CONFLICT_MAX_RETRIES times.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(_uow_local, "current", None) is not None:
+            return func(*args, **kwargs)
+        for attempt in range(WRITE_CONFLICT_MAX_RETRIES):
+            try:
+                with _unit_of_work():
+                    return func(*args, **kwargs)
+            except WriteConflictError:
+                if attempt + 1 >= WRITE_CONFLICT_MAX_RETRIES:
+                    raise
+                time.sleep(WRITE_CONFLICT_BACKOFF_SEC * (attempt + 1))
+
+    return wrapper
+
+
+def _append_monthly_record(user_id: int | str, section_name: str, record: dict[str, Any]) -> None:
+    record_date = _record_date_myt(record)
+    if section_name == "tabung" or record_date is None:
+        return
+    month_key = _month_key_from_date(record_date)
+    path = _activity_db_path(month_key)
+    db = _load_json_dict(path, lambda: _default_activity_db(month_key))
+    users = db.setdefault("users", {})
+    user_bucket = users.setdefault(str(user_id), {})
+    section_bucket = user_bucket.setdefault(section_name, {"records": []})
+    section_bucket.setdefault("records", []).append(record)
+    _save_json_dict(path, db)
+
+
+def _stash_pending_ledger(rows: list[tuple[str, str, dict[str, Any]]]) -> None:
+    """Keep ledger rows SQLite could not take; the next successful commit imports them."""
+    path = ACTIVITY_DB_DIR / LEDGER_PENDING_FILE
+    with _LEDGER_PENDING_LOCK:
+        data = _load_json_dict(path, lambda: {"records": []})
+        records = data.setdefault("records", [])
+        for user_key, section_name, record in rows:
+            records.append({"user_id": user_key, "section": section_name, "record": record})
+        _save_json_dict(path, data)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _claim_pending_ledger() -> tuple[list[Path], list[tuple[str, str, dict[str, Any]]]]:
+    """Move stashed ledger rows to files owned by this process and return them.
+
+    The rename makes the claim exclusive between bot processes; files left
+    behind by a process that died mid-commit are claimed again.
+    """
+    if not ACTIVITY_DB_DIR.exists():
+        return [], []
+    pid = os.getpid()
+    pending = ACTIVITY_DB_DIR / LEDGER_PENDING_FILE
+    claimed: list[Path] = []
+    with _LEDGER_PENDING_LOCK:
+        sources = [pending] if pending.exists() else []
+        for path in ACTIVITY_DB_DIR.glob(f"{pending.stem}.*.json"):
+            owner = path.stem.rsplit(".", 1)[-1]
+            if owner.isdigit() and int(owner) != pid and not _pid_alive(int(owner)):
+                sources.append(path)
+        for index, path in enumerate(sources):
+            target = path.with_name(f"{pending.stem}.{time.time_ns()}_{index}.{pid}.json")
+            try:
+                os.replace(path, target)
+            except OSError:
+                continue
+            claimed.append(target)
+
+    return claimed, _read_pending_ledger(claimed)
+
+
+def _read_pending_ledger(paths: list[Path]) -> list[tuple[str, str, dict[str, Any]]]:
+    rows: list[tuple[str, str, dict[str, Any]]] = []
+    for path in paths:
+        data = _load_json_dict(path, lambda: {"records": []})
+        for item in data.get("records") or []:
+            if isinstance(item, dict) and isinstance(item.get("record"), dict):
+                rows.append((str(item.get("user_id") or ""), str(item.get("section") or ""), item["record"]))
+    return rows
+
+
+def _release_pending_ledger(claimed: list[Path], *, imported: bool) -> None:
+    if not claimed:
+        return
+    if not imported:
+        rows = _read_pending_ledger(claimed)
+        if rows:
+            _stash_pending_ledger(rows)
+    for path in claimed:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _commit_unit_of_work(uow: _UnitOfWork) -> None:
+    if uow.is_empty():
+        return
+    row_versions: dict[str, int] = {}
+    claimed, pending_rows = _claim_pending_ledger()
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_snapshot_storage(conn)
+            for user_key, user_obj in uow.users.items():
+                if not _write_user_to_tables(conn, user_key, user_obj, uow.read_versions.get(user_key)):
+                    raise WriteConflictError(f"user {user_key} changed by another writer")
+                row_versions[user_key] = _read_user_row_version(conn, user_key)
+            for user_key, section_name, record in pending_rows + uow.ledger:
+                _insert_ledger_row(conn, user_key, section_name, record)
+                _apply_snapshot_record(conn, user_key, section_name, record)
+            if uow.globals is not None:
+                expected = uow.read_versions.get(MMHELPER_CORE_GLOBALS_KV_KEY)
+                if not _write_kv_json(conn, MMHELPER_CORE_GLOBALS_KV_KEY, uow.globals, expected):
+                    raise WriteConflictError("core globals changed by another writer")
+                row_versions[MMHELPER_CORE_GLOBALS_KV_KEY] = _read_kv_row_version(conn, MMHELPER_CORE_GLOBALS_KV_KEY)
+            version = _bump_core_version(conn)
+    except WriteConflictError:
+        # Rolled back; drop whatever this process cached so the retry reads fresh rows.
+        _release_pending_ledger(claimed, imported=False)
+        with _CORE_CACHE_LOCK:
+            _reset_core_cache(None)
+        raise
+    except sqlite3.Error:
+        # SQLite unavailable: keep the JSON files as the fallback store. Ledger
+        # rows also go to the month's activity file, as before the ledger, and
+        # are stashed so the next successful commit imports them.
+        _release_pending_ledger(claimed, imported=False)
+        _invalidate_core_cache()
+        if uow.users or uow.globals is not None:
+            db = _load_core_db_from_files()
+            db["users"].update(uow.users)
+            if uow.globals is not None:
+                db.update(uow.globals)
+            _save_json_dict(CORE_DB_PATH, db)
+        if uow.ledger:
+            for user_key, section_name, record in uow.ledger:
+                _append_monthly_record(user_key, section_name, record)
+            _stash_pending_ledger(uow.ledger)
+        return
+    except BaseException:
+        _release_pending_ledger(claimed, imported=False)
+        raise
+
+    _release_pending_ledger(claimed, imported=True)
+    uow.ledger = pending_rows + uow.ledger
+    _advance_core_cache(version, ledger_changed=bool(uow.ledger))
+    with _CORE_CACHE_LOCK:
+        if _core_cache["version"] == version:
+            _advance_daily_target_memo(uow)
+            for user_key, user_obj in uow.users.items():
+                _core_cache["users"][user_key] = copy.deepcopy(user_obj)
+            if uow.globals is not None:
+                _core_cache["globals"] = copy.deepcopy(uow.globals)
+            _core_cache["row_versions"].update(row_versions)
+
+    month_keys = []
+    for _, section_name, record in uow.ledger:
+        record_date = _record_date_myt(record)
+        if section_name != "tabung" and record_date is not None:
+            month_keys.append(_month_key_from_date(record_date))
+    _schedule_json_mirror(core=bool(uow.users or uow.globals is not None), month_keys=month_keys)
+
+
+def _save_user_obj(user_id: int | str, user_obj: dict[str, Any]) -> None:
+    with _unit_of_work() as uow:
+        uow.users[str(user_id)] = user_obj
+
+
+def _load_core_globals() -> dict[str, Any]:
+    key = MMHELPER_CORE_GLOBALS_KV_KEY
+    uow = getattr(_uow_local, "current", None)
+    if uow is not None and uow.globals is not None:
+        return copy.deepcopy(uow.globals)
+    try:
+        with _connect_shared_db() as conn:
+            version = _sync_core_cache(conn)
+            with _CORE_CACHE_LOCK:
+                if _core_cache["globals"] is not None:
+                    if uow is not None:
+                        uow.read_versions.setdefault(key, _core_cache["row_versions"].get(key))
+                    return copy.deepcopy(_core_cache["globals"])
+            data = _read_kv_json(conn, key) or {}
+            row_version = _read_kv_row_version(conn, key)
+    except sqlite3.Error:
+        _invalidate_core_cache()
+        db = _load_core_db_from_files()
+        return {key: value for key, value in db.items() if key != "users"}
+
+    if uow is not None:
+        uow.read_versions.setdefault(key, row_version)
+    with _CORE_CACHE_LOCK:
+        if _core_cache["version"] == version:
+            _core_cache["globals"] = copy.deepcopy(data)
+            _core_cache["row_versions"][key] = row_version
+    return data
+
+
+def _save_core_globals(data: dict[str, Any]) -> None:
+    with _unit_of_work() as uow:
+        uow.globals = {key: value for key, value in data.items() if key != "users"}
 
 
 # Backward-compatible names used by older code.
@@ -246,7 +1054,7 @@ def _parse_override_date(raw: Any) -> date | None:
 
 
 def get_beta_date_override(target_user_id: int) -> dict[str, Any]:
-    db = load_core_db()
+    db = _load_core_globals()
     bucket = _beta_date_override_bucket(db)
     users = bucket.get("users", {})
     row = users.get(str(target_user_id), {}) if isinstance(users, dict) else {}
@@ -261,7 +1069,7 @@ def get_beta_date_override(target_user_id: int) -> dict[str, Any]:
 
 
 def get_beta_date_overrides_snapshot() -> dict[str, dict[str, Any]]:
-    db = load_core_db()
+    db = _load_core_globals()
     bucket = _beta_date_override_bucket(db)
     users = bucket.get("users", {})
     if not isinstance(users, dict):
@@ -279,10 +1087,9 @@ def get_beta_date_overrides_snapshot() -> dict[str, dict[str, Any]]:
     return out
 
 
+@_transactional
 def set_beta_date_override(target_user_id: int, override_date: str, enabled: bool, updated_by: int) -> tuple[bool, str]:
-    db = load_core_db()
-    users = db.get("users", {})
-    if not isinstance(users, dict) or str(target_user_id) not in users:
+    if _load_user_obj(target_user_id) is None:
         return False, "Target user tak dijumpai."
 
     if enabled:
@@ -294,6 +1101,7 @@ def set_beta_date_override(target_user_id: int, override_date: str, enabled: boo
         normalized_date = ""
 
     now = malaysia_now().isoformat()
+    db = _load_core_globals()
     bucket = _beta_date_override_bucket(db)
     row_users = bucket.setdefault("users", {})
     if not isinstance(row_users, dict):
@@ -305,23 +1113,24 @@ def set_beta_date_override(target_user_id: int, override_date: str, enabled: boo
         "updated_by": int(updated_by),
         "updated_at": now,
     }
-    save_core_db(db)
+    _save_core_globals(db)
     return True, "ok"
 
 
+@_transactional
 def clear_beta_date_override(target_user_id: int) -> bool:
-    db = load_core_db()
+    db = _load_core_globals()
     bucket = _beta_date_override_bucket(db)
     users = bucket.get("users", {})
     if not isinstance(users, dict):
         return False
     removed = users.pop(str(target_user_id), None)
-    save_core_db(db)
+    _save_core_globals(db)
     return removed is not None
 
 
 def current_user_date(user_id: int) -> date:
-    db = load_core_db()
+    db = _load_core_globals()
     bucket = _beta_date_override_bucket(db)
     users = bucket.get("users", {})
     if isinstance(users, dict):
@@ -364,114 +1173,470 @@ def _read_activity_from_sqlite(conn: sqlite3.Connection, month_key: str) -> dict
     return parsed
 
 
-def _write_activity_to_sqlite(conn: sqlite3.Connection, month_key: str, data: dict[str, Any]) -> None:
-    payload = json.dumps(data, ensure_ascii=False)
+def _iter_legacy_activity_month_keys(conn: sqlite3.Connection) -> list[str]:
+    month_keys: list[str] = []
+    for row in conn.execute(f"SELECT month_key FROM {MMHELPER_ACTIVITY_TABLE}").fetchall():
+        key = str(row["month_key"] or "").strip()
+        if key:
+            month_keys.append(key)
+
+    if ACTIVITY_DB_DIR.exists():
+        for path in ACTIVITY_DB_DIR.glob(f"{ACTIVITY_FILE_PREFIX}*.json"):
+            stem = path.stem
+            raw = stem[len(ACTIVITY_FILE_PREFIX) :]
+            parts = raw.split("_")
+            if len(parts) != 2:
+                continue
+            year, month = parts
+            if not (year.isdigit() and month.isdigit()):
+                continue
+            month_int = int(month)
+            if month_int < 1 or month_int > 12:
+                continue
+            month_keys.append(f"{year}_{month.zfill(2)}")
+    return sorted(set(month_keys))
+
+
+@shared_db.schema_once("mmhelper_activity_ledger")
+def _ensure_mmhelper_ledger_table(conn: sqlite3.Connection) -> None:
     conn.execute(
         f"""
-        INSERT OR REPLACE INTO {MMHELPER_ACTIVITY_TABLE} (month_key, payload_json, updated_at)
-        VALUES (?, ?, ?)
+        CREATE TABLE IF NOT EXISTS {MMHELPER_LEDGER_TABLE} (
+            entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            section TEXT NOT NULL,
+            record_date TEXT NOT NULL DEFAULT '',
+            saved_at TEXT NOT NULL DEFAULT '',
+            mode TEXT NOT NULL DEFAULT '',
+            amount_usd REAL NOT NULL DEFAULT 0,
+            net_usd REAL NOT NULL DEFAULT 0,
+            payload_json TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_{MMHELPER_LEDGER_TABLE}_user_section_date
+        ON {MMHELPER_LEDGER_TABLE}(user_id, section, record_date)
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_{MMHELPER_LEDGER_TABLE}_user_date
+        ON {MMHELPER_LEDGER_TABLE}(user_id, record_date)
+        """
+    )
+
+
+def _insert_ledger_row(conn: sqlite3.Connection, user_id: int | str, section_name: str, record: dict[str, Any]) -> None:
+    rec_date = _record_date_myt(record)
+    conn.execute(
+        f"""
+        INSERT INTO {MMHELPER_LEDGER_TABLE}
+        (user_id, section, record_date, saved_at, mode, amount_usd, net_usd, payload_json)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """,
-        (month_key, payload, malaysia_now().isoformat()),
+        (
+            str(user_id),
+            section_name,
+            rec_date.isoformat() if rec_date is not None else "",
+            str(record.get("saved_at") or ""),
+            str(record.get("mode") or "").strip().lower(),
+            _to_float(record.get("amount_usd", 0)),
+            _record_net_usd(record),
+            json.dumps(record, ensure_ascii=False),
+        ),
     )
 
 
-def _load_activity_db(month_key: str) -> dict[str, Any]:
-    data: dict[str, Any]
-    try:
-        with _connect_shared_db() as conn:
-            _ensure_mmhelper_activity_table(conn)
-            sqlite_data = _read_activity_from_sqlite(conn, month_key)
-            if sqlite_data is not None:
-                data = sqlite_data
-            else:
-                data = _load_json_dict(_activity_db_path(month_key), lambda: _default_activity_db(month_key))
-                _write_activity_to_sqlite(conn, month_key, data)
-    except sqlite3.Error:
-        data = _load_json_dict(_activity_db_path(month_key), lambda: _default_activity_db(month_key))
+def _migrate_activity_to_ledger_if_needed(conn: sqlite3.Connection) -> None:
+    if _read_kv_json(conn, MMHELPER_LEDGER_MIGRATION_KV_KEY) is not None:
+        return
 
-    users = data.get("users")
-    if not isinstance(users, dict):
-        data["users"] = {}
-    if not isinstance(data.get("month"), str):
-        data["month"] = month_key.replace("_", "-")
+    # One-time copy of the monthly blobs (SQLite first, JSON files as fallback)
+    # into the ledger. Month rows are kept untouched for rollback.
+    migrated = 0
+    for month_key in _iter_legacy_activity_month_keys(conn):
+        data = _read_activity_from_sqlite(conn, month_key)
+        if data is None:
+            data = _load_json_dict(_activity_db_path(month_key), lambda: _default_activity_db(month_key))
+        users = data.get("users")
+        if not isinstance(users, dict):
+            continue
+        for user_key, user_bucket in users.items():
+            if not isinstance(user_bucket, dict):
+                continue
+            for section_name, section_bucket in user_bucket.items():
+                records = section_bucket.get("records", []) if isinstance(section_bucket, dict) else []
+                if not isinstance(records, list):
+                    continue
+                for record in records:
+                    if isinstance(record, dict):
+                        _insert_ledger_row(conn, user_key, str(section_name), record)
+                        migrated += 1
+
+    # Tabung records used to live inside the core tabung section.
+    for row in conn.execute(
+        f"SELECT user_id, payload_json FROM {MMHELPER_USER_SECTIONS_TABLE} WHERE section = 'tabung'"
+    ).fetchall():
+        section = _decode_json_dict(row["payload_json"])
+        tabung_data = section.get("data")
+        if not isinstance(tabung_data, dict) or not isinstance(tabung_data.get("records"), list):
+            continue
+        records = [r for r in tabung_data.pop("records") if isinstance(r, dict)]
+        for record in records:
+            _insert_ledger_row(conn, row["user_id"], "tabung", record)
+            migrated += 1
+        tabung_data["record_count"] = len(records)
+        conn.execute(
+            f"UPDATE {MMHELPER_USER_SECTIONS_TABLE} SET payload_json = ? WHERE user_id = ? AND section = 'tabung'",
+            (json.dumps(section, ensure_ascii=False), row["user_id"]),
+        )
+
+    _write_kv_json(conn, MMHELPER_LEDGER_MIGRATION_KV_KEY, {"migrated_records": migrated})
+    _bump_core_version(conn)
+
+
+@shared_db.schema_once("mmhelper_ledger_storage")
+def _ensure_ledger_storage(conn: sqlite3.Connection) -> None:
+    _ensure_core_storage(conn)
+    _ensure_mmhelper_activity_table(conn)
+    _ensure_mmhelper_ledger_table(conn)
+    _migrate_activity_to_ledger_if_needed(conn)
+
+
+def _write_activity_month_mirror(conn: sqlite3.Connection, month_key: str) -> None:
+    month_prefix = month_key.replace("_", "-")
+    data = _default_activity_db(month_key)
+    rows = conn.execute(
+        f"""
+        SELECT user_id, section, payload_json
+        FROM {MMHELPER_LEDGER_TABLE}
+        WHERE record_date >= ? AND record_date < ? AND section != 'tabung'
+        ORDER BY entry_id
+        """,
+        (f"{month_prefix}-01", f"{month_prefix}-99"),
+    ).fetchall()
+    for row in rows:
+        user_bucket = data["users"].setdefault(str(row["user_id"]), {})
+        section_bucket = user_bucket.setdefault(str(row["section"]), {"records": []})
+        section_bucket["records"].append(_decode_json_dict(row["payload_json"]))
     # Keep JSON mirror for compatibility/debug.
     _save_json_dict(_activity_db_path(month_key), data)
-    return data
 
 
-def _save_activity_db(month_key: str, data: dict[str, Any]) -> None:
+def _iter_activity_month_keys() -> list[str]:
     try:
         with _connect_shared_db() as conn:
-            _ensure_mmhelper_activity_table(conn)
-            _write_activity_to_sqlite(conn, month_key, data)
+            _ensure_ledger_storage(conn)
+            rows = conn.execute(
+                f"""
+                SELECT DISTINCT substr(record_date, 1, 7) AS month
+                FROM {MMHELPER_LEDGER_TABLE}
+                WHERE record_date != ''
+                ORDER BY month
+                """
+            ).fetchall()
     except sqlite3.Error:
-        pass
-    _save_json_dict(_activity_db_path(month_key), data)
+        return []
+    return [str(row["month"]).replace("-", "_") for row in rows]
 
 
-def _iter_activity_month_keys() -> list[str]:
-    month_keys: list[str] = []
+def _append_ledger_record(user_id: int, section_name: str, record: dict[str, Any]) -> None:
+    with _unit_of_work() as uow:
+        uow.ledger.append((str(user_id), section_name, record))
+
+
+def _query_ledger(sql: str, params: tuple[Any, ...]) -> list[sqlite3.Row]:
+    cache_key = (sql, params)
     try:
         with _connect_shared_db() as conn:
-            _ensure_mmhelper_activity_table(conn)
-            rows = conn.execute(f"SELECT month_key FROM {MMHELPER_ACTIVITY_TABLE}").fetchall()
-            for row in rows:
-                key = str(row["month_key"] or "").strip()
-                if key:
-                    month_keys.append(key)
+            version = _sync_core_cache(conn)
+            with _CORE_CACHE_LOCK:
+                cached = _core_cache["ledger"].get(cache_key)
+            if cached is not None:
+                return cached
+            rows = conn.execute(sql, params).fetchall()
     except sqlite3.Error:
-        pass
+        _invalidate_core_cache()
+        return []
 
-    if ACTIVITY_DB_DIR.exists():
-        for path in ACTIVITY_DB_DIR.glob(f"{ACTIVITY_FILE_PREFIX}*.json"):
-            stem = path.stem
-            raw = stem[len(ACTIVITY_FILE_PREFIX) :]
-            parts = raw.split("_")
-            if len(parts) != 2:
-                continue
-            year, month = parts
-            if not (year.isdigit() and month.isdigit()):
-                continue
-            month_int = int(month)
-            if month_int < 1 or month_int > 12:
-                continue
-            month_keys.append(f"{year}_{month.zfill(2)}")
-    return sorted(set(month_keys))
+    with _CORE_CACHE_LOCK:
+        if _core_cache["version"] == version:
+            ledger_cache = _core_cache["ledger"]
+            if len(ledger_cache) >= CORE_CACHE_LEDGER_MAX_ENTRIES:
+                ledger_cache.clear()
+            ledger_cache[cache_key] = rows
+    return rows
 
 
-def _iter_month_keys_between(start_date: date, end_date: date) -> Iterator[str]:
-    cur = start_date.replace(day=1)
-    end_month = end_date.replace(day=1)
-    while cur <= end_month:
-        yield _month_key_from_date(cur)
-        if cur.month == 12:
-            cur = cur.replace(year=cur.year + 1, month=1)
-        else:
-            cur = cur.replace(month=cur.month + 1)
+def _ledger_records_between(
+    user_id: int,
+    section_names: tuple[str, ...],
+    start_date: date,
+    end_date: date,
+) -> list[tuple[str, dict[str, Any]]]:
+    placeholders = ",".join("?" for _ in section_names)
+    rows = _query_ledger(
+        f"""
+        SELECT section, payload_json
+        FROM {MMHELPER_LEDGER_TABLE}
+        WHERE user_id = ? AND section IN ({placeholders}) AND record_date BETWEEN ? AND ?
+        ORDER BY entry_id
+        """,
+        (str(user_id), *section_names, start_date.isoformat(), end_date.isoformat()),
+    )
+    return [(str(row["section"]), _decode_json_dict(row["payload_json"])) for row in rows]
 
 
-def _get_activity_records_from_db(activity_db: dict[str, Any], user_id: int, section_name: str) -> list[dict[str, Any]]:
-    users = activity_db.get("users", {})
-    user_bucket = users.get(str(user_id), {})
-    section_bucket = user_bucket.get(section_name, {})
-    records = section_bucket.get("records", [])
-    if not isinstance(records, list):
-        return []
-    return [r for r in records if isinstance(r, dict)]
+def _sum_ledger_between(user_id: int, section_name: str, column: str, start_date: date, end_date: date) -> float:
+    rows = _query_ledger(
+        f"""
+        SELECT COALESCE(SUM({column}), 0) AS total
+        FROM {MMHELPER_LEDGER_TABLE}
+        WHERE user_id = ? AND section = ? AND record_date BETWEEN ? AND ?
+        """,
+        (str(user_id), section_name, start_date.isoformat(), end_date.isoformat()),
+    )
+    return float(rows[0]["total"]) if rows else 0.0
 
 
-def _append_monthly_record(user_id: int, section_name: str, record: dict[str, Any], record_date: date) -> None:
-    month_key = _month_key_from_date(record_date)
-    db = _load_activity_db(month_key)
-    users = db.setdefault("users", {})
-    user_bucket = users.setdefault(str(user_id), {})
-    section_bucket = user_bucket.setdefault(section_name, {"records": []})
-    records = section_bucket.setdefault("records", [])
-    if not isinstance(records, list):
-        records = []
-        section_bucket["records"] = records
-    records.append(record)
-    _save_activity_db(month_key, db)
+def _count_ledger_records(user_id: int, section_name: str) -> int:
+    rows = _query_ledger(
+        f"SELECT COUNT(*) AS c FROM {MMHELPER_LEDGER_TABLE} WHERE user_id = ? AND section = ?",
+        (str(user_id), section_name),
+    )
+    return int(rows[0]["c"]) if rows else 0
+
+
+# Daily balance snapshots: one row per user per active date. Day columns hold
+# that date's totals; cum_* / balance_flow_usd are running totals through the
+# end of the date, so any as-of lookup is a single indexed read.
+_SNAPSHOT_FLOW_SECTIONS: dict[str, tuple[str, str, float]] = {
+    "deposit_activity": ("deposit_usd", "amount_usd", 1.0),
+    "withdrawal_activity": ("withdrawal_usd", "amount_usd", -1.0),
+    "trading_activity": ("trading_net_usd", "net_usd", 1.0),
+    "balance_adjustment": ("adjustment_net_usd", "net_usd", 1.0),
+}
+
+
+@shared_db.schema_once(MMHELPER_SNAPSHOT_TABLE)
+def _ensure_mmhelper_snapshot_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MMHELPER_SNAPSHOT_TABLE} (
+            user_id TEXT NOT NULL,
+            snap_date TEXT NOT NULL,
+            deposit_usd REAL NOT NULL DEFAULT 0,
+            withdrawal_usd REAL NOT NULL DEFAULT 0,
+            trading_net_usd REAL NOT NULL DEFAULT 0,
+            adjustment_net_usd REAL NOT NULL DEFAULT 0,
+            cum_deposit_usd REAL NOT NULL DEFAULT 0,
+            cum_withdrawal_usd REAL NOT NULL DEFAULT 0,
+            cum_trading_net_usd REAL NOT NULL DEFAULT 0,
+            cum_adjustment_net_usd REAL NOT NULL DEFAULT 0,
+            balance_flow_usd REAL NOT NULL DEFAULT 0,
+            tabung_balance_usd REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, snap_date)
+        )
+        """
+    )
+
+
+def _snapshot_record_value(section_name: str, record: dict[str, Any]) -> float:
+    if _SNAPSHOT_FLOW_SECTIONS[section_name][1] == "amount_usd":
+        return _to_float(record.get("amount_usd", 0.0))
+    return _record_net_usd(record)
+
+
+def _rebuild_daily_snapshots(conn: sqlite3.Connection) -> int:
+    daily: dict[tuple[str, str], list[float]] = {}
+    tabung_last: dict[tuple[str, str], tuple[int, float]] = {}
+    day_columns = [column for column, _, _ in _SNAPSHOT_FLOW_SECTIONS.values()]
+
+    def add_flow(user_key: str, section_name: str, rec_date: str, value: float) -> None:
+        bucket = daily.setdefault((user_key, rec_date), [0.0, 0.0, 0.0, 0.0])
+        bucket[day_columns.index(_SNAPSHOT_FLOW_SECTIONS[section_name][0])] += value
+
+    # Legacy records still stored inside core sections.
+    placeholders = ",".join("?" for _ in _SNAPSHOT_FLOW_SECTIONS)
+    for row in conn.execute(
+        f"SELECT user_id, section, payload_json FROM {MMHELPER_USER_SECTIONS_TABLE} WHERE section IN ({placeholders})",
+        tuple(_SNAPSHOT_FLOW_SECTIONS),
+    ).fetchall():
+        section_data = _decode_json_dict(row["payload_json"]).get("data")
+        records = section_data.get("records", []) if isinstance(section_data, dict) else section_data
+        if not isinstance(records, list):
+            continue
+        for record in records:
+            rec_date = _record_date_myt(record) if isinstance(record, dict) else None
+            if rec_date is not None:
+                value = _snapshot_record_value(str(row["section"]), record)
+                add_flow(str(row["user_id"]), str(row["section"]), rec_date.isoformat(), value)
+
+    for row in conn.execute(
+        f"""
+        SELECT entry_id, user_id, section, record_date, amount_usd, net_usd, payload_json
+        FROM {MMHELPER_LEDGER_TABLE}
+        WHERE record_date != ''
+        ORDER BY entry_id
+        """
+    ):
+        user_key = str(row["user_id"])
+        section_name = str(row["section"])
+        if section_name in _SNAPSHOT_FLOW_SECTIONS:
+            value = float(row[_SNAPSHOT_FLOW_SECTIONS[section_name][1]])
+            add_flow(user_key, section_name, str(row["record_date"]), value)
+        elif section_name == "tabung":
+            record = _decode_json_dict(row["payload_json"])
+            if "balance_after_usd" in record:
+                tabung_last[(user_key, str(row["record_date"]))] = (
+                    int(row["entry_id"]),
+                    _to_float(record.get("balance_after_usd")),
+                )
+                daily.setdefault((user_key, str(row["record_date"])), [0.0, 0.0, 0.0, 0.0])
+
+    conn.execute(f"DELETE FROM {MMHELPER_SNAPSHOT_TABLE}")
+    cum: dict[str, list[float]] = {}
+    tabung_best: dict[str, tuple[int, float]] = {}
+    for user_key, snap_date in sorted(daily):
+        day = daily[(user_key, snap_date)]
+        totals = cum.setdefault(user_key, [0.0, 0.0, 0.0, 0.0])
+        for idx, value in enumerate(day):
+            totals[idx] += value
+        # Tabung as-of follows the newest ledger entry dated on or before this date.
+        candidate = tabung_last.get((user_key, snap_date))
+        if candidate is not None and candidate[0] > tabung_best.get(user_key, (-1, 0.0))[0]:
+            tabung_best[user_key] = candidate
+        conn.execute(
+            f"""
+            INSERT INTO {MMHELPER_SNAPSHOT_TABLE}
+            (user_id, snap_date, deposit_usd, withdrawal_usd, trading_net_usd, adjustment_net_usd,
+             cum_deposit_usd, cum_withdrawal_usd, cum_trading_net_usd, cum_adjustment_net_usd,
+             balance_flow_usd, tabung_balance_usd)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                user_key,
+                snap_date,
+                *day,
+                *totals,
+                totals[0] - totals[1] + totals[2] + totals[3],
+                tabung_best.get(user_key, (-1, 0.0))[1],
+            ),
+        )
+    return len(daily)
+
+
+def _migrate_daily_snapshots_if_needed(conn: sqlite3.Connection) -> None:
+    if _read_kv_json(conn, MMHELPER_SNAPSHOT_MIGRATION_KV_KEY) is not None:
+        return
+    rows = _rebuild_daily_snapshots(conn)
+    _write_kv_json(conn, MMHELPER_SNAPSHOT_MIGRATION_KV_KEY, {"snapshot_rows": rows})
+    _bump_core_version(conn)
+
+
+@shared_db.schema_once("mmhelper_snapshot_storage")
+def _ensure_snapshot_storage(conn: sqlite3.Connection) -> None:
+    _ensure_ledger_storage(conn)
+    _ensure_mmhelper_snapshot_table(conn)
+    _migrate_daily_snapshots_if_needed(conn)
+
+
+def _apply_snapshot_record(conn: sqlite3.Connection, user_id: int | str, section_name: str, record: dict[str, Any]) -> None:
+    rec_date = _record_date_myt(record)
+    if rec_date is None:
+        return
+    if section_name == "tabung":
+        if "balance_after_usd" not in record:
+            return
+    elif section_name not in _SNAPSHOT_FLOW_SECTIONS:
+        return
+
+    user_key = str(user_id)
+    snap_date = rec_date.isoformat()
+    # New date rows start from the previous date's running totals.
+    conn.execute(
+        f"""
+        INSERT OR IGNORE INTO {MMHELPER_SNAPSHOT_TABLE}
+        (user_id, snap_date, cum_deposit_usd, cum_withdrawal_usd, cum_trading_net_usd,
+         cum_adjustment_net_usd, balance_flow_usd, tabung_balance_usd)
+        SELECT user_id, ?, cum_deposit_usd, cum_withdrawal_usd, cum_trading_net_usd,
+               cum_adjustment_net_usd, balance_flow_usd, tabung_balance_usd
+        FROM {MMHELPER_SNAPSHOT_TABLE}
+        WHERE user_id = ? AND snap_date < ?
+        ORDER BY snap_date DESC
+        LIMIT 1
+        """,
+        (snap_date, user_key, snap_date),
+    )
+    conn.execute(
+        f"INSERT OR IGNORE INTO {MMHELPER_SNAPSHOT_TABLE} (user_id, snap_date) VALUES (?, ?)",
+        (user_key, snap_date),
+    )
+
+    if section_name == "tabung":
+        # The newest tabung entry wins for every date from its own onward.
+        conn.execute(
+            f"UPDATE {MMHELPER_SNAPSHOT_TABLE} SET tabung_balance_usd = ? WHERE user_id = ? AND snap_date >= ?",
+            (_to_float(record.get("balance_after_usd")), user_key, snap_date),
+        )
+        return
+
+    column, _, sign = _SNAPSHOT_FLOW_SECTIONS[section_name]
+    value = _snapshot_record_value(section_name, record)
+    conn.execute(
+        f"UPDATE {MMHELPER_SNAPSHOT_TABLE} SET {column} = {column} + ? WHERE user_id = ? AND snap_date = ?",
+        (value, user_key, snap_date),
+    )
+    conn.execute(
+        f"""
+        UPDATE {MMHELPER_SNAPSHOT_TABLE}
+        SET cum_{column} = cum_{column} + ?, balance_flow_usd = balance_flow_usd + ?
+        WHERE user_id = ? AND snap_date >= ?
+        """,
+        (value, sign * value, user_key, snap_date),
+    )
+
+
+def _snapshot_as_of(user_id: int, as_of_date: date) -> dict[str, float]:
+    rows = _query_ledger(
+        f"""
+        SELECT cum_deposit_usd, cum_withdrawal_usd, cum_trading_net_usd, cum_adjustment_net_usd,
+               balance_flow_usd, tabung_balance_usd
+        FROM {MMHELPER_SNAPSHOT_TABLE}
+        WHERE user_id = ? AND snap_date <= ?
+        ORDER BY snap_date DESC
+        LIMIT 1
+        """,
+        (str(user_id), as_of_date.isoformat()),
+    )
+    if not rows:
+        return {
+            "deposit_usd": 0.0,
+            "withdrawal_usd": 0.0,
+            "trading_net_usd": 0.0,
+            "adjustment_net_usd": 0.0,
+            "balance_flow_usd": 0.0,
+            "tabung_balance_usd": 0.0,
+        }
+    row = rows[0]
+    return {
+        "deposit_usd": float(row["cum_deposit_usd"]),
+        "withdrawal_usd": float(row["cum_withdrawal_usd"]),
+        "trading_net_usd": float(row["cum_trading_net_usd"]),
+        "adjustment_net_usd": float(row["cum_adjustment_net_usd"]),
+        "balance_flow_usd": float(row["balance_flow_usd"]),
+        "tabung_balance_usd": float(row["tabung_balance_usd"]),
+    }
+
+
+def _snapshot_flows_between(user_id: int, start_date: date, end_date: date) -> dict[str, float]:
+    end_totals = _snapshot_as_of(user_id, end_date)
+    if start_date <= date.min:
+        return end_totals
+    before_totals = _snapshot_as_of(user_id, start_date - timedelta(days=1))
+    return {key: end_totals[key] - before_totals[key] for key in end_totals}
 
 
 def _extract_profit_from_obj(obj: Any) -> float:
@@ -498,11 +1663,15 @@ def _sum_records(records: Any, field: str) -> float:
 
 
 def _get_user_sections(user_id: int) -> dict[str, Any]:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id), {})
+    user = _load_user_obj(user_id) or {}
     return user.get("sections", {})
 
 
+def get_user_sections(user_id: int) -> dict[str, Any]:
+    sections = _get_user_sections(user_id)
+    return sections if isinstance(sections, dict) else {}
+
+
 def _record_date_myt(record: dict[str, Any]) -> date | None:
     tzinfo = malaysia_now().tzinfo
 
@@ -541,9 +1710,9 @@ def _record_net_usd(record: dict[str, Any]) -> float:
     return abs(amount)
 
 
-def _iter_legacy_section_records(user_id: int, section_name: str) -> list[dict[str, Any]]:
-    sections = _get_user_sections(user_id)
-    section_data = sections.get(section_name, {}).get("data")
+def _legacy_records_from_sections(sections: dict[str, Any], section_name: str) -> list[dict[str, Any]]:
+    section = sections.get(section_name, {}) if isinstance(sections, dict) else {}
+    section_data = section.get("data") if isinstance(section, dict) else None
     if isinstance(section_data, dict):
         records = section_data.get("records", [])
         if isinstance(records, list):
@@ -553,38 +1722,50 @@ def _iter_legacy_section_records(user_id: int, section_name: str) -> list[dict[s
     return []
 
 
-def _iter_section_records_between(user_id: int, section_name: str, start_date: date, end_date: date) -> Iterator[dict[str, Any]]:
-    # Legacy records still living in core DB.
+def _iter_legacy_section_records(user_id: int, section_name: str) -> list[dict[str, Any]]:
+    return _legacy_records_from_sections(_get_user_sections(user_id), section_name)
+
+
+def _legacy_section_records_between(user_id: int, section_name: str, start_date: date, end_date: date) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
     for record in _iter_legacy_section_records(user_id, section_name):
         rec_date = _record_date_myt(record)
         if rec_date is None:
             continue
         if start_date <= rec_date <= end_date:
-            yield record
+            out.append(record)
+    return out
 
-    # New records from monthly activity DB.
-    for month_key in _iter_month_keys_between(start_date, end_date):
-        monthly_db = _load_activity_db(month_key)
-        for record in _get_activity_records_from_db(monthly_db, user_id, section_name):
-            rec_date = _record_date_myt(record)
-            if rec_date is None:
-                continue
-            if start_date <= rec_date <= end_date:
-                yield record
 
+def _iter_section_records_between(user_id: int, section_name: str, start_date: date, end_date: date) -> Iterator[dict[str, Any]]:
+    # Legacy records still living in core DB.
+    yield from _legacy_section_records_between(user_id, section_name, start_date, end_date)
 
-def _sum_trading_net_between(user_id: int, start_date: date, end_date: date) -> float:
+    # New records from the activity ledger.
+    for _, record in _ledger_records_between(user_id, (section_name,), start_date, end_date):
+        yield record
+
+
+def _sum_amount_usd_between(user_id: int, section_name: str, start_date: date, end_date: date) -> float:
     total = 0.0
-    for record in _iter_section_records_between(user_id, "trading_activity", start_date, end_date):
-        total += _record_net_usd(record)
-    return total
+    for record in _legacy_section_records_between(user_id, section_name, start_date, end_date):
+        total += _to_float(record.get("amount_usd", 0.0))
+    return total + _sum_ledger_between(user_id, section_name, "amount_usd", start_date, end_date)
 
 
-def _sum_adjustment_net_between(user_id: int, start_date: date, end_date: date) -> float:
+def _sum_net_usd_between(user_id: int, section_name: str, start_date: date, end_date: date) -> float:
     total = 0.0
-    for record in _iter_section_records_between(user_id, "balance_adjustment", start_date, end_date):
+    for record in _legacy_section_records_between(user_id, section_name, start_date, end_date):
         total += _record_net_usd(record)
-    return total
+    return total + _sum_ledger_between(user_id, section_name, "net_usd", start_date, end_date)
+
+
+def _sum_trading_net_between(user_id: int, start_date: date, end_date: date) -> float:
+    return _sum_net_usd_between(user_id, "trading_activity", start_date, end_date)
+
+
+def _sum_adjustment_net_between(user_id: int, start_date: date, end_date: date) -> float:
+    return _sum_net_usd_between(user_id, "balance_adjustment", start_date, end_date)
 
 
 def _is_rollup_valid(rollup: Any) -> bool:
@@ -618,60 +1799,92 @@ def _normalize_rollup(rollup: dict[str, Any]) -> dict[str, Any]:
     return out
 
 
-def _rebuild_rollup_for_user(user_id: int, user_obj: dict[str, Any]) -> dict[str, Any]:
+ROLLUP_SECTION_FIELDS: dict[str, tuple[str, str, str]] = {
+    "deposit_activity": ("total_deposit_usd", "deposit_record_count", "amount_usd"),
+    "withdrawal_activity": ("total_withdrawal_usd", "withdrawal_record_count", "amount_usd"),
+    "trading_activity": ("total_trading_net_usd", "trading_record_count", "net_usd"),
+    "balance_adjustment": ("total_balance_adjustment_usd", "balance_adjustment_record_count", "net_usd"),
+}
+ROLLUP_DRIFT_TOLERANCE_USD = 1e-6
+
+
+def _legacy_rollup_records(user_obj: dict[str, Any], section_name: str) -> list[dict[str, Any]]:
+    section = user_obj.get("sections", {}).get(section_name, {})
+    data = section.get("data", {}) if isinstance(section, dict) else {}
+    records = data.get("records", []) if isinstance(data, dict) else []
+    return [r for r in records if isinstance(r, dict)] if isinstance(records, list) else []
+
+
+def _legacy_record_value(section_name: str, record: dict[str, Any]) -> float:
+    if ROLLUP_SECTION_FIELDS[section_name][2] == "amount_usd":
+        return _to_float(record.get("amount_usd", 0))
+    return _record_net_usd(record)
+
+
+def _compute_rollup(user_obj: dict[str, Any], ledger_rows: list[sqlite3.Row]) -> dict[str, Any]:
+    """Full recompute from legacy in-core records plus per-section ledger aggregates."""
     rollup = _default_rollup()
-    sections = user_obj.get("sections", {})
+    for section_name, (total_key, count_key, _) in ROLLUP_SECTION_FIELDS.items():
+        for record in _legacy_rollup_records(user_obj, section_name):
+            rollup[total_key] += _legacy_record_value(section_name, record)
+            rollup[count_key] += 1
+
+    for row in ledger_rows:
+        fields = ROLLUP_SECTION_FIELDS.get(str(row["section"]))
+        if fields is None:
+            continue
+        total_key, count_key, column = fields
+        rollup[total_key] += float(row["amount"] if column == "amount_usd" else row["net"])
+        rollup[count_key] += int(row["c"])
+        if row["last_saved_at"] and str(row["last_saved_at"]) > rollup["last_activity_at"]:
+            rollup["last_activity_at"] = str(row["last_saved_at"])
+    return _normalize_rollup(rollup)
 
-    dep_legacy = sections.get("deposit_activity", {}).get("data", {}).get("records", [])
-    wdr_legacy = sections.get("withdrawal_activity", {}).get("data", {}).get("records", [])
-    trd_legacy = sections.get("trading_activity", {}).get("data", {}).get("records", [])
-    adj_legacy = sections.get("balance_adjustment", {}).get("data", {}).get("records", [])
-
-    if isinstance(dep_legacy, list):
-        rollup["total_deposit_usd"] += _sum_records(dep_legacy, "amount_usd")
-        rollup["deposit_record_count"] += len([r for r in dep_legacy if isinstance(r, dict)])
-    if isinstance(wdr_legacy, list):
-        rollup["total_withdrawal_usd"] += _sum_records(wdr_legacy, "amount_usd")
-        rollup["withdrawal_record_count"] += len([r for r in wdr_legacy if isinstance(r, dict)])
-    if isinstance(trd_legacy, list):
-        for rec in trd_legacy:
-            if isinstance(rec, dict):
-                rollup["total_trading_net_usd"] += _record_net_usd(rec)
-                rollup["trading_record_count"] += 1
-    if isinstance(adj_legacy, list):
-        for rec in adj_legacy:
-            if isinstance(rec, dict):
-                net = _record_net_usd(rec)
-                rollup["total_balance_adjustment_usd"] += net
-                rollup["balance_adjustment_record_count"] += 1
-
-    for month_key in _iter_activity_month_keys():
-        monthly_db = _load_activity_db(month_key)
-
-        dep_records = _get_activity_records_from_db(monthly_db, user_id, "deposit_activity")
-        wdr_records = _get_activity_records_from_db(monthly_db, user_id, "withdrawal_activity")
-        trd_records = _get_activity_records_from_db(monthly_db, user_id, "trading_activity")
-        adj_records = _get_activity_records_from_db(monthly_db, user_id, "balance_adjustment")
-
-        rollup["total_deposit_usd"] += _sum_records(dep_records, "amount_usd")
-        rollup["total_withdrawal_usd"] += _sum_records(wdr_records, "amount_usd")
-        for rec in trd_records:
-            rollup["total_trading_net_usd"] += _record_net_usd(rec)
-        for rec in adj_records:
-            net = _record_net_usd(rec)
-            rollup["total_balance_adjustment_usd"] += net
-
-        rollup["deposit_record_count"] += len(dep_records)
-        rollup["withdrawal_record_count"] += len(wdr_records)
-        rollup["trading_record_count"] += len(trd_records)
-        rollup["balance_adjustment_record_count"] += len(adj_records)
 
+def _ledger_rollup_rows(conn: sqlite3.Connection, user_id: int | str) -> list[sqlite3.Row]:
+    return conn.execute(
+        f"""
+        SELECT section, COUNT(*) AS c, COALESCE(SUM(amount_usd), 0) AS amount,
+               COALESCE(SUM(net_usd), 0) AS net, MAX(saved_at) AS last_saved_at
+        FROM {MMHELPER_LEDGER_TABLE}
+        WHERE user_id = ?
+        GROUP BY section
+        """,
+        (str(user_id),),
+    ).fetchall()
+
+
+def _provisional_rollup(user_id: int, user_obj: dict[str, Any]) -> dict[str, Any]:
+    # Request-path stand-in when stats_rollup is missing: totals come from the
+    # latest daily snapshot and counts from the ledger index, so no record is
+    # parsed. verify_stats_rollups() later corrects any drift (e.g. undated rows).
+    rollup = _default_rollup()
+    totals = _snapshot_as_of(user_id, date.max)
+    rollup["total_deposit_usd"] = totals["deposit_usd"]
+    rollup["total_withdrawal_usd"] = totals["withdrawal_usd"]
+    rollup["total_trading_net_usd"] = totals["trading_net_usd"]
+    rollup["total_balance_adjustment_usd"] = totals["adjustment_net_usd"]
+
+    for section_name, (total_key, count_key, _) in ROLLUP_SECTION_FIELDS.items():
+        for record in _legacy_rollup_records(user_obj, section_name):
+            rollup[count_key] += 1
+            if _record_date_myt(record) is None:
+                rollup[total_key] += _legacy_record_value(section_name, record)
+
+    rows = _query_ledger(
+        f"SELECT section, COUNT(*) AS c FROM {MMHELPER_LEDGER_TABLE} WHERE user_id = ? GROUP BY section",
+        (str(user_id),),
+    )
+    for row in rows:
+        fields = ROLLUP_SECTION_FIELDS.get(str(row["section"]))
+        if fields is not None:
+            rollup[fields[1]] += int(row["c"])
     return _normalize_rollup(rollup)
 
 
+@_transactional
 def _get_user_rollup(user_id: int) -> dict[str, Any]:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not isinstance(user, dict):
         return _default_rollup()
 
@@ -679,11 +1892,83 @@ def _get_user_rollup(user_id: int) -> dict[str, Any]:
     if _is_rollup_valid(rollup):
         return _normalize_rollup(rollup)
 
-    rebuilt = _rebuild_rollup_for_user(user_id, user)
-    user["stats_rollup"] = rebuilt
+    provisional = _provisional_rollup(user_id, user)
+    user["stats_rollup"] = provisional
     user["updated_at"] = malaysia_now().isoformat()
-    save_core_db(db)
-    return rebuilt
+    _save_user_obj(user_id, user)
+    return provisional
+
+
+def _rollup_drift(stored: dict[str, Any], expected: dict[str, Any]) -> dict[str, list[Any]]:
+    current = _normalize_rollup(stored)
+    drift: dict[str, list[Any]] = {}
+    for total_key, count_key, _ in ROLLUP_SECTION_FIELDS.values():
+        if abs(current[total_key] - expected[total_key]) > ROLLUP_DRIFT_TOLERANCE_USD:
+            drift[total_key] = [current[total_key], expected[total_key]]
+        if current[count_key] != expected[count_key]:
+            drift[count_key] = [current[count_key], expected[count_key]]
+    return drift
+
+
+def verify_stats_rollups(batch_size: int = 200, fix: bool = True) -> dict[str, Any]:
+    """Recompute every user's stats_rollup from the ledger in batches; report and repair drift."""
+    report: dict[str, Any] = {"checked": 0, "initialized": 0, "drifted": 0, "fixed": 0, "drift": {}, "error": ""}
+    last_user_key = ""
+    while True:
+        fixed_in_batch = 0
+        try:
+            with _connect_shared_db() as conn:
+                _ensure_snapshot_storage(conn)
+                # One write transaction per batch so request-path appends cannot
+                # interleave between the recompute and the repair.
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                user_keys = [
+                    str(row["user_id"])
+                    for row in conn.execute(
+                        f"SELECT user_id FROM {MMHELPER_USERS_TABLE} WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                        (last_user_key, max(1, int(batch_size))),
+                    ).fetchall()
+                ]
+                for user_key in user_keys:
+                    user_obj = _read_user_from_tables(conn, user_key)
+                    if user_obj is None:
+                        continue
+                    report["checked"] += 1
+                    stored = user_obj.get("stats_rollup")
+                    expected = _compute_rollup(user_obj, _ledger_rollup_rows(conn, user_key))
+                    if not _is_rollup_valid(stored):
+                        report["initialized"] += 1
+                    else:
+                        drift = _rollup_drift(stored, expected)
+                        if not drift:
+                            continue
+                        report["drifted"] += 1
+                        report["drift"][user_key] = drift
+                    if not fix:
+                        continue
+                    if isinstance(stored, dict):
+                        stored_last = str(stored.get("last_activity_at") or "")
+                        if stored_last > expected["last_activity_at"]:
+                            expected["last_activity_at"] = stored_last
+                    user_obj["stats_rollup"] = expected
+                    _write_user_to_tables(conn, user_key, user_obj)
+                    fixed_in_batch += 1
+                if fixed_in_batch:
+                    _bump_core_version(conn)
+        except sqlite3.Error as exc:
+            report["error"] = str(exc)
+            _invalidate_core_cache()
+            break
+
+        report["fixed"] += fixed_in_batch
+        if fixed_in_batch:
+            _invalidate_core_cache()
+            _schedule_json_mirror(core=True)
+        if len(user_keys) < max(1, int(batch_size)):
+            break
+        last_user_key = user_keys[-1]
+    return report
 
 
 def _bump_rollup(
@@ -714,38 +1999,31 @@ def _bump_rollup(
 
 
 def has_initial_setup(user_id: int) -> bool:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id), {})
+    user = _load_user_obj(user_id) or {}
     sections = user.get("sections", {})
     return bool(sections.get("initial_setup"))
 
 
 def has_tnc_accepted(user_id: int) -> bool:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id), {})
+    user = _load_user_obj(user_id) or {}
     sections = user.get("sections", {})
     tnc_section = sections.get("tnc_acceptance", {})
     tnc_data = tnc_section.get("data", {}) if isinstance(tnc_section, dict) else {}
     return bool(tnc_data.get("accepted"))
 
 
+@_transactional
 def save_tnc_acceptance(user_id: int, telegram_name: str, accepted: bool, telegram_username: str = "") -> None:
     now = _user_now(user_id)
     saved_at_iso = now.isoformat()
     saved_date = now.strftime("%Y-%m-%d")
     saved_time = now.strftime("%H:%M:%S")
 
-    db = load_core_db()
-    users = db.setdefault("users", {})
-    user_key = str(user_id)
-    user_obj = users.setdefault(
-        user_key,
-        {
-            "user_id": user_id,
-            "telegram_name": telegram_name,
-            "sections": {},
-        },
-    )
+    user_obj = _load_user_obj(user_id) or {
+        "user_id": user_id,
+        "telegram_name": telegram_name,
+        "sections": {},
+    }
 
     user_obj["user_id"] = user_id
     user_obj["telegram_name"] = telegram_name
@@ -765,12 +2043,11 @@ def save_tnc_acceptance(user_id: int, telegram_name: str, accepted: bool, telegr
         "data": {"accepted": bool(accepted)},
     }
 
-    save_core_db(db)
+    _save_user_obj(user_id, user_obj)
 
 
 def get_initial_setup_summary(user_id: int) -> dict[str, Any]:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id), {})
+    user = _load_user_obj(user_id) or {}
     init_section = user.get("sections", {}).get("initial_setup", {})
     init_data = init_section.get("data", {})
     return {
@@ -786,8 +2063,7 @@ def get_current_profit_usd(user_id: int) -> float:
         return float(rollup["total_trading_net_usd"])
 
     # Fallback for old odd schemas.
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id), {})
+    user = _load_user_obj(user_id) or {}
     sections = user.get("sections", {})
 
     trading_section = sections.get("trading_activity", {})
@@ -926,18 +2202,22 @@ def _ensure_tabung_section(user: dict[str, Any], user_id: int, saved_at_iso: str
             "saved_date": saved_date,
             "saved_time": saved_time,
             "timezone": "Asia/Kuala_Lumpur",
-            "data": {"balance_usd": 0.0, "records": []},
+            "data": {"balance_usd": 0.0, "record_count": 0},
         },
     )
     tabung_data = tabung_section.setdefault("data", {})
-    records = tabung_data.setdefault("records", [])
-    if not isinstance(records, list):
-        records = []
-        tabung_data["records"] = records
+    # New tabung records are collected here and written to the ledger on commit.
+    records: list[dict[str, Any]] = []
     current_tabung_balance = get_tabung_balance_usd(user_id)
     return sections, tabung_section, tabung_data, records, current_tabung_balance
 
 
+def _append_tabung_records(user_id: int, tabung_data: dict[str, Any], records: list[dict[str, Any]]) -> None:
+    for record in records:
+        _append_ledger_record(user_id, "tabung", record)
+    tabung_data["record_count"] = _to_int(tabung_data.get("record_count")) + len(records)
+
+
 def _append_balance_adjustment_transfer(
     user: dict[str, Any],
     user_id: int,
@@ -946,10 +2226,9 @@ def _append_balance_adjustment_transfer(
     saved_at_iso: str,
     saved_date: str,
     saved_time: str,
-    record_date: date,
 ) -> None:
     sections = user.setdefault("sections", {})
-    _append_monthly_record(
+    _append_ledger_record(
         user_id,
         "balance_adjustment",
         {
@@ -961,7 +2240,6 @@ def _append_balance_adjustment_transfer(
             "saved_time": saved_time,
             "timezone": "Asia/Kuala_Lumpur",
         },
-        record_date,
     )
 
     adjustment_section = sections.setdefault(
@@ -993,6 +2271,15 @@ def _append_balance_adjustment_transfer(
 
 def apply_tabung_update_action(user_id: int, action: str, amount_usd: float) -> tuple[bool, str]:
     action = str(action or "").strip().lower()
+    now = _user_now(user_id)
+    ok, message = _stage_tabung_update_action(user_id, action, amount_usd, now)
+    if ok and action == "save" and _is_daily_target_hit_on_date(user_id, now.date()):
+        mark_daily_target_reached_today(user_id)
+    return ok, message
+
+
+@_transactional
+def _stage_tabung_update_action(user_id: int, action: str, amount_usd: float, now: datetime) -> tuple[bool, str]:
     amount = _to_float(amount_usd)
     if amount <= 0:
         return False, "Jumlah kena lebih dari 0."
@@ -1001,12 +2288,10 @@ def apply_tabung_update_action(user_id: int, action: str, amount_usd: float) ->
     if action not in valid_actions:
         return False, "Action tabung tak dikenali."
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not user:
         return False, "User tak dijumpai."
 
-    now = _user_now(user_id)
     saved_at_iso = now.isoformat()
     saved_date = now.strftime("%Y-%m-%d")
     saved_time = now.strftime("%H:%M:%S")
@@ -1016,6 +2301,7 @@ def apply_tabung_update_action(user_id: int, action: str, amount_usd: float) ->
     )
     current_balance = get_current_balance_usd(user_id)
     state = get_tabung_update_state(user_id)
+    transfer: tuple[str, float] | None = None
 
     if action == "save":
         if amount > current_balance:
@@ -1045,16 +2331,7 @@ def apply_tabung_update_action(user_id: int, action: str, amount_usd: float) ->
             }
         )
         tabung_data["balance_usd"] = float(new_balance)
-        _append_balance_adjustment_transfer(
-            user,
-            user_id,
-            "tabung_save_transfer_out",
-            -float(amount),
-            saved_at_iso,
-            saved_date,
-            saved_time,
-            now.date(),
-        )
+        transfer = ("tabung_save_transfer_out", -float(amount))
 
     elif action == "emergency_withdrawal":
         if state["emergency_left"] <= 0:
@@ -1093,16 +2370,7 @@ def apply_tabung_update_action(user_id: int, action: str, amount_usd: float) ->
             }
         )
         tabung_data["balance_usd"] = float(new_balance)
-        _append_balance_adjustment_transfer(
-            user,
-            user_id,
-            "tabung_goal_withdraw_to_current",
-            float(amount),
-            saved_at_iso,
-            saved_date,
-            saved_time,
-            now.date(),
-        )
+        transfer = ("tabung_goal_withdraw_to_current", float(amount))
 
     elif action == "goal_direct_withdrawal":
         if not state["goal_reached"]:
@@ -1123,16 +2391,16 @@ def apply_tabung_update_action(user_id: int, action: str, amount_usd: float) ->
         )
         tabung_data["balance_usd"] = float(new_balance)
 
+    # Staged only after every check passed, so a rejected action writes nothing.
+    if transfer is not None:
+        _append_balance_adjustment_transfer(user, user_id, transfer[0], transfer[1], saved_at_iso, saved_date, saved_time)
+    _append_tabung_records(user_id, tabung_data, records)
     tabung_section["saved_at"] = saved_at_iso
     tabung_section["saved_date"] = saved_date
     tabung_section["saved_time"] = saved_time
     tabung_section["timezone"] = "Asia/Kuala_Lumpur"
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
-
-    if action == "save" and _is_daily_target_hit_on_date(user_id, now.date()):
-        mark_daily_target_reached_today(user_id)
-
+    _save_user_obj(user_id, user)
     return True, "ok"
 
 
@@ -1143,60 +2411,23 @@ def _month_range(reference_date: date) -> tuple[date, date]:
     return first_day, last_day
 
 
-def _sum_amount_usd_between(user_id: int, section_name: str, start_date: date, end_date: date) -> float:
-    total = 0.0
-    for record in _iter_section_records_between(user_id, section_name, start_date, end_date):
-        total += _to_float(record.get("amount_usd", 0.0))
-    return total
-
-
-def _sum_net_usd_between(user_id: int, section_name: str, start_date: date, end_date: date) -> float:
-    total = 0.0
-    for record in _iter_section_records_between(user_id, section_name, start_date, end_date):
-        total += _record_net_usd(record)
-    return total
-
-
 def get_current_balance_floor_usd(user_id: int, reference_date: date | None = None) -> float:
     ref_date = reference_date or current_user_date(user_id)
     month_start, month_end = _month_range(ref_date)
-    current_balance = get_current_balance_usd(user_id)
-
-    monthly_deposit = _sum_amount_usd_between(user_id, "deposit_activity", month_start, month_end)
-    monthly_withdrawal = _sum_amount_usd_between(user_id, "withdrawal_activity", month_start, month_end)
-    monthly_trading_net = _sum_net_usd_between(user_id, "trading_activity", month_start, month_end)
-    monthly_adjustment_net = _sum_net_usd_between(user_id, "balance_adjustment", month_start, month_end)
+    monthly = _snapshot_flows_between(user_id, month_start, month_end)
 
     # Carry-forward = balance at start of current month.
-    month_start_balance = (
-        current_balance
-        - monthly_deposit
-        + monthly_withdrawal
-        - monthly_trading_net
-        - monthly_adjustment_net
-    )
+    month_start_balance = get_current_balance_usd(user_id) - monthly["balance_flow_usd"]
 
     # Floor only reduced by withdrawal activity, never by balance adjustment.
-    return month_start_balance - monthly_withdrawal
+    return month_start_balance - monthly["withdrawal_usd"]
 
 
 def get_month_start_balance_usd(user_id: int, reference_date: date | None = None) -> float:
     ref_date = reference_date or current_user_date(user_id)
     month_start, month_end = _month_range(ref_date)
-    current_balance = get_current_balance_usd(user_id)
-
-    monthly_deposit = _sum_amount_usd_between(user_id, "deposit_activity", month_start, month_end)
-    monthly_withdrawal = _sum_amount_usd_between(user_id, "withdrawal_activity", month_start, month_end)
-    monthly_trading_net = _sum_net_usd_between(user_id, "trading_activity", month_start, month_end)
-    monthly_adjustment_net = _sum_net_usd_between(user_id, "balance_adjustment", month_start, month_end)
-
-    return (
-        current_balance
-        - monthly_deposit
-        + monthly_withdrawal
-        - monthly_trading_net
-        - monthly_adjustment_net
-    )
+    monthly = _snapshot_flows_between(user_id, month_start, month_end)
+    return get_current_balance_usd(user_id) - monthly["balance_flow_usd"]
 
 
 def get_current_balance_as_of(user_id: int, as_of_date: date) -> float:
@@ -1210,36 +2441,12 @@ def get_current_balance_as_of(user_id: int, as_of_date: date) -> float:
     if start > end:
         return current_balance
 
-    dep = _sum_amount_usd_between(user_id, "deposit_activity", start, end)
-    wdr = _sum_amount_usd_between(user_id, "withdrawal_activity", start, end)
-    trd = _sum_net_usd_between(user_id, "trading_activity", start, end)
-    adj = _sum_net_usd_between(user_id, "balance_adjustment", start, end)
-
-    return current_balance - dep + wdr - trd - adj
+    # balance_flow_usd = deposit - withdrawal + trading net + adjustment net.
+    return current_balance - _snapshot_flows_between(user_id, start, end)["balance_flow_usd"]
 
 
 def get_tabung_balance_as_of(user_id: int, as_of_date: date) -> float:
-    sections = _get_user_sections(user_id)
-    tabung_section = sections.get("tabung", {})
-    tabung_data = tabung_section.get("data", {}) if isinstance(tabung_section, dict) else {}
-    records = tabung_data.get("records", []) if isinstance(tabung_data, dict) else []
-    if not isinstance(records, list):
-        return 0.0
-
-    latest_balance: float = 0.0
-    found = False
-    for rec in records:
-        if not isinstance(rec, dict):
-            continue
-        rec_date = _record_date_myt(rec)
-        if rec_date is None or rec_date > as_of_date:
-            continue
-        latest_balance = _to_float(rec.get("balance_after_usd", latest_balance))
-        found = True
-
-    if found:
-        return latest_balance
-    return 0.0
+    return _snapshot_as_of(user_id, as_of_date)["tabung_balance_usd"]
 
 
 def _trading_days_by_target_days(target_days: int) -> int:
@@ -1338,37 +2545,123 @@ def _remaining_target_usd_before_date(user_id: int, before_date: date) -> float:
     return max(total_grow_target - achieved, 0.0)
 
 
+# Daily target memo, per user inside the core cache: frozen weekly targets by
+# week key and (trading net, tabung saved) totals by date. It is only trusted
+# at the core version it was filled at; local writes patch it in place (see
+# _advance_daily_target_memo) instead of recomputing from records.
+def _daily_target_memo(user_id: int) -> tuple[int | None, dict[str, dict[str, Any]]]:
+    """(core version, copy of the user's memo); version None means do not cache."""
+    empty: dict[str, dict[str, Any]] = {"targets": {}, "days": {}}
+    if getattr(_uow_local, "current", None) is not None:
+        # Reads inside a mutation must go through the unit of work.
+        return None, empty
+    try:
+        with _connect_shared_db() as conn:
+            version = _sync_core_cache(conn)
+    except sqlite3.Error:
+        _invalidate_core_cache()
+        return None, empty
+    with _CORE_CACHE_LOCK:
+        memo = _core_cache["daily_targets"].get(str(user_id))
+        if memo is None or _core_cache["version"] != version:
+            return version, empty
+        return version, {"targets": dict(memo["targets"]), "days": dict(memo["days"])}
+
+
+def _store_daily_target_memo(user_id: int, version: int | None, bucket: str, key: str, value: tuple[Any, ...]) -> None:
+    if version is None:
+        return
+    with _CORE_CACHE_LOCK:
+        if _core_cache["version"] != version:
+            return
+        users = _core_cache["daily_targets"]
+        if str(user_id) not in users and len(users) >= CORE_CACHE_DAILY_TARGET_MAX_USERS:
+            users.clear()
+        users.setdefault(str(user_id), {"targets": {}, "days": {}})[bucket][key] = value
+
+
+def _advance_daily_target_memo(uow: _UnitOfWork) -> None:
+    # Caller holds _CORE_CACHE_LOCK, right after the cache moved to this unit's
+    # version and before the cached user objects are replaced.
+    users = _core_cache["daily_targets"]
+    for user_key, user_obj in uow.users.items():
+        memo = users.get(user_key)
+        if memo is None:
+            continue
+        weekly_targets = _daily_target_tracker_weekly_targets_from_user(user_obj)
+        for week_key in list(memo["targets"]):
+            frozen = _to_float(weekly_targets.get(week_key, {}).get("daily_target_usd"))
+            if frozen > 0:
+                memo["targets"][week_key] = (frozen, True)
+            else:
+                del memo["targets"][week_key]
+        # Day totals include legacy trading records kept in the profile.
+        old_user = _core_cache["users"].get(user_key)
+        old_sections = old_user.get("sections", {}) if isinstance(old_user, dict) else None
+        new_sections = user_obj.get("sections", {})
+        if old_sections is None or _legacy_records_from_sections(
+            old_sections, "trading_activity"
+        ) != _legacy_records_from_sections(new_sections, "trading_activity"):
+            memo["days"] = {}
+
+    for user_key, section_name, record in uow.ledger:
+        memo = users.get(user_key)
+        if memo is None:
+            continue
+        # Unfrozen targets depend on tabung history; recompute them on next read.
+        memo["targets"] = {key: value for key, value in memo["targets"].items() if value[1]}
+        rec_date = _record_date_myt(record)
+        day_key = rec_date.isoformat() if rec_date is not None else ""
+        totals = memo["days"].get(day_key)
+        if totals is None:
+            continue
+        if section_name == "trading_activity":
+            memo["days"][day_key] = (totals[0] + _record_net_usd(record), totals[1])
+        elif section_name == "tabung":
+            memo["days"][day_key] = (totals[0], totals[1] + _tabung_save_usd(record))
+
+
 def _get_or_create_weekly_daily_target_usd(user_id: int, reference_date: date) -> float:
     week_start, week_end = _bounded_current_week(reference_date)
     week_key = _week_key(week_start, week_end)
+    version, memo = _daily_target_memo(user_id)
+    if week_key in memo["targets"]:
+        return memo["targets"][week_key][0]
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    daily_target_usd, frozen = _freeze_weekly_daily_target_usd(user_id, week_start, week_end, week_key)
+    _store_daily_target_memo(user_id, version, "targets", week_key, (daily_target_usd, frozen))
+    return daily_target_usd
+
+
+@_transactional
+def _freeze_weekly_daily_target_usd(user_id: int, week_start: date, week_end: date, week_key: str) -> tuple[float, bool]:
+    """(daily target, whether it is frozen in the tracker) for one bounded week."""
+    user = _load_user_obj(user_id)
     if not isinstance(user, dict):
-        return 0.0
+        return 0.0, False
 
     weekly_targets = _daily_target_tracker_weekly_targets_from_user(user)
     existing = weekly_targets.get(week_key, {})
     if isinstance(existing, dict):
         existing_target = _to_float(existing.get("daily_target_usd"))
         if existing_target > 0:
-            return existing_target
+            return existing_target, True
 
     goal = get_project_grow_goal_summary(user_id)
     target_days = _to_int(goal.get("target_days"))
     if _to_float(goal.get("target_balance_usd")) <= 0 or target_days <= 0:
-        return 0.0
+        return 0.0, False
 
     saved_date = _goal_saved_date(user_id) or week_start
     deadline_exclusive = saved_date + timedelta(days=target_days)
     remaining_trading_days = _count_trading_days_between(week_start, deadline_exclusive - timedelta(days=1))
     if remaining_trading_days <= 0:
-        return 0.0
+        return 0.0, False
 
     achieved_before_week = week_start - timedelta(days=1)
     remaining_target = _remaining_target_usd_before_date(user_id, achieved_before_week)
     if remaining_target <= 0:
-        return 0.0
+        return 0.0, False
 
     daily_target_usd = remaining_target / float(remaining_trading_days)
     now = _user_now(user_id)
@@ -1411,8 +2704,8 @@ def _get_or_create_weekly_daily_target_usd(user_id: int, reference_date: date) -
     tracker["saved_time"] = now.strftime("%H:%M:%S")
     tracker["timezone"] = "Asia/Kuala_Lumpur"
     user["updated_at"] = now.isoformat()
-    save_core_db(db)
-    return float(daily_target_usd)
+    _save_user_obj(user_id, user)
+    return float(daily_target_usd), True
 
 
 def get_weekly_frozen_daily_target_usd(user_id: int, reference_date: date | None = None) -> float:
@@ -1420,41 +2713,40 @@ def get_weekly_frozen_daily_target_usd(user_id: int, reference_date: date | None
     return _get_or_create_weekly_daily_target_usd(user_id, ref)
 
 
-def _trading_profit_usd_on_date(user_id: int, target_date: date) -> float:
-    net = _sum_trading_net_between(user_id, target_date, target_date)
-    if net <= 0:
-        return 0.0
-    return float(net)
+def _tabung_save_usd(record: dict[str, Any]) -> float:
+    mode = str(record.get("mode") or "").strip().lower()
+    return abs(_to_float(record.get("amount_usd"))) if mode == "save" else 0.0
 
 
-def _tabung_save_usd_on_date(user_id: int, target_date: date) -> float:
-    total = 0.0
-    for record in _tabung_records_since(user_id, target_date):
-        rec_date = _record_date_myt(record)
-        if rec_date != target_date:
-            continue
-        mode = str(record.get("mode") or "").strip().lower()
-        if mode != "save":
-            continue
-        total += abs(_to_float(record.get("amount_usd")))
-    return total
+def _daily_target_day_totals(user_id: int, target_date: date) -> tuple[float, float]:
+    """(trading net, tabung saved) on one date, kept in the daily target memo."""
+    day_key = target_date.isoformat()
+    version, memo = _daily_target_memo(user_id)
+    if day_key in memo["days"]:
+        return memo["days"][day_key]
+
+    trading_net = _sum_trading_net_between(user_id, target_date, target_date)
+    tabung_saved = 0.0
+    for record in get_tabung_records_between(user_id, target_date, target_date):
+        tabung_saved += _tabung_save_usd(record)
+    totals = (float(trading_net), tabung_saved)
+    _store_daily_target_memo(user_id, version, "days", day_key, totals)
+    return totals
 
 
 def _is_daily_target_hit_on_date(user_id: int, target_date: date) -> bool:
     daily_target = get_weekly_frozen_daily_target_usd(user_id, target_date)
     if daily_target <= 0:
         return False
-    trading_profit = _trading_profit_usd_on_date(user_id, target_date)
-    if trading_profit <= 0:
+    trading_net, tabung_saved = _daily_target_day_totals(user_id, target_date)
+    if trading_net <= 0:
         return False
-    tabung_saved = _tabung_save_usd_on_date(user_id, target_date)
     return tabung_saved >= daily_target
 
 
 def has_reached_daily_target_today(user_id: int) -> bool:
     today = current_user_date(user_id).isoformat()
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not isinstance(user, dict):
         return False
 
@@ -1470,9 +2762,9 @@ def is_daily_target_hit_now(user_id: int) -> bool:
     return _is_daily_target_hit_now(user_id)
 
 
+@_transactional
 def mark_daily_target_reached_today(user_id: int) -> bool:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not isinstance(user, dict):
         return False
 
@@ -1499,7 +2791,7 @@ def mark_daily_target_reached_today(user_id: int) -> bool:
     }
 
     user["updated_at"] = now.isoformat()
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
@@ -1604,41 +2896,210 @@ def _build_transaction_history_entry(source: str, record: dict[str, Any]) -> dic
     }
 
 
-def _collect_transaction_history_rows(
+TRANSACTION_HISTORY_SECTIONS = ("deposit_activity", "withdrawal_activity", "trading_activity", "balance_adjustment", "tabung")
+HIDDEN_ADJUSTMENT_MODES = (
+    "project_grow_unlock_transfer_out",
+    "project_grow_goal_reset_transfer",
+    "tabung_save_transfer_out",
+    "tabung_goal_withdraw_to_current",
+)
+
+# History order is newest first; ties keep section order, then legacy core
+# records before ledger rows, then insertion order. A position in that order is
+# the key (ts, section_rank, origin, seq) and doubles as the page cursor.
+_HistoryKey = tuple[str, int, int, int]
+
+
+def _history_key_precedes(left: _HistoryKey, right: _HistoryKey) -> bool:
+    if left[0] != right[0]:
+        return left[0] > right[0]
+    return left[1:] < right[1:]
+
+
+def _encode_history_cursor(key: _HistoryKey) -> str:
+    return "~".join(str(part) for part in key)
+
+
+def _decode_history_cursor(cursor: str | None) -> _HistoryKey | None:
+    parts = str(cursor or "").rsplit("~", 3)
+    if len(parts) != 4:
+        return None
+    try:
+        return parts[0], int(parts[1]), int(parts[2]), int(parts[3])
+    except ValueError:
+        return None
+
+
+def _iter_legacy_history(
     user_id: int,
     start_date: date,
     end_date: date,
-    *,
     include_hidden_adjustments: bool,
-) -> list[dict[str, Any]]:
-    hidden_adjustment_modes = {
-        "project_grow_unlock_transfer_out",
-        "project_grow_goal_reset_transfer",
-        "tabung_save_transfer_out",
-        "tabung_goal_withdraw_to_current",
-    }
-
-    rows: list[dict[str, Any]] = []
-    for section_name in ("deposit_activity", "withdrawal_activity", "trading_activity", "balance_adjustment"):
-        for record in _iter_section_records_between(user_id, section_name, start_date, end_date):
-            if section_name == "balance_adjustment":
-                mode = str(record.get("mode") or "").strip().lower()
-                if not include_hidden_adjustments and mode in hidden_adjustment_modes:
+    after: _HistoryKey | None,
+) -> Iterator[tuple[_HistoryKey, dict[str, Any], dict[str, Any]]]:
+    # Pre-ledger records living in the core DB; small and already in memory.
+    items: list[tuple[_HistoryKey, dict[str, Any], dict[str, Any]]] = []
+    for rank, section_name in enumerate(TRANSACTION_HISTORY_SECTIONS[:-1]):
+        for seq, record in enumerate(_legacy_section_records_between(user_id, section_name, start_date, end_date)):
+            if section_name == "balance_adjustment" and not include_hidden_adjustments:
+                if str(record.get("mode") or "").strip().lower() in HIDDEN_ADJUSTMENT_MODES:
                     continue
             item = _build_transaction_history_entry(section_name, record)
+            if item is None:
+                continue
+            key = (str(item["ts"]), rank, 0, seq)
+            if after is None or _history_key_precedes(after, key):
+                items.append((key, item, record))
+    items.sort(key=lambda entry: entry[0][1:])
+    items.sort(key=lambda entry: entry[0][0], reverse=True)
+    yield from items
+
+
+def _iter_ledger_history(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    include_hidden_adjustments: bool,
+    after: _HistoryKey | None,
+    page_size: int,
+) -> Iterator[tuple[_HistoryKey, dict[str, Any], dict[str, Any]]]:
+    rank_sql = " ".join(f"WHEN '{name}' THEN {rank}" for rank, name in enumerate(TRANSACTION_HISTORY_SECTIONS))
+    placeholders = ",".join("?" for _ in TRANSACTION_HISTORY_SECTIONS)
+    hidden_sql = ""
+    base_params: tuple[Any, ...] = (str(user_id), *TRANSACTION_HISTORY_SECTIONS, start_date.isoformat(), end_date.isoformat())
+    if not include_hidden_adjustments:
+        hidden_sql = f"AND NOT (section = 'balance_adjustment' AND mode IN ({','.join('?' for _ in HIDDEN_ADJUSTMENT_MODES)}))"
+        base_params = (*base_params, *HIDDEN_ADJUSTMENT_MODES)
+
+    while True:
+        keyset_sql = ""
+        keyset_params: tuple[Any, ...] = ()
+        if after is not None:
+            if after[2] == 0:
+                # Cursor sits on a legacy record; ledger rows of the same ts/rank follow it.
+                keyset_sql = "WHERE saved_at < ? OR (saved_at = ? AND sort_rank >= ?)"
+                keyset_params = (after[0], after[0], after[1])
+            else:
+                keyset_sql = "WHERE saved_at < ? OR (saved_at = ? AND (sort_rank > ? OR (sort_rank = ? AND entry_id > ?)))"
+                keyset_params = (after[0], after[0], after[1], after[1], after[3])
+        try:
+            with _connect_shared_db() as conn:
+                _ensure_ledger_storage(conn)
+                rows = conn.execute(
+                    f"""
+                    SELECT entry_id, section, saved_at, sort_rank, payload_json FROM (
+                        SELECT entry_id, section, saved_at, payload_json, CASE section {rank_sql} END AS sort_rank
+                        FROM {MMHELPER_LEDGER_TABLE}
+                        WHERE user_id = ? AND section IN ({placeholders}) AND record_date BETWEEN ? AND ?
+                        {hidden_sql}
+                    )
+                    {keyset_sql}
+                    ORDER BY saved_at DESC, sort_rank, entry_id
+                    LIMIT ?
+                    """,
+                    (*base_params, *keyset_params, page_size),
+                ).fetchall()
+        except sqlite3.Error:
+            return
+
+        # Yield outside the connection block so slow consumers hold no transaction.
+        for row in rows:
+            after = (str(row["saved_at"]), int(row["sort_rank"]), 1, int(row["entry_id"]))
+            record = _decode_json_dict(row["payload_json"])
+            item = _build_transaction_history_entry(str(row["section"]), record)
             if item is not None:
-                rows.append(item)
+                yield after, item, record
+        if len(rows) < page_size:
+            return
 
-    for record in _tabung_records_since(user_id, start_date):
-        rec_date = _record_date_myt(record)
-        if rec_date is None or rec_date > end_date:
-            continue
-        item = _build_transaction_history_entry("tabung", record)
-        if item is not None:
-            rows.append(item)
 
-    rows.sort(key=lambda r: str(r.get("ts") or ""), reverse=True)
-    return rows
+def _iter_transaction_history_keyed(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    *,
+    include_hidden_adjustments: bool,
+    cursor: str | None = None,
+    page_size: int = TRANSACTION_HISTORY_PAGE_SIZE,
+) -> Iterator[tuple[_HistoryKey, dict[str, Any], dict[str, Any]]]:
+    after = _decode_history_cursor(cursor)
+    legacy = _iter_legacy_history(user_id, start_date, end_date, include_hidden_adjustments, after)
+    ledger = _iter_ledger_history(user_id, start_date, end_date, include_hidden_adjustments, after, max(1, int(page_size)))
+    left = next(legacy, None)
+    right = next(ledger, None)
+    while left is not None or right is not None:
+        if right is None or (left is not None and _history_key_precedes(left[0], right[0])):
+            yield left
+            left = next(legacy, None)
+        else:
+            yield right
+            right = next(ledger, None)
+
+
+def iter_transaction_history(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    *,
+    include_hidden_adjustments: bool = False,
+    cursor: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Stream history entries newest first, reading the ledger one page at a time."""
+    for _, item, _ in _iter_transaction_history_keyed(
+        user_id,
+        start_date,
+        end_date,
+        include_hidden_adjustments=include_hidden_adjustments,
+        cursor=cursor,
+    ):
+        yield item
+
+
+def iter_transaction_history_with_records(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    *,
+    include_hidden_adjustments: bool = False,
+) -> Iterator[tuple[dict[str, Any], dict[str, Any]]]:
+    """Like ``iter_transaction_history`` but also yields each stored record."""
+    for _, item, record in _iter_transaction_history_keyed(
+        user_id,
+        start_date,
+        end_date,
+        include_hidden_adjustments=include_hidden_adjustments,
+    ):
+        yield item, record
+
+
+def get_transaction_history_page(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    *,
+    cursor: str | None = None,
+    limit: int = 20,
+    include_hidden_adjustments: bool = False,
+) -> dict[str, Any]:
+    """One page of history; pass ``next_cursor`` back to continue ("" when done)."""
+    max_items = max(1, min(int(limit), 100))
+    records: list[dict[str, Any]] = []
+    next_cursor = ""
+    stream = _iter_transaction_history_keyed(
+        user_id,
+        start_date,
+        end_date,
+        include_hidden_adjustments=include_hidden_adjustments,
+        cursor=cursor,
+        page_size=max_items + 1,
+    )
+    for key, item, _ in stream:
+        if len(records) == max_items:
+            next_cursor = _encode_history_cursor(last_key)
+            break
+        records.append(item)
+        last_key = key
+    return {"records": records, "next_cursor": next_cursor}
 
 
 def get_transaction_history_records_between(
@@ -1649,16 +3110,22 @@ def get_transaction_history_records_between(
     limit: int | None = None,
     include_hidden_adjustments: bool = False,
 ) -> list[dict[str, Any]]:
-    rows = _collect_transaction_history_rows(
+    if limit is None:
+        return list(
+            iter_transaction_history(
+                user_id,
+                start_date,
+                end_date,
+                include_hidden_adjustments=include_hidden_adjustments,
+            )
+        )
+    return get_transaction_history_page(
         user_id,
         start_date,
         end_date,
+        limit=limit,
         include_hidden_adjustments=include_hidden_adjustments,
-    )
-    if limit is None:
-        return rows
-    max_items = max(1, min(int(limit), 100))
-    return rows[:max_items]
+    )["records"]
 
 
 def get_transaction_history_records(user_id: int, days: int, limit: int = 100) -> list[dict[str, Any]]:
@@ -1674,6 +3141,24 @@ def get_transaction_history_records(user_id: int, days: int, limit: int = 100) -
     )
 
 
+def get_user_report_version(user_id: int) -> tuple[int, int] | None:
+    """(user row version, newest ledger entry id); moves whenever this user's data does.
+
+    None when SQLite is unavailable, so callers do not cache on the JSON fallback.
+    """
+    user_key = str(user_id)
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_ledger_storage(conn)
+            row = conn.execute(
+                f"SELECT COALESCE(MAX(entry_id), 0) AS last_entry FROM {MMHELPER_LEDGER_TABLE} WHERE user_id = ?",
+                (user_key,),
+            ).fetchone()
+            return _read_user_row_version(conn, user_key), _to_int(row["last_entry"]) if row is not None else 0
+    except sqlite3.Error:
+        return None
+
+
 def has_any_transactions(user_id: int) -> bool:
     rollup = _get_user_rollup(user_id)
     if (
@@ -1684,8 +3169,7 @@ def has_any_transactions(user_id: int) -> bool:
     ):
         return True
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id), {})
+    user = _load_user_obj(user_id) or {}
     sections = user.get("sections", {})
 
     def _has_records(data: Any) -> bool:
@@ -1702,12 +3186,10 @@ def has_any_transactions(user_id: int) -> bool:
     if _has_records(tx):
         return True
 
-    # Tabung remains in core DB.
     tabung_data = sections.get("tabung", {}).get("data")
-    if _has_records(tabung_data):
+    if isinstance(tabung_data, list) and _has_records(tabung_data):
         return True
-
-    return False
+    return _count_ledger_records(user_id, "tabung") > 0
 
 
 def can_reset_initial_capital(user_id: int) -> bool:
@@ -1791,23 +3273,18 @@ def can_open_project_grow_mission(user_id: int) -> bool:
 def get_tabung_start_date(user_id: int) -> str:
     sections = _get_user_sections(user_id)
     tabung_section = sections.get("tabung", {})
-    tabung_data = tabung_section.get("data", {})
-
-    earliest: date | None = None
-
-    records = tabung_data.get("records") if isinstance(tabung_data, dict) else None
-    if isinstance(records, list):
-        for rec in records:
-            if not isinstance(rec, dict):
-                continue
-            rec_date = _record_date_myt(rec)
-            if rec_date is None:
-                continue
-            if earliest is None or rec_date < earliest:
-                earliest = rec_date
 
-    if earliest is not None:
-        return earliest.isoformat()
+    rows = _query_ledger(
+        f"""
+        SELECT MIN(record_date) AS earliest
+        FROM {MMHELPER_LEDGER_TABLE}
+        WHERE user_id = ? AND section = 'tabung' AND record_date != ''
+        """,
+        (str(user_id),),
+    )
+    earliest = str(rows[0]["earliest"] or "") if rows else ""
+    if earliest:
+        return earliest
 
     saved_date = tabung_section.get("saved_date")
     if isinstance(saved_date, str) and saved_date:
@@ -1868,42 +3345,12 @@ def _mission_start_date(user_id: int) -> date | None:
     return None
 
 
-def _iter_dates_since(user_id: int, section_name: str, start_date: date, end_date: date) -> Iterator[date]:
-    for record in _iter_section_records_between(user_id, section_name, start_date, end_date):
-        rec_date = _record_date_myt(record)
-        if rec_date is None:
-            continue
-        yield rec_date
-
-
-def _consecutive_days_from_start(start_date: date, end_date: date, day_set: set[date]) -> int:
-    cur = start_date
-    count = 0
-    while cur <= end_date:
-        if cur not in day_set:
-            break
-        count += 1
-        cur += timedelta(days=1)
-    return count
+def get_tabung_records_between(user_id: int, start_date: date, end_date: date) -> list[dict[str, Any]]:
+    return [record for _, record in _ledger_records_between(user_id, ("tabung",), start_date, end_date)]
 
 
 def _tabung_records_since(user_id: int, start_date: date) -> list[dict[str, Any]]:
-    sections = _get_user_sections(user_id)
-    tabung_data = sections.get("tabung", {}).get("data", {})
-    records = tabung_data.get("records") if isinstance(tabung_data, dict) else []
-    if not isinstance(records, list):
-        return []
-
-    out: list[dict[str, Any]] = []
-    for record in records:
-        if not isinstance(record, dict):
-            continue
-        rec_date = _record_date_myt(record)
-        if rec_date is None:
-            continue
-        if rec_date >= start_date:
-            out.append(record)
-    return out
+    return get_tabung_records_between(user_id, start_date, date.max)
 
 
 def has_tabung_save_today(user_id: int) -> bool:
@@ -1915,71 +3362,175 @@ def has_tabung_save_today(user_id: int) -> bool:
     return False
 
 
-def get_mission_progress_summary(user_id: int) -> dict[str, str]:
-    state = get_project_grow_mission_state(user_id)
-    mission_status = get_project_grow_mission_status_text(user_id)
+# Mission engine: a user's records from the mission start are loaded once into
+# per-day arrays (index 0 = start date), then all four missions are scored in
+# one walk over the days.
+MISSION_ACTIVITY_SECTIONS = ("deposit_activity", "withdrawal_activity", "trading_activity")
+MISSION_BATCH_PAGE_SIZE = 200
 
-    if not state["active"]:
-        return {
-            "active": "0",
-            "mode_level": "-",
-            "mission_status": mission_status,
-            "progress_count": "0/4",
-            "mission_1": "Mission 1 : in progress 0/14",
-            "mission_2": "Mission 2 : in progress 0/14",
-            "mission_3": "Mission 3 : in progress 0/30",
-            "mission_4": "Mission 4 : in progress 0%",
-        }
 
-    start_date = _mission_start_date(user_id) or current_user_date(user_id)
+def _inactive_mission_summary(mission_status: str) -> dict[str, str]:
+    return {
+        "active": "0",
+        "mode_level": "-",
+        "mission_status": mission_status,
+        "progress_count": "0/4",
+        "mission_1": "Mission 1 : in progress 0/14",
+        "mission_2": "Mission 2 : in progress 0/14",
+        "mission_3": "Mission 3 : in progress 0/30",
+        "mission_4": "Mission 4 : in progress 0%",
+    }
+
+
+def _mission_window(user_id: int) -> tuple[date, date]:
     today = current_user_date(user_id)
-    if start_date > today:
-        start_date = today
+    start_date = _mission_start_date(user_id) or today
+    return min(start_date, today), today
+
+
+def _new_mission_days(start_date: date, today: date) -> dict[str, Any]:
+    size = (today - start_date).days + 1
+    return {
+        "start_date": start_date,
+        "today": today,
+        "updated": [False] * size,
+        "traded": [False] * size,
+        "trading_net": [0.0] * size,
+        "tabung_tx": [0] * size,
+        # Tabung rows dated after "today" (beta date override) still count for Mission 2.
+        "tabung_tx_later": 0,
+    }
+
+
+def _add_mission_record(days: dict[str, Any], section_name: str, rec_date: date, net_usd: float) -> None:
+    idx = (rec_date - days["start_date"]).days
+    if idx < 0:
+        return
+    if section_name == "tabung":
+        if idx < len(days["tabung_tx"]):
+            days["tabung_tx"][idx] += 1
+        else:
+            days["tabung_tx_later"] += 1
+        return
+    if idx >= len(days["updated"]):
+        return
+    days["updated"][idx] = True
+    if section_name == "trading_activity":
+        days["traded"][idx] = True
+        days["trading_net"][idx] += net_usd
+
+
+def _add_legacy_mission_records(user_id: int, days: dict[str, Any]) -> None:
+    for section_name in MISSION_ACTIVITY_SECTIONS:
+        for record in _legacy_section_records_between(user_id, section_name, days["start_date"], days["today"]):
+            rec_date = _record_date_myt(record)
+            if rec_date is not None:
+                _add_mission_record(days, section_name, rec_date, _record_net_usd(record))
+
+
+def _mission_ledger_rows(user_ids: list[int], since: date) -> list[sqlite3.Row]:
+    sections = (*MISSION_ACTIVITY_SECTIONS, "tabung")
+    return _query_ledger(
+        f"""
+        SELECT user_id, section, record_date, net_usd
+        FROM {MMHELPER_LEDGER_TABLE}
+        WHERE user_id IN ({",".join("?" for _ in user_ids)})
+          AND section IN ({",".join("?" for _ in sections)})
+          AND record_date >= ?
+        ORDER BY entry_id
+        """,
+        (*(str(user_id) for user_id in user_ids), *sections, since.isoformat()),
+    )
+
+
+def _load_mission_days(windows: dict[int, tuple[date, date]]) -> dict[int, dict[str, Any]]:
+    """Per-day mission arrays for every user in ``windows`` from one ledger read."""
+    out: dict[int, dict[str, Any]] = {}
+    for user_id, (start_date, today) in windows.items():
+        out[user_id] = _new_mission_days(start_date, today)
+        _add_legacy_mission_records(user_id, out[user_id])
+    if not windows:
+        return out
+
+    since = min(start_date for start_date, _ in windows.values())
+    for row in _mission_ledger_rows(list(windows), since):
+        days = out.get(_to_int(row["user_id"]))
+        if days is None:
+            continue
+        try:
+            rec_date = date.fromisoformat(str(row["record_date"]))
+        except ValueError:
+            continue
+        _add_mission_record(days, str(row["section"]), rec_date, float(row["net_usd"]))
+    return out
 
-    mode_level = f"{state['mode'].capitalize()} | Level 1"
+
+def _mission_max_daily_loss_usd(user_id: int) -> float:
+    init_data = _get_user_sections(user_id).get("initial_setup", {}).get("data", {})
+    max_daily_loss_pct = _to_float(init_data.get("max_daily_loss_pct"))
+    initial_capital = _to_float(init_data.get("initial_capital_usd"))
+    return (initial_capital * max_daily_loss_pct) / 100.0 if max_daily_loss_pct > 0 else 0.0
+
+
+def _mission4_progress_pct(user_id: int) -> tuple[float, bool]:
+    goal = get_project_grow_goal_summary(user_id)
+    baseline_balance = _to_float(goal.get("current_balance_usd"))
+    target_balance = _to_float(goal.get("target_balance_usd"))
+    grow_target = max(target_balance - baseline_balance, 0.0)
+    achieved = max(get_tabung_balance_usd(user_id), 0.0)
+    pct = 0.0 if grow_target <= 0 else min((achieved / grow_target) * 100.0, 100.0)
+    return pct, pct >= 100 and grow_target > 0
+
+
+def _evaluate_missions(days: dict[str, Any], max_daily_loss_usd: float) -> dict[str, Any]:
+    """Streaks for Missions 1-3 in a single pass over the day arrays."""
+    loss_limit = -abs(max_daily_loss_usd)
+    update_streak = 0
+    trading_streak = 0
+    safe_days = 0
+    update_open = trading_open = True
+    mission3_failed = False
+    for updated, traded, day_net in zip(days["updated"], days["traded"], days["trading_net"]):
+        if update_open:
+            update_open = updated
+            update_streak += int(updated)
+        if trading_open:
+            trading_open = traded
+            trading_streak += int(traded)
+        if not mission3_failed:
+            if max_daily_loss_usd > 0 and day_net < loss_limit:
+                mission3_failed = True
+            else:
+                safe_days += 1
+        if not update_open and not trading_open and mission3_failed:
+            break
+    return {
+        "mission1_days": update_streak,
+        "mission2_days": trading_streak,
+        "tabung_tx_count": sum(days["tabung_tx"]) + days["tabung_tx_later"],
+        "mission3_days": safe_days,
+        "mission3_failed": mission3_failed,
+    }
+
+
+def _mission_summary(user_id: int, mode: str, mission_status: str, days: dict[str, Any]) -> dict[str, str]:
+    result = _evaluate_missions(days, _mission_max_daily_loss_usd(user_id))
 
     # Mission 1: 14 hari berturut-turut update (guna aktiviti yang direkod dalam bot).
-    update_days: set[date] = set()
-    for section_name in ("deposit_activity", "withdrawal_activity", "trading_activity"):
-        update_days.update(_iter_dates_since(user_id, section_name, start_date, today))
-    mission1_days = _consecutive_days_from_start(start_date, today, update_days)
+    mission1_days = result["mission1_days"]
     mission1_pass = mission1_days >= 14
     mission1_status = "_PASS_" if mission1_pass else "in progress"
     mission1_text = f"Mission 1 : {mission1_status} {min(mission1_days, 14)}/14"
 
     # Mission 2: 14 hari berturut-turut trading update + minimum 2 transaksi tabung.
-    trading_days = set(_iter_dates_since(user_id, "trading_activity", start_date, today))
-    mission2_days = _consecutive_days_from_start(start_date, today, trading_days)
-    tabung_tx_count = len(_tabung_records_since(user_id, start_date))
-    mission2_pass = mission2_days >= 14 and tabung_tx_count >= 2
+    mission2_days = result["mission2_days"]
+    mission2_pass = mission2_days >= 14 and result["tabung_tx_count"] >= 2
     mission2_status = "_PASS_" if mission2_pass else "in progress"
     mission2_text = f"Mission 2 : {mission2_status} {min(mission2_days, 14)}/14"
 
     # Mission 3: jaga had daily max loss selama 30 hari.
-    sections = _get_user_sections(user_id)
-    init_data = sections.get("initial_setup", {}).get("data", {})
-    max_daily_loss_pct = _to_float(init_data.get("max_daily_loss_pct"))
-    initial_capital = _to_float(init_data.get("initial_capital_usd"))
-    max_daily_loss_usd = (initial_capital * max_daily_loss_pct) / 100.0 if max_daily_loss_pct > 0 else 0.0
-
-    daily_net: dict[date, float] = {}
-    for record in _iter_section_records_between(user_id, "trading_activity", start_date, today):
-        rec_date = _record_date_myt(record)
-        if rec_date is None:
-            continue
-        daily_net[rec_date] = daily_net.get(rec_date, 0.0) + _record_net_usd(record)
-
-    mission3_days = 0
-    mission3_failed = False
-    cur = start_date
-    while cur <= today:
-        day_net = daily_net.get(cur, 0.0)
-        if max_daily_loss_usd > 0 and day_net < -abs(max_daily_loss_usd):
-            mission3_failed = True
-            break
-        mission3_days += 1
-        cur += timedelta(days=1)
-
+    mission3_days = result["mission3_days"]
+    mission3_failed = result["mission3_failed"]
     mission3_pass = mission3_days >= 30 and not mission3_failed
     if mission3_pass:
         mission3_status = "_PASS_"
@@ -1990,31 +3541,16 @@ def get_mission_progress_summary(user_id: int) -> dict[str, str]:
     mission3_text = f"Mission 3 : {mission3_status} {min(mission3_days, 30)}/30"
 
     # Mission 4: capai 100% grow target melalui amount yang disimpan dalam tabung.
-    goal = get_project_grow_goal_summary(user_id)
-    baseline_balance = _to_float(goal.get("current_balance_usd"))
-    target_balance = _to_float(goal.get("target_balance_usd"))
-    grow_target = max(target_balance - baseline_balance, 0.0)
-    achieved = max(get_tabung_balance_usd(user_id), 0.0)
-    mission4_pct = 0.0 if grow_target <= 0 else min((achieved / grow_target) * 100.0, 100.0)
-    mission4_pass = mission4_pct >= 100 and grow_target > 0
+    mission4_pct, mission4_pass = _mission4_progress_pct(user_id)
     if mission4_pass:
         mission4_text = "Mission 4 : _PASS_ 100%"
     else:
         mission4_text = f"Mission 4 : in progress {mission4_pct:.0f}%"
 
-    pass_count = 0
-    if mission1_pass:
-        pass_count += 1
-    if mission2_pass:
-        pass_count += 1
-    if mission3_pass:
-        pass_count += 1
-    if mission4_pass:
-        pass_count += 1
-
+    pass_count = sum(int(passed) for passed in (mission1_pass, mission2_pass, mission3_pass, mission4_pass))
     return {
         "active": "1",
-        "mode_level": mode_level,
+        "mode_level": f"{mode.capitalize()} | Level 1",
         "mission_status": mission_status,
         "progress_count": f"{pass_count}/4",
         "mission_1": mission1_text,
@@ -2024,12 +3560,54 @@ def get_mission_progress_summary(user_id: int) -> dict[str, str]:
     }
 
 
+def _mission_summaries_for(user_ids: list[int], *, active_only: bool) -> dict[int, dict[str, str]]:
+    states = {user_id: get_project_grow_mission_state(user_id) for user_id in user_ids}
+    windows = {user_id: _mission_window(user_id) for user_id, state in states.items() if state["active"]}
+    mission_days = _load_mission_days(windows)
+
+    out: dict[int, dict[str, str]] = {}
+    for user_id, state in states.items():
+        mission_status = get_project_grow_mission_status_text(user_id)
+        if user_id in mission_days:
+            out[user_id] = _mission_summary(user_id, state["mode"], mission_status, mission_days[user_id])
+        elif not active_only:
+            out[user_id] = _inactive_mission_summary(mission_status)
+    return out
+
+
+def get_mission_progress_summary(user_id: int) -> dict[str, str]:
+    return _mission_summaries_for([user_id], active_only=False)[user_id]
+
+
+def get_mission_progress_summaries(user_ids: list[int] | None = None) -> dict[int, dict[str, str]]:
+    """Mission summaries for many users, one ledger read per page of users.
+
+    With ``user_ids`` every listed user gets a summary (inactive ones included).
+    Without it, every active user is paged through and only users running a
+    mission are returned, e.g. for leaderboard or admin views.
+    """
+    if user_ids is not None:
+        out: dict[int, dict[str, str]] = {}
+        for offset in range(0, len(user_ids), MISSION_BATCH_PAGE_SIZE):
+            out.update(_mission_summaries_for(user_ids[offset : offset + MISSION_BATCH_PAGE_SIZE], active_only=False))
+        return out
+
+    out = {}
+    after_user_id: int | None = None
+    while True:
+        page = list_active_user_ids(after_user_id=after_user_id, limit=MISSION_BATCH_PAGE_SIZE)
+        if not page:
+            return out
+        out.update(_mission_summaries_for(page, active_only=True))
+        after_user_id = page[-1]
+
+
+@_transactional
 def apply_project_grow_unlock_to_tabung(user_id: int, unlock_amount_usd: float) -> bool:
     if unlock_amount_usd < 10:
         return False
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not user:
         return False
 
@@ -2049,12 +3627,11 @@ def apply_project_grow_unlock_to_tabung(user_id: int, unlock_amount_usd: float)
             "saved_date": saved_date,
             "saved_time": saved_time,
             "timezone": "Asia/Kuala_Lumpur",
-            "data": {"balance_usd": 0.0, "records": []},
+            "data": {"balance_usd": 0.0, "record_count": 0},
         },
     )
 
     tabung_data = tabung_section.setdefault("data", {})
-    records = tabung_data.setdefault("records", [])
     current_tabung_balance = 0.0
     for key in ("balance_usd", "tabung_balance_usd", "current_balance_usd", "amount_usd"):
         try:
@@ -2065,20 +3642,24 @@ def apply_project_grow_unlock_to_tabung(user_id: int, unlock_amount_usd: float)
     new_balance = current_tabung_balance + float(unlock_amount_usd)
 
     tabung_data["balance_usd"] = new_balance
-    records.append(
-        {
-            "mode": "project_grow_unlock",
-            "amount_usd": float(unlock_amount_usd),
-            "balance_after_usd": new_balance,
-            "saved_at": saved_at_iso,
-            "saved_date": saved_date,
-            "saved_time": saved_time,
-            "timezone": "Asia/Kuala_Lumpur",
-        }
+    _append_tabung_records(
+        user_id,
+        tabung_data,
+        [
+            {
+                "mode": "project_grow_unlock",
+                "amount_usd": float(unlock_amount_usd),
+                "balance_after_usd": new_balance,
+                "saved_at": saved_at_iso,
+                "saved_date": saved_date,
+                "saved_time": saved_time,
+                "timezone": "Asia/Kuala_Lumpur",
+            }
+        ],
     )
 
     # Transfer out from current balance into tabung.
-    _append_monthly_record(
+    _append_ledger_record(
         user_id,
         "balance_adjustment",
         {
@@ -2090,7 +3671,6 @@ def apply_project_grow_unlock_to_tabung(user_id: int, unlock_amount_usd: float)
             "saved_time": saved_time,
             "timezone": "Asia/Kuala_Lumpur",
         },
-        now.date(),
     )
     adjustment_section = sections.setdefault(
         "balance_adjustment",
@@ -2123,10 +3703,11 @@ def apply_project_grow_unlock_to_tabung(user_id: int, unlock_amount_usd: float)
         balance_adjustment_count=1,
     )
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
+@_transactional
 def start_project_grow_mission(user_id: int, mode: str) -> bool:
     mode = (mode or "").strip().lower()
     if mode not in {"normal", "advanced"}:
@@ -2134,8 +3715,7 @@ def start_project_grow_mission(user_id: int, mode: str) -> bool:
     if not can_open_project_grow_mission(user_id):
         return False
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not user:
         return False
 
@@ -2162,13 +3742,13 @@ def start_project_grow_mission(user_id: int, mode: str) -> bool:
     }
 
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
+@_transactional
 def reset_project_grow_mission(user_id: int) -> bool:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not user:
         return False
 
@@ -2178,13 +3758,13 @@ def reset_project_grow_mission(user_id: int) -> bool:
 
     sections.pop("project_grow_mission", None)
     user["updated_at"] = _user_now(user_id).isoformat()
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
+@_transactional
 def reset_project_grow_goal(user_id: int) -> bool:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not user:
         return False
 
@@ -2211,7 +3791,7 @@ def reset_project_grow_goal(user_id: int) -> bool:
             "saved_time": saved_time,
             "timezone": "Asia/Kuala_Lumpur",
         }
-        _append_monthly_record(user_id, "balance_adjustment", record, now.date())
+        _append_ledger_record(user_id, "balance_adjustment", record)
 
         adjustment_section = sections.setdefault(
             "balance_adjustment",
@@ -2233,12 +3813,13 @@ def reset_project_grow_goal(user_id: int) -> bool:
         adjustment_section["saved_time"] = saved_time
         adjustment_section["timezone"] = "Asia/Kuala_Lumpur"
 
-        tabung_section = sections.get("tabung", {})
+        tabung_section = sections.get("tabung")
         if isinstance(tabung_section, dict):
             tabung_data = tabung_section.setdefault("data", {})
-            records = tabung_data.setdefault("records", [])
-            if isinstance(records, list):
-                records.append(
+            _append_tabung_records(
+                user_id,
+                tabung_data,
+                [
                     {
                         "mode": "project_grow_goal_reset_transfer_out",
                         "amount_usd": -float(transfer_amount),
@@ -2248,7 +3829,8 @@ def reset_project_grow_goal(user_id: int) -> bool:
                         "saved_time": saved_time,
                         "timezone": "Asia/Kuala_Lumpur",
                     }
-                )
+                ],
+            )
             tabung_data["balance_usd"] = 0.0
             tabung_section["saved_at"] = saved_at_iso
             tabung_section["saved_date"] = saved_date
@@ -2273,7 +3855,7 @@ def reset_project_grow_goal(user_id: int) -> bool:
         return False
 
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
@@ -2300,11 +3882,23 @@ def reset_all_data() -> None:
             _ensure_mmhelper_kv_table(conn)
             _ensure_mmhelper_activity_table(conn)
             conn.execute(f"DELETE FROM {MMHELPER_ACTIVITY_TABLE}")
-            _write_core_state_to_sqlite(conn, _default_core_db())
+            _ensure_snapshot_storage(conn)
+            conn.execute(f"DELETE FROM {MMHELPER_LEDGER_TABLE}")
+            conn.execute(f"DELETE FROM {MMHELPER_SNAPSHOT_TABLE}")
+            _ensure_notification_marker_storage(conn)
+            conn.execute(f"DELETE FROM {MMHELPER_NOTIFICATION_MARKERS_TABLE}")
+            _ensure_broadcast_queue_tables(conn)
+            conn.execute(f"DELETE FROM {MMHELPER_BROADCAST_RECIPIENTS_TABLE}")
+            conn.execute(f"DELETE FROM {MMHELPER_BROADCAST_JOBS_TABLE}")
+            _ensure_core_storage(conn)
+            _write_core_state_to_tables(conn, _default_core_db())
+            conn.execute("DELETE FROM mmhelper_kv_state WHERE key = ?", (MMHELPER_CORE_KV_KEY,))
     except sqlite3.Error:
         pass
+    _invalidate_core_cache()
 
 
+@_transactional
 def save_user_setup_section(
     user_id: int,
     telegram_name: str,
@@ -2317,17 +3911,11 @@ def save_user_setup_section(
     saved_date = now.strftime("%Y-%m-%d")
     saved_time = now.strftime("%H:%M:%S")
 
-    db = load_core_db()
-    users = db.setdefault("users", {})
-    user_key = str(user_id)
-    user_obj = users.setdefault(
-        user_key,
-        {
-            "user_id": user_id,
-            "telegram_name": telegram_name,
-            "sections": {},
-        },
-    )
+    user_obj = _load_user_obj(user_id) or {
+        "user_id": user_id,
+        "telegram_name": telegram_name,
+        "sections": {},
+    }
 
     user_obj["user_id"] = user_id
     user_obj["telegram_name"] = telegram_name
@@ -2347,15 +3935,15 @@ def save_user_setup_section(
         "data": payload,
     }
 
-    save_core_db(db)
+    _save_user_obj(user_id, user_obj)
 
 
+@_transactional
 def _append_activity_record(user_id: int, section_name: str, reason: str, amount_usd: float, current_profit_usd: float) -> bool:
     if amount_usd <= 0:
         return False
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not user:
         return False
 
@@ -2373,7 +3961,7 @@ def _append_activity_record(user_id: int, section_name: str, reason: str, amount
         "saved_time": saved_time,
         "timezone": "Asia/Kuala_Lumpur",
     }
-    _append_monthly_record(user_id, section_name, record, now.date())
+    _append_ledger_record(user_id, section_name, record)
 
     sections = user.setdefault("sections", {})
     activity_section = sections.setdefault(
@@ -2403,7 +3991,7 @@ def _append_activity_record(user_id: int, section_name: str, reason: str, amount
         _bump_rollup(user, saved_at_iso=saved_at_iso, withdrawal_delta=float(amount_usd), withdrawal_count=1)
 
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
@@ -2415,14 +4003,14 @@ def add_deposit_activity(user_id: int, reason: str, amount_usd: float, current_p
     return _append_activity_record(user_id, "deposit_activity", reason, amount_usd, current_profit_usd)
 
 
+@_transactional
 def add_trading_activity_update(user_id: int, mode: str, amount_usd: float) -> bool:
     if mode not in {"profit", "loss"}:
         return False
     if amount_usd <= 0:
         return False
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not user:
         return False
 
@@ -2441,7 +4029,7 @@ def add_trading_activity_update(user_id: int, mode: str, amount_usd: float) -> b
         "saved_time": saved_time,
         "timezone": "Asia/Kuala_Lumpur",
     }
-    _append_monthly_record(user_id, "trading_activity", record, now.date())
+    _append_ledger_record(user_id, "trading_activity", record)
 
     sections = user.setdefault("sections", {})
     trading_section = sections.setdefault(
@@ -2470,16 +4058,16 @@ def add_trading_activity_update(user_id: int, mode: str, amount_usd: float) -> b
 
     _bump_rollup(user, saved_at_iso=saved_at_iso, trading_delta=net_usd, trading_count=1)
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
+@_transactional
 def apply_initial_capital_reset(user_id: int, new_initial_capital: float) -> bool:
     if new_initial_capital <= 0:
         return False
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not user:
         return False
 
@@ -2508,31 +4096,51 @@ def apply_initial_capital_reset(user_id: int, new_initial_capital: float) -> boo
     sections.pop("transactions", None)
 
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
 def reset_user_all_settings(user_id: int) -> bool:
-    db = load_core_db()
-    users = db.get("users", {})
-    if not isinstance(users, dict):
-        return False
-
-    removed = users.pop(str(user_id), None)
-    if removed is None:
+    """Delete one user with their ledger, snapshots and markers in one transaction."""
+    user_key = str(user_id)
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_core_storage(conn)
+            _ensure_snapshot_storage(conn)
+            _ensure_notification_marker_storage(conn)
+            # All or nothing: a crash must not leave ledger rows that come back
+            # into balances when the same chat registers again.
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            if not _delete_user_from_tables(conn, user_key):
+                return False
+            month_keys = [
+                str(row["month"]).replace("-", "_")
+                for row in conn.execute(
+                    f"""
+                    SELECT DISTINCT substr(record_date, 1, 7) AS month
+                    FROM {MMHELPER_LEDGER_TABLE}
+                    WHERE user_id = ? AND record_date != '' AND section != 'tabung'
+                    """,
+                    (user_key,),
+                ).fetchall()
+            ]
+            conn.execute(f"DELETE FROM {MMHELPER_LEDGER_TABLE} WHERE user_id = ?", (user_key,))
+            conn.execute(f"DELETE FROM {MMHELPER_SNAPSHOT_TABLE} WHERE user_id = ?", (user_key,))
+            conn.execute(f"DELETE FROM {MMHELPER_NOTIFICATION_MARKERS_TABLE} WHERE user_id = ?", (user_key,))
+            version = _bump_core_version(conn)
+    except sqlite3.Error:
+        # Rolled back; the user is still there, so report the reset as failed.
+        _invalidate_core_cache()
         return False
-    save_core_db(db)
-
-    for month_key in _iter_activity_month_keys():
-        monthly_db = _load_activity_db(month_key)
-        month_users = monthly_db.get("users", {})
-        if not isinstance(month_users, dict):
-            continue
-        if str(user_id) not in month_users:
-            continue
-        month_users.pop(str(user_id), None)
-        _save_activity_db(month_key, monthly_db)
 
+    _advance_core_cache(version, ledger_changed=True)
+    with _CORE_CACHE_LOCK:
+        if _core_cache["version"] == version:
+            _core_cache["users"][user_key] = None
+            _core_cache["row_versions"][user_key] = 0
+            _core_cache["daily_targets"].pop(user_key, None)
+    _schedule_json_mirror(core=True, month_keys=month_keys)
     return True
 
 
@@ -2560,6 +4168,7 @@ def get_balance_adjustment_rules(user_id: int) -> dict[str, Any]:
     }
 
 
+@_transactional
 def apply_balance_adjustment(user_id: int, mode: str, amount_usd: float) -> tuple[bool, str]:
     mode = (mode or "").strip().lower()
     if mode not in {"add", "subtract"}:
@@ -2567,8 +4176,7 @@ def apply_balance_adjustment(user_id: int, mode: str, amount_usd: float) -> tupl
     if amount_usd <= 0:
         return False, "Nilai adjustment mesti lebih dari 0."
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not isinstance(user, dict):
         return False, "User tak dijumpai."
 
@@ -2597,7 +4205,7 @@ def apply_balance_adjustment(user_id: int, mode: str, amount_usd: float) -> tupl
         "saved_time": saved_time,
         "timezone": "Asia/Kuala_Lumpur",
     }
-    _append_monthly_record(user_id, "balance_adjustment", record, now.date())
+    _append_ledger_record(user_id, "balance_adjustment", record)
 
     adjustment_section = sections.setdefault(
         "balance_adjustment",
@@ -2626,7 +4234,7 @@ def apply_balance_adjustment(user_id: int, mode: str, amount_usd: float) -> tupl
         balance_adjustment_count=1,
     )
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True, "Balance adjustment berjaya disimpan."
 
 
@@ -2651,9 +4259,9 @@ def _normalize_time_str(value: Any) -> str:
         return ""
 
 
+@_transactional
 def save_notification_settings(user_id: int, payload: dict[str, Any]) -> bool:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not isinstance(user, dict):
         return False
 
@@ -2741,13 +4349,13 @@ def save_notification_settings(user_id: int, payload: dict[str, Any]) -> bool:
     }
 
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
+@_transactional
 def stop_all_notification_settings(user_id: int) -> bool:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not isinstance(user, dict):
         return False
 
@@ -2796,88 +4404,109 @@ def stop_all_notification_settings(user_id: int) -> bool:
     }
 
     user["updated_at"] = saved_at_iso
-    save_core_db(db)
+    _save_user_obj(user_id, user)
+    _clear_notification_markers(user_id)
     return True
 
 
 def get_notification_settings(user_id: int) -> dict[str, Any]:
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id), {})
+    user = _load_user_obj(user_id) or {}
     sections = user.get("sections", {}) if isinstance(user, dict) else {}
     section = sections.get("notification_settings", {}) if isinstance(sections, dict) else {}
     data = section.get("data", {}) if isinstance(section, dict) else {}
     return data if isinstance(data, dict) else {}
 
 
-def list_active_user_ids() -> list[int]:
-    db = load_core_db()
-    users = db.get("users", {})
-    if not isinstance(users, dict):
-        return []
-
-    active_ids: list[int] = []
-    for raw_user_id, user_obj in users.items():
-        if not isinstance(user_obj, dict):
-            continue
-        sections = user_obj.get("sections", {})
-        if not isinstance(sections, dict):
-            continue
-        if "initial_setup" not in sections:
-            continue
-        try:
-            active_ids.append(int(raw_user_id))
-        except (TypeError, ValueError):
-            continue
-    return sorted(set(active_ids))
-
+def _user_index_rows_from_files() -> list[dict[str, Any]]:
+    users = _load_core_db_from_files().get("users", {})
+    return [
+        _user_index_row(str(raw_user_id), user_obj)
+        for raw_user_id, user_obj in users.items()
+        if isinstance(user_obj, dict)
+    ]
 
-def list_registered_user_logs(limit: int = 500) -> list[dict[str, str]]:
-    db = load_core_db()
-    users = db.get("users", {})
-    if not isinstance(users, dict):
-        return []
 
-    rows: list[dict[str, str]] = []
-    for raw_user_id, user_obj in users.items():
-        if not isinstance(user_obj, dict):
-            continue
-        sections = user_obj.get("sections", {})
-        if not isinstance(sections, dict):
-            continue
-        init_section = sections.get("initial_setup", {})
-        if not isinstance(init_section, dict):
-            continue
-        init_data = init_section.get("data", {})
-        if not isinstance(init_data, dict):
-            init_data = {}
-
-        user_id_text = str(user_obj.get("user_id") or raw_user_id)
-        name = str(init_data.get("name") or user_obj.get("telegram_name") or ("User " + user_id_text))
-        telegram_username = str(user_obj.get("telegram_username") or "").strip()
-        if telegram_username and not telegram_username.startswith("@"):
-            telegram_username = "@" + telegram_username
-        if not telegram_username:
-            telegram_username = "-"
-
-        date_text = str(init_section.get("saved_date") or "-")
-        time_text = str(init_section.get("saved_time") or "-")
-
-        rows.append(
+def list_active_user_ids(after_user_id: int | None = None, limit: int | None = None) -> list[int]:
+    """Active (set-up) user ids in ascending order; page with ``after_user_id``."""
+    page_size = -1 if limit is None else max(1, int(limit))
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_core_storage(conn)
+            if after_user_id is None:
+                rows = conn.execute(
+                    f"""
+                    SELECT DISTINCT chat_id FROM {MMHELPER_USER_INDEX_TABLE}
+                    WHERE active = 1 AND chat_id IS NOT NULL
+                    ORDER BY chat_id LIMIT ?
+                    """,
+                    (page_size,),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"""
+                    SELECT DISTINCT chat_id FROM {MMHELPER_USER_INDEX_TABLE}
+                    WHERE active = 1 AND chat_id > ?
+                    ORDER BY chat_id LIMIT ?
+                    """,
+                    (int(after_user_id), page_size),
+                ).fetchall()
+            return [int(row["chat_id"]) for row in rows]
+    except sqlite3.Error:
+        active_ids = sorted(
             {
-                "name": name,
-                "user_id": user_id_text,
-                "telegram_username": telegram_username,
-                "registered_at": f"{date_text} {time_text}",
-                "saved_at": str(init_section.get("saved_at") or ""),
+                row["chat_id"]
+                for row in _user_index_rows_from_files()
+                if row["active"] and row["chat_id"] is not None
+                and (after_user_id is None or row["chat_id"] > after_user_id)
             }
         )
+        return active_ids if limit is None else active_ids[:page_size]
+
+
+def count_active_users() -> int:
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_core_storage(conn)
+            row = conn.execute(
+                f"SELECT COUNT(DISTINCT chat_id) AS c FROM {MMHELPER_USER_INDEX_TABLE} WHERE active = 1"
+            ).fetchone()
+            return _to_int(row["c"]) if row is not None else 0
+    except sqlite3.Error:
+        return len(list_active_user_ids())
+
+
+def _user_log_entry(row: Any) -> dict[str, str]:
+    return {
+        "name": str(row["name"]),
+        "user_id": str(row["user_id"]),
+        "telegram_username": str(row["telegram_username"]),
+        "registered_at": f"{row['registered_date']} {row['registered_time']}",
+    }
 
-    rows.sort(key=lambda item: item.get("saved_at", ""), reverse=True)
+
+def list_registered_user_logs(limit: int = 500, offset: int = 0) -> list[dict[str, str]]:
+    """Newest registrations first; ``offset`` pages through older ones."""
     max_items = max(1, min(int(limit), 2000))
-    trimmed = rows[:max_items]
-    for item in trimmed:
-        item.pop("saved_at", None)
-    return trimmed
+    skip = max(0, int(offset))
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_core_storage(conn)
+            rows = conn.execute(
+                f"""
+                SELECT user_id, name, telegram_username, registered_date, registered_time
+                FROM {MMHELPER_USER_INDEX_TABLE}
+                WHERE active = 1 AND registered_at IS NOT NULL
+                ORDER BY registered_at DESC, user_id
+                LIMIT ? OFFSET ?
+                """,
+                (max_items, skip),
+            ).fetchall()
+            return [_user_log_entry(row) for row in rows]
+    except sqlite3.Error:
+        rows = [row for row in _user_index_rows_from_files() if row["active"] and row["registered_at"] is not None]
+        rows.sort(key=lambda item: item["user_id"])
+        rows.sort(key=lambda item: item["registered_at"], reverse=True)
+        return [_user_log_entry(row) for row in rows[skip : skip + max_items]]
 
 
 def list_registered_user_logs_grouped_by_month(limit_total: int = 2000) -> dict[str, list[dict[str, str]]]:
@@ -2890,7 +4519,474 @@ def list_registered_user_logs_grouped_by_month(limit_total: int = 2000) -> dict[
     return grouped
 
 
+def notification_marker_ttl() -> timedelta:
+    """How long sent markers are kept; older schedules must not fire again."""
+    raw = (os.getenv("MMHELPER_NOTIFICATION_MARKER_TTL_DAYS") or "").strip()
+    try:
+        days = int(raw) if raw else NOTIFICATION_MARKER_DEFAULT_TTL_DAYS
+    except ValueError:
+        days = NOTIFICATION_MARKER_DEFAULT_TTL_DAYS
+    return timedelta(days=max(1, days))
+
+
+def broadcast_job_stale_after() -> timedelta:
+    """How long a due broadcast may wait for a worker before it is expired unsent."""
+    raw = (os.getenv("MMHELPER_BROADCAST_STALE_HOURS") or "").strip()
+    try:
+        hours = float(raw) if raw else BROADCAST_STALE_DEFAULT_HOURS
+    except ValueError:
+        hours = BROADCAST_STALE_DEFAULT_HOURS
+    return timedelta(hours=max(1.0, hours))
+
+
+def _notification_marker_hash(marker: str) -> str:
+    # Manual push markers embed the whole message, so index a fixed-size digest.
+    return hashlib.sha256(marker.encode("utf-8")).hexdigest()
+
+
+@shared_db.schema_once("mmhelper_notification_markers")
+def _ensure_notification_marker_storage(conn: sqlite3.Connection) -> None:
+    _ensure_mmhelper_kv_table(conn)
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MMHELPER_NOTIFICATION_MARKERS_TABLE} (
+            user_id TEXT NOT NULL,
+            category TEXT NOT NULL,
+            marker_hash TEXT NOT NULL,
+            marker TEXT NOT NULL,
+            sent_at TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, category, marker_hash)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_{MMHELPER_NOTIFICATION_MARKERS_TABLE}_expires
+        ON {MMHELPER_NOTIFICATION_MARKERS_TABLE} (expires_at)
+        """
+    )
+    _migrate_notification_markers_if_needed(conn)
+
+
+def _migrate_notification_markers_if_needed(conn: sqlite3.Connection) -> None:
+    if _read_kv_json(conn, MMHELPER_NOTIFICATION_MARKERS_MIGRATION_KV_KEY) is not None:
+        return
+
+    # One-time copy of the runtime lists kept in notification_settings. The
+    # lists are left in place; nothing reads them once the table exists.
+    _ensure_mmhelper_user_tables(conn)
+    now = malaysia_now()
+    expires_at = (now + notification_marker_ttl()).isoformat()
+    migrated = 0
+    for row in conn.execute(
+        f"SELECT user_id, payload_json FROM {MMHELPER_USER_SECTIONS_TABLE} WHERE section = 'notification_settings'"
+    ).fetchall():
+        data = _decode_json_dict(row["payload_json"]).get("data")
+        runtime = data.get("runtime") if isinstance(data, dict) else None
+        if not isinstance(runtime, dict):
+            continue
+        for category, bucket in runtime.items():
+            if not isinstance(bucket, list):
+                continue
+            for marker in bucket:
+                marker = str(marker or "")
+                if not marker:
+                    continue
+                conn.execute(
+                    f"""
+                    INSERT OR IGNORE INTO {MMHELPER_NOTIFICATION_MARKERS_TABLE}
+                    (user_id, category, marker_hash, marker, sent_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (str(row["user_id"]), str(category), _notification_marker_hash(marker), marker, now.isoformat(), expires_at),
+                )
+                migrated += 1
+    _write_kv_json(conn, MMHELPER_NOTIFICATION_MARKERS_MIGRATION_KV_KEY, {"migrated_markers": migrated})
+
+
 def was_notification_sent(user_id: int, category: str, marker: str) -> bool:
+    if not category or not marker:
+        return False
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_notification_marker_storage(conn)
+            row = conn.execute(
+                f"""
+                SELECT 1 FROM {MMHELPER_NOTIFICATION_MARKERS_TABLE}
+                WHERE user_id = ? AND category = ? AND marker_hash = ? AND expires_at > ?
+                """,
+                (str(user_id), category, _notification_marker_hash(marker), malaysia_now().isoformat()),
+            ).fetchone()
+    except sqlite3.Error:
+        return _was_notification_sent_in_settings(user_id, category, marker)
+    return row is not None
+
+
+def mark_notification_sent(user_id: int, category: str, marker: str) -> bool:
+    """Record a sent marker; returns False if it was already recorded."""
+    if not category or not marker:
+        return False
+    now = malaysia_now()
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_notification_marker_storage(conn)
+            conn.execute(
+                f"DELETE FROM {MMHELPER_NOTIFICATION_MARKERS_TABLE} WHERE expires_at <= ?",
+                (now.isoformat(),),
+            )
+            cur = conn.execute(
+                f"""
+                INSERT OR IGNORE INTO {MMHELPER_NOTIFICATION_MARKERS_TABLE}
+                (user_id, category, marker_hash, marker, sent_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    str(user_id),
+                    category,
+                    _notification_marker_hash(marker),
+                    marker,
+                    now.isoformat(),
+                    (now + notification_marker_ttl()).isoformat(),
+                ),
+            )
+    except sqlite3.Error:
+        return _mark_notification_sent_in_settings(user_id, category, marker)
+    return cur.rowcount > 0
+
+
+def _clear_notification_markers(user_id: int) -> None:
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_notification_marker_storage(conn)
+            conn.execute(f"DELETE FROM {MMHELPER_NOTIFICATION_MARKERS_TABLE} WHERE user_id = ?", (str(user_id),))
+    except sqlite3.Error:
+        pass
+
+
+@shared_db.schema_once("mmhelper_broadcast_queue")
+def _ensure_broadcast_queue_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MMHELPER_BROADCAST_JOBS_TABLE} (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_key TEXT NOT NULL UNIQUE,
+            bot_name TEXT NOT NULL,
+            text TEXT NOT NULL,
+            options_json TEXT NOT NULL DEFAULT '{{}}',
+            status TEXT NOT NULL,
+            not_before_ts INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            blocked INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            finished_at TEXT NOT NULL DEFAULT ''
+        )
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_{MMHELPER_BROADCAST_JOBS_TABLE}_due
+        ON {MMHELPER_BROADCAST_JOBS_TABLE} (bot_name, status, not_before_ts)
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MMHELPER_BROADCAST_RECIPIENTS_TABLE} (
+            job_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            shard INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT NOT NULL DEFAULT '',
+            message_id INTEGER NOT NULL DEFAULT 0,
+            claimed_ts REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (job_id, chat_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_{MMHELPER_BROADCAST_RECIPIENTS_TABLE}_claim
+        ON {MMHELPER_BROADCAST_RECIPIENTS_TABLE} (job_id, status, shard)
+        """
+    )
+
+
+def _broadcast_job_from_row(row: sqlite3.Row) -> dict[str, Any]:
+    job = {key: row[key] for key in row.keys()}
+    job["options"] = _decode_json_dict(job.pop("options_json", "{}"))
+    return job
+
+
+def _insert_broadcast_recipients(conn: sqlite3.Connection, job_id: int, chat_ids: list[int]) -> None:
+    unique_ids = sorted({int(chat_id) for chat_id in chat_ids})
+    conn.executemany(
+        f"INSERT OR IGNORE INTO {MMHELPER_BROADCAST_RECIPIENTS_TABLE} (job_id, chat_id, shard) VALUES (?, ?, ?)",
+        [(job_id, chat_id, abs(chat_id) % BROADCAST_SHARDS) for chat_id in unique_ids],
+    )
+    conn.execute(
+        f"""
+        UPDATE {MMHELPER_BROADCAST_JOBS_TABLE}
+        SET status = 'pending',
+            total = (SELECT COUNT(*) FROM {MMHELPER_BROADCAST_RECIPIENTS_TABLE} WHERE job_id = ?)
+        WHERE job_id = ?
+        """,
+        (job_id, job_id),
+    )
+
+
+def enqueue_broadcast_job(
+    bot_name: str,
+    job_key: str,
+    text: str,
+    chat_ids: list[int] | None = None,
+    *,
+    options: dict[str, Any] | None = None,
+    not_before_ts: int = 0,
+) -> int | None:
+    """Queue a broadcast once per ``job_key``; returns the (existing) job id.
+
+    Without ``chat_ids`` the job waits as 'scheduled' and the sending bot picks
+    its recipients when the job becomes due.
+    """
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_broadcast_queue_tables(conn)
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(
+                f"""
+                INSERT INTO {MMHELPER_BROADCAST_JOBS_TABLE}
+                (job_key, bot_name, text, options_json, status, not_before_ts, created_at)
+                VALUES (?, ?, ?, ?, 'scheduled', ?, ?)
+                ON CONFLICT(job_key) DO NOTHING
+                """,
+                (
+                    job_key,
+                    bot_name,
+                    text,
+                    json.dumps(options or {}, ensure_ascii=False),
+                    int(not_before_ts),
+                    malaysia_now().isoformat(),
+                ),
+            )
+            if not cur.rowcount:
+                row = conn.execute(
+                    f"SELECT job_id FROM {MMHELPER_BROADCAST_JOBS_TABLE} WHERE job_key = ?",
+                    (job_key,),
+                ).fetchone()
+                return int(row["job_id"]) if row is not None else None
+            job_id = int(cur.lastrowid)
+            if chat_ids is not None:
+                _insert_broadcast_recipients(conn, job_id, chat_ids)
+    except sqlite3.Error:
+        return None
+    return job_id
+
+
+def set_broadcast_job_recipients(job_id: int, chat_ids: list[int]) -> None:
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_broadcast_queue_tables(conn)
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"SELECT status FROM {MMHELPER_BROADCAST_JOBS_TABLE} WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            # Another worker may have resolved it first.
+            if row is not None and row["status"] == "scheduled":
+                _insert_broadcast_recipients(conn, job_id, chat_ids)
+    except sqlite3.Error:
+        pass
+
+
+def expire_broadcast_jobs() -> None:
+    """Queue housekeeping: drop long-finished jobs and expire ones nobody drained.
+
+    Bots run this from their keep-alive job, not from the worker's idle poll,
+    so the poll itself never needs the write lock.
+    """
+    now = time.time()
+    cutoff = (malaysia_now() - notification_marker_ttl()).isoformat()
+    stale_after = broadcast_job_stale_after()
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_broadcast_queue_tables(conn)
+            # Finished jobs are kept for the marker TTL so their job_key still dedupes.
+            conn.execute(
+                f"""
+                DELETE FROM {MMHELPER_BROADCAST_RECIPIENTS_TABLE} WHERE job_id IN (
+                    SELECT job_id FROM {MMHELPER_BROADCAST_JOBS_TABLE}
+                    WHERE status IN ('done', 'expired') AND finished_at < ?
+                )
+                """,
+                (cutoff,),
+            )
+            conn.execute(
+                f"DELETE FROM {MMHELPER_BROADCAST_JOBS_TABLE} WHERE status IN ('done', 'expired') AND finished_at < ?",
+                (cutoff,),
+            )
+            # Jobs nobody drained (their bot stopped running) go stale; never send them late.
+            conn.execute(
+                f"""
+                UPDATE {MMHELPER_BROADCAST_JOBS_TABLE}
+                SET status = 'expired', finished_at = ?
+                WHERE status IN ('scheduled', 'pending') AND not_before_ts < ? AND created_at < ?
+                """,
+                (
+                    malaysia_now().isoformat(),
+                    int(now - stale_after.total_seconds()),
+                    (malaysia_now() - stale_after).isoformat(),
+                ),
+            )
+    except sqlite3.Error:
+        return
+
+
+def next_broadcast_job(bot_name: str) -> dict[str, Any] | None:
+    """Oldest due job for ``bot_name`` that still has work, or None."""
+    now = time.time()
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_broadcast_queue_tables(conn)
+            row = conn.execute(
+                f"""
+                SELECT * FROM {MMHELPER_BROADCAST_JOBS_TABLE}
+                WHERE bot_name = ? AND status IN ('scheduled', 'pending') AND not_before_ts <= ?
+                ORDER BY not_before_ts, job_id
+                LIMIT 1
+                """,
+                (bot_name, int(now)),
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return _broadcast_job_from_row(row) if row is not None else None
+
+
+def get_broadcast_job(job_id: int) -> dict[str, Any] | None:
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_broadcast_queue_tables(conn)
+            row = conn.execute(
+                f"SELECT * FROM {MMHELPER_BROADCAST_JOBS_TABLE} WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return _broadcast_job_from_row(row) if row is not None else None
+
+
+def claim_broadcast_recipient(job_id: int, shard: int) -> int | None:
+    """Move one pending recipient of ``shard`` to 'sending'; only the claimer sends to it."""
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_broadcast_queue_tables(conn)
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"""
+                SELECT chat_id FROM {MMHELPER_BROADCAST_RECIPIENTS_TABLE}
+                WHERE job_id = ? AND status = 'pending' AND shard = ?
+                LIMIT 1
+                """,
+                (job_id, shard),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                f"""
+                UPDATE {MMHELPER_BROADCAST_RECIPIENTS_TABLE}
+                SET status = 'sending', claimed_ts = ?
+                WHERE job_id = ? AND chat_id = ?
+                """,
+                (time.time(), job_id, row["chat_id"]),
+            )
+    except sqlite3.Error:
+        return None
+    return int(row["chat_id"])
+
+
+def complete_broadcast_recipient(
+    job_id: int,
+    chat_id: int,
+    status: str,
+    attempts: int,
+    error: str = "",
+    message_id: int = 0,
+) -> None:
+    if status not in {"sent", "blocked", "failed"}:
+        status = "failed"
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_broadcast_queue_tables(conn)
+            cur = conn.execute(
+                f"""
+                UPDATE {MMHELPER_BROADCAST_RECIPIENTS_TABLE}
+                SET status = ?, attempts = ?, error = ?, message_id = ?
+                WHERE job_id = ? AND chat_id = ? AND status = 'sending'
+                """,
+                (status, int(attempts), str(error or "")[:500], int(message_id or 0), job_id, int(chat_id)),
+            )
+            if cur.rowcount:
+                conn.execute(
+                    f"UPDATE {MMHELPER_BROADCAST_JOBS_TABLE} SET {status} = {status} + 1 WHERE job_id = ?",
+                    (job_id,),
+                )
+    except sqlite3.Error:
+        pass
+
+
+def finish_broadcast_job(job_id: int) -> dict[str, Any] | None:
+    """Close the job once no recipient is left; returns its progress counters."""
+    try:
+        with _connect_shared_db() as conn:
+            _ensure_broadcast_queue_tables(conn)
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            # A worker that died mid-send leaves 'sending' rows behind. The
+            # message may have gone out, so they are failed, never resent.
+            cur = conn.execute(
+                f"""
+                UPDATE {MMHELPER_BROADCAST_RECIPIENTS_TABLE}
+                SET status = 'failed', error = 'interrupted'
+                WHERE job_id = ? AND status = 'sending' AND claimed_ts < ?
+                """,
+                (job_id, time.time() - BROADCAST_SENDING_LEASE_SEC),
+            )
+            if cur.rowcount:
+                conn.execute(
+                    f"UPDATE {MMHELPER_BROADCAST_JOBS_TABLE} SET failed = failed + ? WHERE job_id = ?",
+                    (cur.rowcount, job_id),
+                )
+            open_row = conn.execute(
+                f"""
+                SELECT COUNT(*) AS c FROM {MMHELPER_BROADCAST_RECIPIENTS_TABLE}
+                WHERE job_id = ? AND status IN ('pending', 'sending')
+                """,
+                (job_id,),
+            ).fetchone()
+            if int(open_row["c"]) == 0:
+                conn.execute(
+                    f"""
+                    UPDATE {MMHELPER_BROADCAST_JOBS_TABLE}
+                    SET status = 'done', finished_at = ?
+                    WHERE job_id = ? AND status = 'pending'
+                    """,
+                    (malaysia_now().isoformat(), job_id),
+                )
+            row = conn.execute(
+                f"SELECT * FROM {MMHELPER_BROADCAST_JOBS_TABLE} WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return _broadcast_job_from_row(row) if row is not None else None
+
+
+def _was_notification_sent_in_settings(user_id: int, category: str, marker: str) -> bool:
     if not category or not marker:
         return False
     data = get_notification_settings(user_id)
@@ -2903,12 +4999,12 @@ def was_notification_sent(user_id: int, category: str, marker: str) -> bool:
     return marker in bucket
 
 
-def mark_notification_sent(user_id: int, category: str, marker: str) -> bool:
+@_transactional
+def _mark_notification_sent_in_settings(user_id: int, category: str, marker: str) -> bool:
     if not category or not marker:
         return False
 
-    db = load_core_db()
-    user = db.get("users", {}).get(str(user_id))
+    user = _load_user_obj(user_id)
     if not isinstance(user, dict):
         return False
 
@@ -2947,7 +5043,7 @@ def mark_notification_sent(user_id: int, category: str, marker: str) -> bool:
     notification_section["saved_time"] = now.strftime("%H:%M:%S")
     notification_section["timezone"] = "Asia/Kuala_Lumpur"
     user["updated_at"] = now.isoformat()
-    save_core_db(db)
+    _save_user_obj(user_id, user)
     return True
 
 
@@ -3082,23 +5178,31 @@ def get_shared_db_health_snapshot() -> dict[str, Any]:
         "size_bytes": int(db_path.stat().st_size) if db_path.exists() else 0,
         "tables": {},
         "core_users": 0,
-        "activity_month_keys": _iter_activity_month_keys(),
+        "activity_month_keys": [],
     }
 
-    db = load_core_db()
-    users = db.get("users", {}) if isinstance(db, dict) else {}
-    snapshot["core_users"] = len(users) if isinstance(users, dict) else 0
-
     if not db_path.exists():
+        # JSON fallback store; opening SQLite here would create the file.
+        snapshot["core_users"] = len(_load_core_db_from_files()["users"])
         return snapshot
 
+    snapshot["activity_month_keys"] = _iter_activity_month_keys()
     try:
         with _connect_shared_db() as conn:
-            _ensure_mmhelper_kv_table(conn)
-            _ensure_mmhelper_activity_table(conn)
+            _ensure_snapshot_storage(conn)
             _ensure_fibo_profiles_table(conn)
+            _ensure_notification_marker_storage(conn)
+            _ensure_broadcast_queue_tables(conn)
             table_names = [
                 "mmhelper_kv_state",
+                MMHELPER_USERS_TABLE,
+                MMHELPER_USER_SECTIONS_TABLE,
+                MMHELPER_USER_INDEX_TABLE,
+                MMHELPER_LEDGER_TABLE,
+                MMHELPER_SNAPSHOT_TABLE,
+                MMHELPER_NOTIFICATION_MARKERS_TABLE,
+                MMHELPER_BROADCAST_JOBS_TABLE,
+                MMHELPER_BROADCAST_RECIPIENTS_TABLE,
                 "mmhelper_activity_monthly",
                 "fibo_extension_profiles",
                 "vip_whitelist",
@@ -3114,8 +5218,10 @@ def get_shared_db_health_snapshot() -> dict[str, Any]:
                 except sqlite3.Error:
                     tables[table] = None
             snapshot["tables"] = tables
+            snapshot["core_users"] = tables.get(MMHELPER_USERS_TABLE) or 0
     except sqlite3.Error:
         snapshot["tables"] = {}
+        snapshot["core_users"] = len(_load_core_db_from_files()["users"])
     return snapshot
 
 
@@ -3125,7 +5231,7 @@ def backup_shared_db(target_path: str | Path) -> tuple[bool, str]:
 
     try:
         with _connect_shared_db() as src:
-            _ensure_mmhelper_kv_table(src)
+            _ensure_core_storage(src)
             _ensure_mmhelper_activity_table(src)
             with sqlite3.connect(out_path) as dst:
                 src.backup(dst)
@@ -3147,5 +5253,6 @@ def restore_shared_db(source_path: str | Path) -> tuple[bool, str]:
         return False, f"restore_failed:{exc}"
 
     # Refresh JSON mirror after restore.
-    _save_json_dict(CORE_DB_PATH, load_core_db())
+    _invalidate_core_cache()
+    _schedule_json_mirror(core=True, month_keys=_iter_activity_month_keys())
     return True, str(_get_shared_db_path())
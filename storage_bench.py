@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for storage.py hot paths on synthetic user populations.
+
+Each population is seeded into a throwaway MMHELPER_SHARED_DB_PATH, so the real
+db/ folder and JSON mirrors are never touched. Results are written as JSON;
+pass ``--baseline`` with an older result file to print the slowdown per call.
+
+    python storage_bench.py --users 1000,10000 --out bench_new.json --baseline bench_old.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+# Must be set before storage is imported so nothing mirrors into the repo.
+os.environ["MMHELPER_JSON_MIRROR"] = "0"
+
+import shared_db
+import storage
+from time_utils import malaysia_now
+
+DEFAULT_USER_COUNTS = "1000,10000,50000"
+SEED_BATCH_USERS = 250
+BENCH_USER_ID_BASE = 700_000_000
+
+
+def _record(moment: datetime, **fields: Any) -> dict[str, Any]:
+    return {
+        **fields,
+        "saved_at": moment.isoformat(),
+        "saved_date": moment.strftime("%Y-%m-%d"),
+        "saved_time": moment.strftime("%H:%M:%S"),
+        "timezone": "Asia/Kuala_Lumpur",
+    }
+
+
+def _section(name: str, user_id: int, moment: datetime, data: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "section": name,
+        "user_id": user_id,
+        "telegram_name": f"Bench {user_id}",
+        **_record(moment),
+        "data": data,
+    }
+
+
+def _synthetic_user(user_id: int, days: int, rng: random.Random) -> tuple[dict[str, Any], list[tuple[str, dict[str, Any]]]]:
+    """One user with ``days`` of deposit/withdrawal/trading/tabung history."""
+    start = malaysia_now().replace(hour=9, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    capital = float(rng.randint(100, 5000))
+    ledger: list[tuple[str, dict[str, Any]]] = []
+    counts = {"deposit_activity": 0, "withdrawal_activity": 0, "trading_activity": 0, "tabung": 0}
+    balance = capital
+    profit = 0.0
+    tabung = 0.0
+
+    for day in range(days):
+        moment = start + timedelta(days=day, minutes=rng.randint(0, 600))
+        if moment.weekday() < 5:
+            amount = round(rng.uniform(1, capital * 0.02), 2)
+            mode = "profit" if rng.random() < 0.55 else "loss"
+            net = amount if mode == "profit" else -amount
+            ledger.append(("trading_activity", _record(moment, mode=mode, amount_usd=amount, net_usd=net)))
+            counts["trading_activity"] += 1
+            balance += net
+            profit += net
+        if day % 30 == 7:
+            amount = float(rng.randint(20, 300))
+            ledger.append(("deposit_activity", _record(moment, amount_usd=amount, reason="bench", current_profit_usd=profit)))
+            counts["deposit_activity"] += 1
+            balance += amount
+        if day % 45 == 20 and balance > 50:
+            amount = float(rng.randint(5, 40))
+            ledger.append(("withdrawal_activity", _record(moment, amount_usd=amount, reason="bench", current_profit_usd=profit)))
+            counts["withdrawal_activity"] += 1
+            balance -= amount
+        if day % 7 == 3 and balance > 20:
+            amount = float(rng.randint(1, 10))
+            tabung += amount
+            balance -= amount
+            ledger.append(("balance_adjustment", _record(moment, mode="tabung_save_transfer_out", amount_usd=amount, net_usd=-amount)))
+            ledger.append(("tabung", _record(moment, mode="save", amount_usd=amount, balance_after_usd=tabung)))
+            counts["tabung"] += 1
+
+    sections = {
+        "tnc_acceptance": _section("tnc_acceptance", user_id, start, {"accepted": True}),
+        "initial_setup": _section(
+            "initial_setup",
+            user_id,
+            start,
+            {"name": f"Bench {user_id}", "initial_capital_usd": capital, "max_daily_loss_pct": 5},
+        ),
+        "project_grow_goal": _section(
+            "project_grow_goal",
+            user_id,
+            start,
+            {"target_balance_usd": capital * 2, "current_balance_usd": capital, "target_days": 90, "unlock_amount_usd": 10},
+        ),
+        "tabung": _section("tabung", user_id, start, {"balance_usd": tabung, "record_count": counts["tabung"]}),
+    }
+    for name in ("deposit_activity", "withdrawal_activity", "trading_activity"):
+        data: dict[str, Any] = {"record_count": counts[name]}
+        if name == "trading_activity":
+            data["current_profit_usd"] = profit
+        sections[name] = _section(name, user_id, start, data)
+    if user_id % 3 == 0:
+        sections["project_grow_mission"] = _section(
+            "project_grow_mission",
+            user_id,
+            start,
+            {"active": True, "mode": "normal", "started_at": start.isoformat(), "started_date": start.strftime("%Y-%m-%d")},
+        )
+
+    user_obj = {
+        "user_id": user_id,
+        "telegram_name": f"Bench {user_id}",
+        "telegram_username": f"bench{user_id}",
+        "updated_at": start.isoformat(),
+        "sections": sections,
+    }
+    return user_obj, ledger
+
+
+def _replay_clock(moment: datetime) -> None:
+    # Public entry points stamp records with storage's clock; replay history by moving it.
+    storage.malaysia_now = lambda: moment
+
+
+def _seed_user_public(user_obj: dict[str, Any], ledger: list[tuple[str, dict[str, Any]]]) -> int:
+    """Write one synthetic user through public storage calls only; returns ledger rows written.
+
+    Tabung saves the public rules refuse (minimum balance) are skipped, so the
+    count can be a little below the unit-of-work seed for the same population.
+    """
+    user_id = int(user_obj["user_id"])
+    name = user_obj["telegram_name"]
+    username = user_obj["telegram_username"]
+    sections = user_obj["sections"]
+    _replay_clock(datetime.fromisoformat(sections["initial_setup"]["saved_at"]))
+    storage.save_tnc_acceptance(user_id, name, True, username)
+    for section in ("initial_setup", "project_grow_goal"):
+        storage.save_user_setup_section(user_id, name, section, sections[section]["data"], username)
+
+    written = 0
+    for section, record in ledger:
+        _replay_clock(datetime.fromisoformat(record["saved_at"]))
+        if section == "trading_activity":
+            ok = storage.add_trading_activity_update(user_id, record["mode"], record["amount_usd"])
+        elif section == "deposit_activity":
+            ok = storage.add_deposit_activity(user_id, record["reason"], record["amount_usd"], record["current_profit_usd"])
+        elif section == "withdrawal_activity":
+            ok = storage.add_withdrawal_activity(user_id, record["reason"], record["amount_usd"], record["current_profit_usd"])
+        elif section == "tabung":
+            # The save also writes its balance_adjustment transfer row.
+            ok, _ = storage.apply_tabung_update_action(user_id, "save", record["amount_usd"])
+            written += int(bool(ok))
+        else:
+            continue
+        written += int(bool(ok))
+    return written
+
+
+def seed_population(user_count: int, days: int, seed: int) -> dict[str, Any]:
+    """Seed ``user_count`` synthetic users.
+
+    Batches go through one storage unit of work when this storage.py has it;
+    older trees are seeded record by record through the public entry points.
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    ledger_rows = 0
+    unit_of_work = getattr(storage, "_unit_of_work", None)
+    if unit_of_work is None:
+        real_clock = storage.malaysia_now
+        try:
+            for offset in range(user_count):
+                user_obj, ledger = _synthetic_user(BENCH_USER_ID_BASE + offset, days, rng)
+                ledger_rows += _seed_user_public(user_obj, ledger)
+        finally:
+            storage.malaysia_now = real_clock
+    else:
+        for batch_start in range(0, user_count, SEED_BATCH_USERS):
+            # One unit of work per batch: one transaction instead of one per record.
+            with unit_of_work() as uow:
+                for offset in range(batch_start, min(batch_start + SEED_BATCH_USERS, user_count)):
+                    user_id = BENCH_USER_ID_BASE + offset
+                    user_obj, ledger = _synthetic_user(user_id, days, rng)
+                    uow.users[str(user_id)] = user_obj
+                    uow.ledger.extend((str(user_id), section, record) for section, record in ledger)
+                    ledger_rows += len(ledger)
+
+    verify = getattr(storage, "verify_stats_rollups", None)
+    rollups = verify(batch_size=1000, fix=True) if verify is not None else {}
+    return {
+        "users": user_count,
+        "days": days,
+        "ledger_rows": ledger_rows,
+        "seed_mode": "public_api" if unit_of_work is None else "unit_of_work",
+        "seed_sec": round(time.perf_counter() - started, 3),
+        "rollups_initialized": rollups.get("initialized", 0),
+    }
+
+
+def _drop_caches() -> None:
+    invalidate = getattr(storage, "_invalidate_core_cache", None)
+    if invalidate is not None:
+        invalidate()
+
+
+def _stats(samples: list[float]) -> dict[str, Any]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    total = sum(ordered)
+    return {
+        "calls": len(ordered),
+        "total_ms": round(total * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "p95_ms": round(p95 * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "ops_per_sec": round(len(ordered) / total, 2) if total > 0 else None,
+    }
+
+
+def _time_calls(func: Callable[[int], Any], user_ids: list[int], *, cold: bool) -> dict[str, Any]:
+    samples: list[float] = []
+    for user_id in user_ids:
+        if cold:
+            _drop_caches()
+        started = time.perf_counter()
+        func(user_id)
+        samples.append(time.perf_counter() - started)
+    return _stats(samples)
+
+
+def _weekly_report_pdf(user_id: int) -> bytes:
+    # Dataset plus in-process render; skips the PDF file cache on purpose.
+    from report_pdf import render_report_pdf
+    from report_pipeline import build_weekly_report_data
+
+    return render_report_pdf(build_weekly_report_data(user_id))[0]
+
+
+def run_benchmarks(user_count: int, *, calls: int, cold: bool, seed: int) -> dict[str, Any]:
+    rng = random.Random(seed + 1)
+    sample = [BENCH_USER_ID_BASE + rng.randrange(user_count) for _ in range(max(1, calls))]
+    results: dict[str, Any] = {}
+
+    read_paths: dict[str, Callable[[int], Any]] = {
+        "get_current_balance_usd": storage.get_current_balance_usd,
+        "get_transaction_history_records": lambda uid: storage.get_transaction_history_records(uid, 30),
+        "get_mission_progress_summary": storage.get_mission_progress_summary,
+    }
+    for name, func in read_paths.items():
+        results[name] = _time_calls(func, sample, cold=cold)
+
+    # Whole-population scans are slow at 50k users, so they run a handful of times.
+    scan_calls = sample[: max(1, min(len(sample), 5))]
+    results["list_active_user_ids"] = _time_calls(lambda _: storage.list_active_user_ids(), scan_calls, cold=cold)
+    # Older storage.py revisions lack some entry points; those rows are left out.
+    if hasattr(storage, "get_mission_progress_summaries"):
+        results["get_mission_progress_summaries"] = _time_calls(
+            lambda _: storage.get_mission_progress_summaries(), scan_calls, cold=cold
+        )
+
+    if importlib.util.find_spec("report_pipeline") and importlib.util.find_spec("report_pdf"):
+        results["weekly_report_pdf"] = _time_calls(_weekly_report_pdf, sample[: max(1, min(len(sample), 20))], cold=cold)
+
+    # Writes last: they change the data the read paths above were timed on.
+    results["add_trading_activity_update"] = _time_calls(
+        lambda uid: storage.add_trading_activity_update(uid, "profit", 1.0),
+        sample,
+        cold=cold,
+    )
+    return results
+
+
+def _use_fresh_database(workdir: Path) -> Path:
+    db_path = workdir / "mmhelper_shared.db"
+    os.environ["MMHELPER_SHARED_DB_PATH"] = str(db_path)
+    storage.CORE_DB_PATH = workdir / "mmhelper_core.json"
+    storage.LEGACY_DB_PATH = workdir / "mmhelper_db.json"
+    storage.ACTIVITY_DB_DIR = workdir / "activity"
+    shared_db.close_thread_connections()
+    _drop_caches()
+    return db_path
+
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return out.stdout.strip()
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Median ratio (current / baseline) per population and entry point."""
+    lines: list[str] = []
+    old_by_users = {row["population"]["users"]: row for row in baseline.get("populations", [])}
+    for row in current.get("populations", []):
+        users = row["population"]["users"]
+        old = old_by_users.get(users)
+        if old is None:
+            continue
+        for name, result in row["results"].items():
+            old_result = old["results"].get(name, {})
+            if "median_ms" not in result or not old_result.get("median_ms"):
+                continue
+            ratio = result["median_ms"] / old_result["median_ms"]
+            lines.append(f"{users:>6} users  {name:<34} {old_result['median_ms']:>9.3f} -> {result['median_ms']:>9.3f} ms  x{ratio:.2f}")
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark storage.py hot paths on synthetic users.")
+    parser.add_argument("--users", default=DEFAULT_USER_COUNTS, help="comma-separated population sizes")
+    parser.add_argument("--days", type=int, default=90, help="days of history per user")
+    parser.add_argument("--calls", type=int, default=200, help="timed calls per entry point")
+    parser.add_argument("--cold", action="store_true", help="drop the in-process cache before every call")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep-db", action="store_true", help="keep the temporary databases")
+    parser.add_argument("--out", default="storage_bench.json")
+    parser.add_argument("--baseline", default="", help="earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    user_counts = [int(item) for item in str(args.users).split(",") if item.strip()]
+    payload: dict[str, Any] = {
+        "meta": {
+            "created_at": malaysia_now().isoformat(),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "days": args.days,
+            "calls": args.calls,
+            "cold_cache": bool(args.cold),
+            "seed": args.seed,
+        },
+        "populations": [],
+    }
+
+    for user_count in user_counts:
+        workdir = Path(tempfile.mkdtemp(prefix=f"mmhelper_bench_{user_count}_"))
+        db_path = _use_fresh_database(workdir)
+        print(f"Seeding {user_count} users x {args.days} days ...", flush=True)
+        population = seed_population(user_count, args.days, args.seed)
+        population["db_bytes"] = db_path.stat().st_size
+        print(f"  {population['ledger_rows']} ledger rows in {population['seed_sec']}s", flush=True)
+        results = run_benchmarks(user_count, calls=args.calls, cold=args.cold, seed=args.seed)
+        for name, result in results.items():
+            print(f"  {name:<34} {result.get('median_ms', result.get('skipped'))}", flush=True)
+        payload["populations"].append({"population": population, "results": results})
+        shared_db.close_thread_connections()
+        if not args.keep_db:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    out = Path(args.out).resolve()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Saved: {out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        for line in compare(payload, baseline):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+os.environ["MMHELPER_JSON_MIRROR"] = "0"
+sys.path.insert(0, str(REPO_ROOT))
+
+import shared_db  # noqa: E402
+import storage  # noqa: E402
+
+USER_ID = 424242
+
+OTHER_WRITER = """
+import sys
+from pathlib import Path
+from typing import Any
+import storage
+workdir = Path(sys.argv[1])
+storage.CORE_DB_PATH = workdir / "mmhelper_core.json"
+storage.LEGACY_DB_PATH = workdir / "mmhelper_db.json"
+storage.ACTIVITY_DB_DIR = workdir / "activity"
+assert storage.add_trading_activity_update(int(sys.argv[2]), "profit", 25.0)
+"""
+
+
+class TwoWriterTests(unittest.TestCase):
+    """A second process commits while a read path holds a stale copy of the user."""
+
+    def setUp(self) -> None:
+        self.workdir = Path(tempfile.mkdtemp())
+        env = {
+            "MMHELPER_SHARED_DB_PATH": str(self.workdir / "mmhelper_shared.db"),
+            "MMHELPER_JSON_MIRROR": "0",
+        }
+        patches = [
+            mock.patch.dict(os.environ, env),
+            mock.patch.object(storage, "CORE_DB_PATH", self.workdir / "mmhelper_core.json"),
+            mock.patch.object(storage, "LEGACY_DB_PATH", self.workdir / "mmhelper_db.json"),
+            mock.patch.object(storage, "ACTIVITY_DB_DIR", self.workdir / "activity"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(shared_db.close_thread_connections)
+        shared_db.close_thread_connections()
+        storage._invalidate_core_cache()
+
+        setup_day = storage.malaysia_now() - timedelta(days=14)
+        with mock.patch.object(storage, "malaysia_now", lambda: setup_day):
+            storage.save_tnc_acceptance(USER_ID, "Writer", True, "writer")
+            storage.save_user_setup_section(
+                USER_ID, "Writer", "initial_setup", {"name": "Writer", "initial_capital_usd": 1000, "max_daily_loss_pct": 5}
+            )
+            storage.save_user_setup_section(
+                USER_ID,
+                "Writer",
+                "project_grow_goal",
+                {"target_balance_usd": 2000, "current_balance_usd": 1000, "target_days": 90, "unlock_amount_usd": 10},
+            )
+
+    def run_other_writer(self) -> None:
+        subprocess.run(
+            [sys.executable, "-c", OTHER_WRITER, str(self.workdir), str(USER_ID)],
+            cwd=REPO_ROOT,
+            env=os.environ.copy(),
+            check=True,
+            timeout=60,
+        )
+
+    def other_writer_during(self, name: str) -> Any:
+        """Patch ``storage.<name>`` so the other process commits on its first call."""
+        original = getattr(storage, name)
+        calls = []
+
+        def wrapper(*args, **kwargs):
+            if not calls:
+                calls.append(True)
+                self.run_other_writer()
+            return original(*args, **kwargs)
+
+        return mock.patch.object(storage, name, wrapper)
+
+    def assert_other_write_kept(self) -> None:
+        storage._invalidate_core_cache()
+        sections = storage._get_user_sections(USER_ID)
+        self.assertIn("trading_activity", sections)
+        self.assertIn("daily_target_tracker", sections)
+        self.assertEqual(storage._get_user_rollup(USER_ID)["trading_record_count"], 1)
+
+    def test_weekly_target_freeze_keeps_concurrent_write(self) -> None:
+        with self.other_writer_during("_remaining_target_usd_before_date"):
+            self.assertGreater(storage.get_weekly_frozen_daily_target_usd(USER_ID), 0)
+        self.assert_other_write_kept()
+
+    def test_provisional_rollup_keeps_concurrent_write(self) -> None:
+        storage.get_weekly_frozen_daily_target_usd(USER_ID)
+        user = storage._load_user_obj(USER_ID)
+        user.pop("stats_rollup", None)
+        storage._save_user_obj(USER_ID, user)
+
+        with self.other_writer_during("_provisional_rollup"):
+            storage._get_user_rollup(USER_ID)
+        self.assert_other_write_kept()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ import json
 import logging
 import os
 import sqlite3
+import sys
 import time
 from dataclasses import asdict, dataclass
 from datetime import UTC, datetime, timedelta
@@ -17,6 +18,13 @@ from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+# Shared analysis cache lives at the repo root.
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
+
+from analysis_cache import cached_analysis  # noqa: E402
+
 
 LOGGER = logging.getLogger("twelve_auto_analysis_bot")
 
@@ -674,8 +682,14 @@ def build_signal_payload(
     tf_rows = rows_by_tf.get(analysis_tf) or []
     latest_close = tf_rows[-1]["close"] if tf_rows else None
 
-    market_structure = detect_dbo_structure(tf_rows)
-    fib = compute_fib_extension(tf_rows)
+    # Reruns without a new candle (polls shorter than the TF) reuse the last structure.
+    market_structure, fib = cached_analysis(
+        "signal_structure",
+        analysis_tf,
+        tf_rows[-1] if tf_rows else None,
+        {"symbol": symbol, "rows": len(tf_rows)},
+        lambda: (detect_dbo_structure(tf_rows), compute_fib_extension(tf_rows)),
+    )
 
     signal = "HOLD"
     if market_structure.get("regime") == "bullish_structure":
@@ -10,6 +10,7 @@ import json
 import logging
 import os
 import sqlite3
+import sys
 import threading
 import time
 from dataclasses import dataclass
@@ -22,6 +23,14 @@ from urllib.parse import parse_qs, urlparse
 
 from websocket import WebSocketApp  # type: ignore[import-untyped]
 
+# Shared SQLite connection pool lives at the repo root.
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.append(str(_REPO_ROOT))
+
+import shared_db  # noqa: E402
+from analysis_cache import cached_analysis  # noqa: E402
+
 
 LOGGER = logging.getLogger("twelve_live_trigger_bot")
 
@@ -113,9 +122,7 @@ class Storage:
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.cfg.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return shared_db.connect(self.cfg.db_path)
 
     def _init_db(self) -> None:
         with self._connect() as conn:
@@ -298,20 +305,17 @@ def extract_price_symbol(payload: dict[str, Any]) -> tuple[str | None, float | N
 
 
 def load_tf_candles(db_path: Path, timeframe: str, limit: int) -> list[dict[str, Any]]:
-    con = sqlite3.connect(db_path)
-    try:
-        rows = con.execute(
-            """
-            SELECT ts, open, high, low, close
-            FROM candles
-            WHERE timeframe = ?
-            ORDER BY ts DESC
-            LIMIT ?
-            """,
-            (timeframe, limit),
-        ).fetchall()
-    finally:
-        con.close()
+    con = shared_db.connect(db_path, row_factory=None)
+    rows = con.execute(
+        """
+        SELECT ts, open, high, low, close
+        FROM candles
+        WHERE timeframe = ?
+        ORDER BY ts DESC
+        LIMIT ?
+        """,
+        (timeframe, limit),
+    ).fetchall()
 
     rows.reverse()
     out: list[dict[str, Any]] = []
@@ -413,6 +417,24 @@ def detect_dbo(candles: list[dict[str, Any]], pivots: list[dict[str, Any]], tol_
     return best or {"status": "NO_SETUP"}
 
 
+def build_dbo_preview(db_path: Path, timeframe: str, limit: int) -> dict[str, Any]:
+    """Candles and DBO setup for /dbo-preview, computed once per new candle."""
+    newest = load_tf_candles(db_path, timeframe, 1)
+
+    def compute() -> dict[str, Any]:
+        candles = load_tf_candles(db_path, timeframe, limit)
+        pivots = find_pivots(candles, swing_window=2)
+        return {"candles": candles, "setup": detect_dbo(candles, pivots)}
+
+    return cached_analysis(
+        "dbo_preview",
+        timeframe,
+        newest[-1] if newest else None,
+        {"db": str(db_path), "limit": limit, "swing_window": 2, "tol_pct": 0.003},
+        compute,
+    )
+
+
 class LiveBot:
     def __init__(self, cfg: Config):
         self.cfg = cfg
@@ -534,16 +556,14 @@ class LiveBot:
                     except ValueError:
                         limit = 400
                     limit = max(80, min(limit, 1200))
-                    candles = load_tf_candles(cfg.live_candles_db, tf, limit)
-                    pivots = find_pivots(candles, swing_window=2)
-                    setup = detect_dbo(candles, pivots)
+                    preview = build_dbo_preview(cfg.live_candles_db, tf, limit)
                     self._send_json(
                         HTTPStatus.OK,
                         {
                             "ok": True,
                             "timeframe": tf,
-                            "candles": candles,
-                            "setup": setup,
+                            "candles": preview["candles"],
+                            "setup": preview["setup"],
                         },
                     )
                     return